@@ -0,0 +1,95 @@
+"""
+Compares the adder architectures which can stand in for `Add8`.
+
+For each one, reports its NAND gate count, its depth (the longest path of
+NAND gates from an input to an output), the deepest Python call stack
+reached while propagating one addition through the Wire objects, and the
+additions per second simulated by the object engine and by the compiled
+Netlist (a single lane at a time):
+
+    python benchmarks/adders.py
+"""
+import os
+import random
+import sys
+import time
+
+# the repository root, so the package is found without installing it.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from circuit import (
+    Wire, Bus, NAND, Netlist, reset_globals,
+    Add8, CarryLookaheadAdd8, KoggeStoneAdd8, BrentKungAdd8,
+)
+
+ADDERS = [Add8, CarryLookaheadAdd8, KoggeStoneAdd8, BrentKungAdd8]
+
+
+def depth(netlist):
+    level = [0] * len(netlist)
+    for i, (a, b, out) in enumerate(netlist.table):
+        level[out] = max(level[out], level[a] + 1, level[b] + 1)
+    return max(level[net] for nets in netlist.outputs.values() for net in nets)
+
+
+def stack_depth(inputs, cases):
+    deepest = 0
+    frames = 0
+
+    def profile(frame, event, arg):
+        nonlocal deepest, frames
+        if event == "call":
+            frames += 1
+            deepest = max(deepest, frames)
+        elif event == "return":
+            frames -= 1
+
+    a, b, cin = inputs
+    sys.setprofile(profile)
+    try:
+        for x, y, z in cases:
+            inputs.reset()
+            a.value, b.value, cin.value = x, y, z
+    finally:
+        sys.setprofile(None)
+    return deepest
+
+
+def measure(adder, count=2000):
+    reset_globals()
+    inputs = Bus([Bus(8), Bus(8), Wire()])
+    a, b, cin = inputs
+    component = adder(a=a, b=b, cin=cin)
+    netlist = Netlist(component)
+    nands = sum(isinstance(gate, NAND) for gate in netlist.gates)
+
+    rng = random.Random(0)
+    cases = [(rng.getrandbits(8), rng.getrandbits(8), rng.random() < 0.5) for i in range(count)]
+
+    start = time.perf_counter()
+    for x, y, z in cases:
+        inputs.reset()
+        a.value, b.value, cin.value = x, y, z
+    objects = count / (time.perf_counter() - start)
+
+    evaluate = netlist.compile()
+    start = time.perf_counter()
+    for x, y, z in cases:
+        v = netlist.values()
+        netlist.set_inputs(v, {"a": x, "b": y, "cin": z})
+        evaluate(v, 1)
+    compiled = count / (time.perf_counter() - start)
+
+    worst = [(255, 1, False), (0, 255, True)]
+    return nands, depth(netlist), stack_depth(inputs, worst), objects, compiled
+
+
+def main():
+    print(f"{'adder':>20} {'NANDs':>6} {'depth':>6} {'stack':>6} {'object/s':>9} {'compiled/s':>11}")
+    for adder in ADDERS:
+        nands, levels, stack, objects, compiled = measure(adder)
+        print(f"{adder.__name__:>20} {nands:>6} {levels:>6} {stack:>6} {objects:>9.0f} {compiled:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
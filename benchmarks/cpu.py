@@ -0,0 +1,148 @@
+"""
+Instructions and clock cycles per second of the CPU running real programs.
+
+Assembles each program of a small library (loops, memcpy and arithmetic
+kernels), loads it into a fresh CPU and runs it until it halts, on the
+object and compiled simulation engine, then checks its result and reports
+the instructions and cycles simulated per second and the cycles per
+instruction. (The CPU has no word-level model of its own, so it can't be
+simulated by the behavioral engine.) The object engine is slow enough that
+it is stopped after `object_cycles` cycles, which is plenty to measure its
+rate:
+
+    python benchmarks/cpu.py [object_cycles]
+"""
+import os
+import sys
+import time
+
+# the repository root, so the package is found without installing it.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from circuit import CPU, Simulator, assemble, reset_globals
+from circuit.cpu import Controller
+
+COUNTDOWN = """
+        LDI X, 0
+loop:   ADDI X, -1
+        JNZ loop
+        HLT
+"""
+
+SUM16 = """
+; the 16-bit sum of 1..100, in low and high
+        LDI X, 100
+loop:   LD Y, low
+        ALU Y, ADD
+        ST Y, low
+        JNC next
+        LD Y, high
+        ADDI Y, 1
+        ST Y, high
+next:   ADDI X, -1
+        JNZ loop
+        HLT
+        .org 0x80
+low:    .byte 0
+high:   .byte 0
+"""
+
+MEMCPY = """
+; copies 64 bytes from src to dst
+        LDI X, 0
+loop:   LDX Y, src
+        STX Y, dst
+        ADDI X, 1
+        CMPI X, 64
+        JC loop
+        HLT
+        .org 0x40
+src:    .byte {data}
+        .org 0x80
+dst:
+""".format(data=", ".join(str(i * 7 % 256) for i in range(64)))
+
+MULTIPLY = """
+; 13 * 19 by repeated addition
+        LDI X, 19
+        LDI Y, 0
+loop:   ADDI Y, 13
+        ADDI X, -1
+        JNZ loop
+        ST Y, product
+        HLT
+        .org 0x80
+product: .byte 0
+"""
+
+FIBONACCI = """
+; the Fibonacci numbers up to fib[13] = 233
+        LDI X, 0
+loop:   ST X, i
+        LDX Y, fib + 1
+        LDX X, fib
+        ALU Y, ADD
+        LD X, i
+        STX Y, fib + 2
+        ADDI X, 1
+        CMPI X, 12
+        JC loop
+        HLT
+i:      .byte 0
+        .org 0x80
+fib:    .byte 0, 1
+"""
+
+
+def fibonacci(n):
+    a, b = 0, 1
+    for i in range(n):
+        yield a
+        a, b = b, a + b
+
+
+# name -> (source, check of the final RAM contents); results are at 0x80.
+PROGRAMS = {
+    "countdown": (COUNTDOWN, lambda ram: True),
+    "sum16": (SUM16, lambda ram: ram[0x80:0x82] == (5050).to_bytes(2, "little")),
+    "memcpy": (MEMCPY, lambda ram: ram[0x80:0xc0] == ram[0x40:0x80]),
+    "multiply": (MULTIPLY, lambda ram: ram[0x80] == 13 * 19),
+    "fibonacci": (FIBONACCI, lambda ram: list(ram[0x80:0x8e]) == list(fibonacci(14))),
+}
+
+
+def measure(source, engine, limit):
+    reset_globals()
+    image = assemble(source)
+    cpu = CPU()
+    cpu.load(image)
+    sim = Simulator(cpu, engine)
+    # every instruction loads `op` once, on its fetch step.
+    fetches = sim.watch(cpu.controller.load_op, "rising")
+    sim.watch(cpu.op.out, Controller.OPCODE.HLT, stop=True)
+
+    start = time.perf_counter()
+    halted = sim.run(limit) is not None
+    elapsed = time.perf_counter() - start
+    ram = cpu.ram.contents()
+    return halted, ram, fetches.hits / elapsed, sim.cycles / elapsed
+
+
+def main(object_cycles=300):
+    print(
+        f"{'program':>10} {'engine':>10} {'halted':>7} {'instr/s':>10}"
+        f" {'cycles/s':>10} {'CPI':>6}"
+    )
+    for name, (source, check) in PROGRAMS.items():
+        for engine, limit in (("object", object_cycles), ("compiled", 100000)):
+            halted, ram, instructions, cycles = measure(source, engine, limit)
+            if halted and not check(ram):
+                raise AssertionError(f"{name} gave the wrong result on {engine}.")
+            print(
+                f"{name:>10} {engine:>10} {str(halted):>7} {instructions:>10.0f}"
+                f" {cycles:>10.0f} {cycles / instructions:>6.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
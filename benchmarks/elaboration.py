@@ -0,0 +1,91 @@
+"""
+Compares building components by running their constructors with cloning
+them from a Template.
+
+For each component, reports the best time to elaborate it from scratch
+(with every templated class disabled), the time to build it the first and
+second time with templates (the second build also makes its Template, a
+one-time cost of a few builds), and the best time of the builds after
+that, which are clones. From these, it reports after how many builds the
+templates have paid for themselves, and their speedup over `BUILDS`
+builds:
+
+    python benchmarks/elaboration.py
+"""
+import gc
+import os
+import sys
+import time
+
+# the repository root, so the package is found without installing it.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from circuit import Wire, Bus, Component, RAM, CPU, reset_globals
+
+CASES = [
+    ("RAM 256x8", lambda: RAM(Bus(8), Bus(8), Wire())),
+    ("RAM 1024x8", lambda: RAM(Bus(8), Bus(10), Wire(), addr_bits=10)),
+    ("RAM 256x16", lambda: RAM(Bus(16), Bus(8), Wire(), word_bits=16)),
+    ("CPU", lambda: CPU()),
+]
+
+
+def templated_classes(cls=Component):
+    for subclass in cls.__subclasses__():
+        if subclass.__dict__.get("templated"):
+            yield subclass
+        yield from templated_classes(subclass)
+
+
+def timed(build):
+    gc.collect()
+    start = time.perf_counter()
+    build()
+    return time.perf_counter() - start
+
+
+BUILDS = 100
+
+
+def measure(build, clones=5):
+    classes = list(templated_classes())
+    reset_globals()
+    for cls in classes:
+        cls.templated = False
+    try:
+        scratch = min(timed(build) for i in range(clones))
+    finally:
+        for cls in classes:
+            cls.templated = True
+
+    reset_globals()
+    first = timed(build)
+    second = timed(build)
+    clone = min(timed(build) for i in range(clones))
+    return scratch, first, second, clone
+
+
+def templated_total(builds, first, second, clone):
+    return first + second + (builds - 2) * clone
+
+
+def main():
+    print(
+        f"{'component':>12} {'scratch':>9} {'first':>9} {'second':>9} {'clone':>9}"
+        f" {'break-even':>10} {'speedup':>8}"
+    )
+    for name, build in CASES:
+        scratch, first, second, clone = measure(build)
+        builds = 2
+        while templated_total(builds, first, second, clone) > builds * scratch and builds < BUILDS:
+            builds += 1
+        total = templated_total(BUILDS, first, second, clone)
+        print(
+            f"{name:>12} {scratch * 1000:>7.1f}ms {first * 1000:>7.1f}ms "
+            f"{second * 1000:>7.1f}ms {clone * 1000:>7.1f}ms "
+            f"{builds:>10} {BUILDS * scratch / total:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
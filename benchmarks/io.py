@@ -0,0 +1,66 @@
+"""
+End-to-end throughput of an I/O bound program on the CPU.
+
+Runs a program which copies every byte from an InputFIFO to a Console
+until the input runs out, and reports, for each simulation engine, the
+clock cycles simulated per second and the bytes echoed per second:
+
+    python benchmarks/io.py [bytes]
+"""
+import os
+import sys
+import time
+
+# the repository root, so the package is found without installing it.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from circuit import (
+    CPU, Simulator, MemoryMap, Console, InputFIFO, reset_globals
+)
+from circuit.cpu import Controller
+
+OP = Controller.OPCODE
+
+ECHO = [
+    OP.LD | 0, 0xf2,    # 0: X = bytes waiting
+    OP.CMPI | 0, 0,
+    OP.JZ, 12,
+    OP.LD | 1, 0xf1,    # Y = the next byte
+    OP.ST | 1, 0xf0,    # print it
+    OP.JMP, 0,
+    OP.HLT,             # 12
+]
+
+
+def measure(engine, size):
+    reset_globals()
+    cpu = CPU()
+    for address, byte in enumerate(ECHO):
+        cpu.ram.registers[address].next_state = byte
+    sim = Simulator(cpu, engine)
+    io = MemoryMap(sim, cpu)
+    console = io.attach(Console(0xf0))
+    fifo = io.attach(InputFIFO(0xf1))
+    data = bytes(i % 251 for i in range(size))
+    fifo.feed(data)
+
+    # run in slices until the program halts, draining the console in bulk.
+    output = bytearray()
+    start = time.perf_counter()
+    while cpu.pc.state != len(ECHO) - 1:
+        sim.run(1000)
+        output += console.drain()
+    elapsed = time.perf_counter() - start
+    assert output == data
+    return sim.cycles / elapsed, size / elapsed
+
+
+def main(size=200):
+    print(f"{'engine':>10} {'cycles/s':>10} {'bytes/s':>10}")
+    for engine in ("object", "compiled"):
+        cycles, rate = measure(engine, size if engine == "compiled" else max(size // 20, 1))
+        print(f"{engine:>10} {cycles:>10.0f} {rate:>10.1f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
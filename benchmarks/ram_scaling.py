@@ -0,0 +1,58 @@
+"""
+How the cost of simulating a RAM grows with its size.
+
+For each address width, builds a RAM of 2**addr_bits bytes and reports,
+for each simulation engine, the time and memory taken to build (and, for
+the compiled engine, compile) it, and the clock cycles simulated per
+second on a random mix of reads and writes:
+
+    python benchmarks/ram_scaling.py [min_addr_bits] [max_addr_bits]
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+# the repository root, so the package is found without installing it.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from circuit import Wire, Bus, RAM, Simulator, reset_globals
+
+
+def measure(addr_bits, engine, cycles=200, word_bits=8):
+    reset_globals()
+    tracemalloc.start()
+    start = time.perf_counter()
+    ram = RAM(Bus(word_bits), Bus(addr_bits), Wire(), addr_bits=addr_bits, word_bits=word_bits)
+    sim = Simulator(ram, engine)
+    build = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    rng = random.Random(addr_bits)
+    script = [
+        {
+            "addr": rng.getrandbits(addr_bits),
+            "inp": rng.getrandbits(word_bits),
+            "write": rng.random() < 0.5,
+        }
+        for i in range(cycles)
+    ]
+    start = time.perf_counter()
+    for inputs in script:
+        sim.step(**inputs)
+    rate = cycles / (time.perf_counter() - start)
+    return build, memory, rate
+
+
+def main(low=4, high=12):
+    print(f"{'bits':>4} {'engine':>10} {'build (s)':>10} {'memory (MB)':>12} {'cycles/s':>10}")
+    for addr_bits in range(low, high + 1):
+        for engine in Simulator.ENGINES:
+            build, memory, rate = measure(addr_bits, engine)
+            print(f"{addr_bits:>4} {engine:>10} {build:>10.3f} {memory / 2**20:>12.1f} {rate:>10.0f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,75 @@
+"""
+Engine throughput without the harness, by replaying a recorded stimulus.
+
+Records a random mix of reads and writes to a RAM, driven through
+`Simulator.step()`, then for each simulation engine reports the clock
+cycles per second when stepped by the harness and when the same log is
+replayed straight into the engine, checking both end with the same
+contents, and the size of the log:
+
+    python benchmarks/replay.py [cycles] [addr_bits]
+"""
+import os
+import random
+import sys
+import time
+
+# the repository root, so the package is found without installing it.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from circuit import Wire, Bus, RAM, Simulator, Stimulus, Recorder, replay, reset_globals
+
+
+def build(engine, addr_bits):
+    reset_globals()
+    return Simulator(RAM(Bus(8), Bus(addr_bits), Wire(), addr_bits=addr_bits), engine)
+
+
+def script(cycles, addr_bits):
+    rng = random.Random(addr_bits)
+    return [
+        {
+            "addr": rng.getrandbits(addr_bits),
+            "inp": rng.getrandbits(8),
+            "write": rng.random() < 0.5,
+        }
+        for i in range(cycles)
+    ]
+
+
+def main(cycles=2000, addr_bits=6):
+    steps = script(cycles, addr_bits)
+    sim = build("compiled", addr_bits)
+    recorder = Recorder(sim)
+    for inputs in steps:
+        sim.step(**inputs)
+    stimulus = recorder.stimulus
+    expected = sim.component.contents()
+    print(f"{cycles} cycles, log of {len(stimulus.to_bytes())} bytes")
+
+    print(f"{'engine':>10} {'stepped/s':>10} {'replayed/s':>10}")
+    for engine in Simulator.ENGINES:
+        count = cycles if engine == "compiled" else max(cycles // 20, 1)
+
+        sim = build(engine, addr_bits)
+        start = time.perf_counter()
+        for inputs in steps[:count]:
+            sim.step(**inputs)
+        stepped = count / (time.perf_counter() - start)
+
+        sim = build(engine, addr_bits)
+        partial = stimulus
+        if count < cycles:
+            partial = Stimulus(stimulus.pins)
+            for inputs in list(stimulus.inputs())[:count]:
+                partial.append(partial.encode(inputs))
+        start = time.perf_counter()
+        replay(sim, partial)
+        replayed = count / (time.perf_counter() - start)
+        if count == cycles:
+            assert sim.component.contents() == expected
+        print(f"{engine:>10} {stepped:>10.0f} {replayed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,80 @@
+"""
+What sealing a built circuit saves.
+
+For a RAM and the CPU, reports the memory held by a built instance and the
+clock cycles per second of the object engine, before and after `seal()`
+(with and without its name table). Each circuit is built twice beforehand,
+so every measured build is cloned from the same Templates. The rate is the
+best of `REPEATS` runs of `cycles` cycles, after `WARMUP` cycles:
+
+    python benchmarks/seal.py [cycles]
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+# the repository root, so the package is found without installing it.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from circuit import Wire, Bus, RAM, CPU, Simulator, assemble, seal, reset_globals
+
+SUM = assemble("""
+        LDI X, 100
+        LDI Y, 0
+loop:   ALU Y, ADD
+        ADDI X, -1
+        JNZ loop
+        HLT
+""")
+
+
+def ram():
+    return RAM(Bus(8), Bus(6), Wire(), addr_bits=6), {"addr": 5, "inp": 7, "write": True}
+
+
+def cpu():
+    cpu = CPU()
+    cpu.load(SUM)
+    return cpu, {}
+
+
+WARMUP = 20
+REPEATS = 5
+
+
+def measure(build, mode, cycles):
+    gc.collect()
+    tracemalloc.start()
+    component, inputs = build()
+    if mode != "unsealed":
+        seal(component, names=mode == "sealed")
+    gc.collect()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    sim = Simulator(component, "object", fast_forward=False)
+    sim.run(WARMUP, **inputs)
+    best = 0
+    for i in range(REPEATS):
+        start = time.perf_counter()
+        sim.run(cycles)
+        best = max(best, cycles / (time.perf_counter() - start))
+    sim.close()
+    return memory, best
+
+
+def main(cycles=100):
+    print(f"{'circuit':>8} {'mode':>16} {'memory (MB)':>12} {'cycles/s':>10}")
+    for build in (ram, cpu):
+        reset_globals()
+        build()
+        build()
+        for mode in ("unsealed", "sealed", "sealed, no names"):
+            memory, rate = measure(build, mode, cycles)
+            print(f"{build.__name__:>8} {mode:>16} {memory / 2**20:>12.2f} {rate:>10.1f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
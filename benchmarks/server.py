@@ -0,0 +1,79 @@
+"""
+Warm-start latency of the simulation server.
+
+Compares building a CPU and its compiled Simulator in-process with opening
+a session on a SimulationServer which keeps one built, and reports the
+round trip of a small batch of commands:
+
+    python benchmarks/server.py [sessions]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# the repository root, so the package is found without installing it.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from circuit import CPU, Simulator, SimulationServer, Client, assemble, reset_globals
+
+PROGRAM = assemble("""
+        LDI X, 10
+        LDI Y, 0
+loop:   ALU Y, ADD
+        ADDI X, -1
+        JNZ loop
+        HLT
+""")
+
+
+def main(sessions=5):
+    start = time.perf_counter()
+    for i in range(sessions):
+        reset_globals()
+        Simulator(CPU(), "compiled")
+    cold = (time.perf_counter() - start) / sessions
+
+    directory = tempfile.TemporaryDirectory()
+    path = os.path.join(directory.name, "circuit.sock")
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(SimulationServer().start(path))
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    started.wait()
+
+    opens, batches = [], []
+    with Client(path) as client:
+        for i in range(sessions):
+            start = time.perf_counter()
+            (opened,) = client.call({"op": "open", "circuit": "cpu"})
+            opens.append(time.perf_counter() - start)
+            session = opened["session"]
+            # give the server time to build the next spare.
+            time.sleep(cold * 1.5)
+
+            start = time.perf_counter()
+            client.call(
+                {"op": "load", "session": session, "image": PROGRAM.hex()},
+                {"op": "step", "session": session, "cycles": 100},
+                {"op": "read", "session": session, "names": ["y.out"]},
+                {"op": "close", "session": session},
+            )
+            batches.append(time.perf_counter() - start)
+    loop.call_soon_threadsafe(loop.stop)
+
+    print(f"in-process build:       {cold * 1000:8.1f} ms")
+    print(f"open a warm session:    {min(opens) * 1000:8.1f} ms")
+    print(f"load, 100 cycles, read: {min(batches) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
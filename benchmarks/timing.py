@@ -0,0 +1,106 @@
+"""
+Timing measured by event-driven simulation with unit NAND delays.
+
+Reports, in gate delays:
+
+- for each adder architecture, the worst settling time over a carry chain
+  and random additions, and the glitches per addition,
+- for RAMs of a few sizes, the read latency from a new address to `out`,
+- for the CPU running a summing loop, the longest clock cycle, and so the
+  maximum clock rate at an assumed `gate_delay` (in seconds),
+
+and the events per second simulated on the CPU:
+
+    python benchmarks/timing.py [gate_delay]
+"""
+import os
+import random
+import sys
+import time
+
+# the repository root, so the package is found without installing it.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from circuit import (
+    Wire, Bus, RAM, CPU, Controller, TimingSimulator, assemble, reset_globals,
+    Add8, CarryLookaheadAdd8, KoggeStoneAdd8, BrentKungAdd8,
+)
+
+ADDERS = [Add8, CarryLookaheadAdd8, KoggeStoneAdd8, BrentKungAdd8]
+
+SUM = """
+        LDI X, 100
+        LDI Y, 0
+loop:   ALU Y, ADD
+        ADDI X, -1
+        JNZ loop
+        HLT
+"""
+
+
+def adder(cls, additions=500):
+    reset_globals()
+    sim = TimingSimulator(cls(Bus(8), Bus(8), Wire()))
+    sim.step(a=0xff, b=0, cin=False)
+    sim.step(cin=True)
+    rng = random.Random(0)
+    for i in range(additions):
+        sim.step(a=rng.randrange(256), b=rng.randrange(256), cin=rng.random() < 0.5)
+    return sim.critical, sim.glitches / (additions + 1)
+
+
+def ram_latency(addr_bits, reads=50):
+    reset_globals()
+    sim = TimingSimulator(RAM(Bus(8), Bus(addr_bits), Wire(), addr_bits=addr_bits))
+    rng = random.Random(addr_bits)
+    for address in range(1 << addr_bits):
+        sim.step(addr=address, inp=rng.randrange(256), write=True)
+    sim.step(write=False)
+    latency = 0
+    for i in range(reads):
+        sim.step(addr=rng.randrange(1 << addr_bits))
+        latency = max(latency, sim.settled("out"))
+    return latency
+
+
+def cpu():
+    reset_globals()
+    cpu = CPU()
+    cpu.load(assemble(SUM))
+    sim = TimingSimulator(cpu)
+    sim.watch(cpu.op.out, Controller.OPCODE.HLT, stop=True)
+    events = 0
+
+    class Events:
+        def sample(self):
+            nonlocal events
+            events += sim.events
+
+    sim.monitors.append(Events())
+    start = time.perf_counter()
+    sim.run(10000)
+    elapsed = time.perf_counter() - start
+    assert cpu.y.state == 5050 % 256
+    return sim, events / elapsed
+
+
+def main(gate_delay=20e-12):
+    print(f"{'adder':>20} {'critical':>9} {'glitches':>9}")
+    for cls in ADDERS:
+        critical, glitches = adder(cls)
+        print(f"{cls.__name__:>20} {critical:>9} {glitches:>9.1f}")
+
+    print(f"\n{'RAM bytes':>20} {'latency':>9}")
+    for addr_bits in (2, 4, 6):
+        print(f"{1 << addr_bits:>20} {ram_latency(addr_bits):>9}")
+
+    sim, rate = cpu()
+    print(
+        f"\nCPU: longest cycle {sim.critical} gate delays over {sim.cycles} cycles, "
+        f"{sim.max_frequency(gate_delay) / 1e6:.0f} MHz at {gate_delay * 1e12:g} ps a gate; "
+        f"{rate:.0f} events/s"
+    )
+
+
+if __name__ == "__main__":
+    main(*(float(arg) for arg in sys.argv[1:]))
@@ -6,3 +6,16 @@ from .logic_gates import *
 from .combinational import *
 from .sequential import *
 from .cpu import *
+from .behavioral import *
+from .netlist import *
+from .fault import *
+from .verify import *
+from .analysis import *
+from .activity import *
+from .devices import *
+from .assembler import *
+from .bdd import *
+from .simulator import *
+from .stimulus import *
+from .timing import *
+from .server import *
@@ -0,0 +1,226 @@
+"""
+Switching activity: how often every net toggles over a simulated run.
+
+    sim = Simulator(counter, engine="compiled")
+    activity = Activity(sim)
+    sim.run(1000, zero=False)
+    activity.hot_nets(5)     # [(net name, toggles), ...]
+    activity.components()    # toggles inside every Component
+    activity.power(50e6)     # a rough dynamic power estimate in watts
+    print(activity.report())
+
+After every clock cycle, the value of every net is packed into one integer,
+one byte per net, and XOR-ed with the previous cycle's to find the toggles.
+These are added into bit-sliced counters: plane `i` holds bit `i` of every
+net's count, so counting a cycle is a handful of big-integer operations
+however many nets there are, and nothing is stored on the Wires.
+"""
+from array import array
+from collections import Counter
+
+from .kernel import hierarchical_name, wires_of
+
+__all__ = [
+    "Activity",
+]
+
+
+class Activity:
+    """
+    Counts the toggles of every net of a Simulator's Component from now
+    on. The nets are the Netlist's with the compiled engines, and otherwise
+    the input pins and the outputs of every primitive.
+    """
+    def __init__(self, simulator):
+        self.simulator = simulator
+        component = simulator.component
+        primitives = list(component.primitives())
+
+        if simulator.engine in simulator.NETLIST_ENGINES:
+            self.wires = simulator.netlist.wires
+        else:
+            wires = dict.fromkeys(wires_of(component.inputs))
+            for primitive in primitives:
+                wires.update(dict.fromkeys(wires_of(primitive.outputs)))
+            self.wires = list(wires)
+        self.nets = { wire: net for net, wire in enumerate(self.wires) }
+
+        # the primitive driving each net, and the primitive inputs reading it
+        self.drivers = {}
+        self.readers = [0] * len(self.wires)
+        for primitive in primitives:
+            for wire in wires_of(primitive.outputs):
+                self.drivers[self.nets[wire]] = primitive
+            for wire in wires_of(primitive.inputs):
+                net = self.nets.get(wire)
+                if net is not None:
+                    self.readers[net] += 1
+
+        self.cycles = 0
+        self.planes = []
+        self.previous = self.values()
+        simulator.monitors.append(self)
+
+    def detach(self):
+        """
+        Stops counting; the counts so far are kept.
+        """
+        self.simulator.monitors.remove(self)
+
+    def values(self):
+        """
+        The value of every net, one byte each, as an integer.
+        """
+        if self.simulator.engine == "compiled":
+            values = bytes(self.simulator.v)
+        elif self.simulator.engine == "ternary":
+            # a single lane, so each net's True bitplane is 0 or 1.
+            values = bytes(self.simulator.hi)
+        else:
+            values = bytes([wire.value is True for wire in self.wires])
+        return int.from_bytes(values, "little")
+
+    def sample(self):
+        """
+        Counts the nets which toggled in the last cycle.
+        """
+        values = self.values()
+        carry = values ^ self.previous
+        self.previous = values
+        self.cycles += 1
+
+        planes = self.planes
+        for i, plane in enumerate(planes):
+            if not carry:
+                break
+            planes[i] = plane ^ carry
+            carry &= plane
+        else:
+            if carry:
+                planes.append(carry)
+
+    def counts(self):
+        """
+        The number of toggles of every net, by net number.
+        """
+        counts = array("Q", bytes(8 * len(self.wires)))
+        for i, plane in enumerate(self.planes):
+            weight = 1 << i
+            while plane:
+                low = plane & -plane
+                counts[(low.bit_length() - 1) >> 3] += weight
+                plane ^= low
+        return counts
+
+    def toggles(self, wire):
+        """
+        The number of toggles of a Wire, or of all the Wires of a Bus.
+        """
+        counts = self.counts()
+        return sum(counts[self.nets[bit]] for bit in wires_of([wire]))
+
+    def name(self, net):
+        driver = self.drivers.get(net)
+        if driver is not None:
+            return hierarchical_name(driver) + ".out"
+        component = self.simulator.component
+        wire = self.wires[net]
+        for pin, value in component.input_pins().items():
+            bits = list(wires_of([value]))
+            if wire in bits:
+                return pin if len(bits) == 1 else f"{pin}[{bits.index(wire)}]"
+        return f"net {net}"
+
+    def hot_nets(self, count=10):
+        """
+        The `count` nets which toggled most, as (name, toggles) pairs.
+        """
+        counts = self.counts()
+        hottest = sorted(range(len(counts)), key=counts.__getitem__, reverse=True)
+        return [
+            (self.name(net), counts[net])
+            for net in hottest[:count]
+            if counts[net]
+        ]
+
+    def components(self):
+        """
+        Maps every Component to the toggles of the nets driven inside it.
+        """
+        counts = self.counts()
+        totals = Counter()
+        for net, driver in self.drivers.items():
+            toggles = counts[net]
+            if not toggles:
+                continue
+            component = driver
+            while component is not None:
+                totals[component] += toggles
+                if component is self.simulator.component:
+                    break
+                component = component.parent
+        return totals
+
+    def classes(self):
+        """
+        Maps every class of Component to the toggles inside its instances,
+        counting the nets driven by its own primitives once per class even
+        when instances are nested.
+        """
+        counts = self.counts()
+        totals = Counter()
+        for net, driver in self.drivers.items():
+            toggles = counts[net]
+            if not toggles:
+                continue
+            seen = set()
+            component = driver
+            while component is not None:
+                if type(component) not in seen:
+                    seen.add(type(component))
+                    totals[type(component)] += toggles
+                if component is self.simulator.component:
+                    break
+                component = component.parent
+        return totals
+
+    def power(self, frequency, voltage=1.0, capacitance=1e-15):
+        """
+        A rough estimate of the average dynamic power, in watts, when
+        clocked at `frequency` hertz: every toggle charges or discharges
+        `capacitance` farads for the net itself and as much again for each
+        primitive input it drives, which costs C * V**2 / 2 joules.
+        """
+        if not self.cycles:
+            return 0.0
+        counts = self.counts()
+        switched = sum(
+            toggles * (1 + readers)
+            for toggles, readers in zip(counts, self.readers)
+        )
+        energy = switched * capacitance * voltage ** 2 / 2
+        return energy / self.cycles * frequency
+
+    def report(self, count=10, frequency=1e6):
+        """
+        A printable summary: the activity factor (toggles per net per cycle),
+        the power estimate at `frequency`, and the `count` hottest nets and
+        classes of Component.
+        """
+        counts = self.counts()
+        total = sum(counts)
+        nets = len(self.wires)
+        factor = total / (nets * self.cycles) if nets and self.cycles else 0.0
+        lines = [
+            f"{self.cycles} cycles, {nets} nets, {total} toggles, "
+            f"activity factor {factor:.4f}",
+            f"estimated dynamic power at {frequency:g} Hz: {self.power(frequency):.3g} W",
+            "hottest nets:",
+        ]
+        lines += [f"{toggles:>10}  {name}" for name, toggles in self.hot_nets(count)]
+        lines.append("hottest classes:")
+        lines += [
+            f"{toggles:>10}  {cls.__name__}"
+            for cls, toggles in self.classes().most_common(count)
+        ]
+        return "\n".join(lines)
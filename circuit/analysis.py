@@ -0,0 +1,480 @@
+"""
+Static analysis of a built circuit, before simulating anything.
+
+`analyze(component)` reports how many NAND gates, TriStates and Registers
+implement a Component, its combinational depth (the most gates on any path
+from an input pin or Register output to an output pin or Register input),
+how the fanout of its nets is distributed, and its critical path:
+
+    analysis = analyze(RAM(Bus(8), Bus(8), Wire()))
+    analysis.depth            # gates on the longest path
+    analysis.critical_path    # those gates, in order
+    print(analysis.report())  # the same per class and per instance
+
+The analysis is hierarchical: each Component is summarized by `Metrics`
+which give the depth from each of its input bits to each of its output
+bits, and that is all its parent needs to know about it. The Metrics of a
+templated Component are memoized by its template key, so analyzing a RAM
+looks inside one of its word registers rather than all of them. Children
+are assumed to be connected only through their pins.
+"""
+from collections import Counter
+
+from .kernel import NAND, TriState, ROM, Register, Elaboration, CircuitError, wires_of
+
+__all__ = [
+    "Metrics",
+    "Analysis",
+    "analyze",
+]
+
+
+# template key -> Metrics, shared by every Analysis. Only keys still in
+# `Elaboration.templates` are kept, so it is bounded and cleared with it.
+MEMO = {}
+Elaboration.caches.append(MEMO)
+
+
+def deepest(depths):
+    return max(depths, default=None)
+
+
+class Metrics:
+    """
+    The static metrics of one Component. Its pins are numbered bit by bit,
+    in the order they were declared, and:
+
+    - `arcs` maps (input bit, output bit) to the depth of the longest
+      combinational path between them,
+    - `launch` maps output bits to the depth of the longest path to them
+      from a Register output inside,
+    - `capture` maps input bits to the depth of the longest path from them
+      to a Register input inside,
+    - `internal` is the depth of the longest path from a Register output to
+      a Register input inside, or None if there is none,
+    - `reads` and `out_reads` count the primitive inputs inside which read
+      each input and output bit,
+    - `fanout` counts the nets driven inside, other than the output pins, by
+      their number of readers,
+    - `classes` maps each class of Component inside to a list of its
+      number of instances, their total NANDs, TriStates and Registers
+      (counted again for every instance nested in another of the same
+      class), and the depth of the deepest one.
+    """
+    def __init__(self, component_class, inputs, outputs):
+        self.component_class = component_class
+        self.nands = 0
+        self.tristates = 0
+        self.registers = 0
+        self.arcs = {}
+        self.launch = {}
+        self.capture = {}
+        self.internal = None
+        self.reads = [0] * inputs
+        self.out_reads = [0] * outputs
+        self.fanout = Counter()
+        self.classes = {}
+
+    @property
+    def depth(self):
+        return deepest([
+            *self.arcs.values(),
+            *self.launch.values(),
+            *self.capture.values(),
+            *([] if self.internal is None else [self.internal]),
+        ]) or 0
+
+    @classmethod
+    def primitive(cls, component):
+        metrics = cls(type(component), 2, 1)
+        metrics.reads = [1, 1]
+        if isinstance(component, NAND):
+            metrics.nands = 1
+            metrics.arcs = {(0, 0): 1, (1, 0): 1}
+        elif isinstance(component, TriState):
+            metrics.tristates = 1
+            metrics.arcs = {(0, 0): 1, (1, 0): 1}
+        elif isinstance(component, Register):
+            metrics.registers = 1
+            metrics.launch = {0: 0}
+            metrics.capture = {0: 0, 1: 0}
+        elif isinstance(component, ROM):
+            # a table lookup counts as one gate from every address bit to
+            # every output bit.
+            inputs, outputs = len(component.addr), len(component.out)
+            metrics = cls(type(component), inputs, outputs)
+            metrics.reads = [1] * inputs
+            metrics.arcs = {
+                (i, o): 1 for i in range(inputs) for o in range(outputs)
+            }
+        else:
+            raise CircuitError(f"cannot analyze {type(component).__name__}.")
+        return metrics
+
+    def __repr__(self):
+        return (
+            f"<Metrics {self.component_class.__name__} nands={self.nands} "
+            f"tristates={self.tristates} registers={self.registers} depth={self.depth}>"
+        )
+
+
+class Scope:
+    """
+    The nets of one Component, connected by its children: each path of
+    gates through a child is one weighted edge from an input net of the
+    child to an output net. Edges, launches and captures are labelled with
+    the step `(child, input bit, output bit)` they take, where an input
+    bit of None means from a Register inside the child and an output bit of
+    None means to one.
+    """
+    def __init__(self, analysis, component):
+        self.inputs = list(wires_of(component.inputs))
+        self.outputs = list(wires_of(component.outputs))
+        self.children = [(child, analysis.metrics(child)) for child in component.children]
+
+        # net -> [(net, depth, step)]
+        self.edges = {}
+        # [(net, depth, step)]
+        self.launches = []
+        self.captures = []
+        self.reads = Counter()
+        self.driven = {}
+
+        for child, metrics in self.children:
+            inputs = list(wires_of(child.inputs))
+            outputs = list(wires_of(child.outputs))
+            for (i, o), depth in metrics.arcs.items():
+                self.edges.setdefault(inputs[i], []).append((outputs[o], depth, (child, i, o)))
+            for o, depth in metrics.launch.items():
+                self.launches.append((outputs[o], depth, (child, None, o)))
+            for i, depth in metrics.capture.items():
+                self.captures.append((inputs[i], depth, (child, i, None)))
+            for net, count in zip(inputs, metrics.reads):
+                self.reads[net] += count
+            for net, count in zip(outputs, metrics.out_reads):
+                self.reads[net] += count
+                self.driven[net] = True
+
+        indegree = Counter()
+        for targets in self.edges.values():
+            for net, depth, step in targets:
+                indegree[net] += 1
+        ready = [net for net in self.edges if not indegree[net]]
+        self.order = []
+        while ready:
+            net = ready.pop()
+            self.order.append(net)
+            for target, depth, step in self.edges.get(net, ()):
+                indegree[target] -= 1
+                if not indegree[target]:
+                    ready.append(target)
+        if len(self.order) < len(self.edges.keys() | indegree.keys()):
+            raise CircuitError(f"combinational loop inside {type(component).__name__}.")
+
+    def longest(self, sources):
+        """
+        Finds the longest paths from `sources`, a list of (net, depth, step).
+        Returns the depth each net is reached at, and for each net the net
+        and step it was reached from.
+        """
+        arrival = {}
+        reached = {}
+        for net, depth, step in sources:
+            if depth > arrival.get(net, -1):
+                arrival[net] = depth
+                reached[net] = (None, step)
+        for net in self.order:
+            depth = arrival.get(net)
+            if depth is None:
+                continue
+            for target, weight, step in self.edges.get(net, ()):
+                if depth + weight > arrival.get(target, -1):
+                    arrival[target] = depth + weight
+                    reached[target] = (net, step)
+        return arrival, reached
+
+    def captured(self, arrival):
+        """
+        The deepest capture reached, as (depth, net, step), or None.
+        """
+        return max(
+            (
+                (arrival[net] + depth, net, step)
+                for net, depth, step in self.captures
+                if net in arrival
+            ),
+            key=lambda capture: capture[0],
+            default=None,
+        )
+
+
+class Analysis:
+    """
+    The static analysis of a built Component. `metrics(c)` gives the
+    Metrics of the Component itself or of any Component inside it.
+    """
+    def __init__(self, component):
+        self.component = component
+        # id -> Metrics of the Components which are not templated.
+        self.instances = {}
+        self.top = self.metrics(component)
+        self._critical_path = None
+
+    def metrics(self, component):
+        key = component.template_key
+        if key is not None:
+            metrics = MEMO.get(key)
+            if metrics is None:
+                metrics = self.summarize(component)
+                if key in Elaboration.templates:
+                    MEMO[key] = metrics
+            return metrics
+        metrics = self.instances.get(id(component))
+        if metrics is None:
+            metrics = self.instances[id(component)] = self.summarize(component)
+        return metrics
+
+    def summarize(self, component):
+        if component.primitive:
+            return Metrics.primitive(component)
+
+        scope = Scope(self, component)
+        metrics = Metrics(type(component), len(scope.inputs), len(scope.outputs))
+        internal = []
+        for child, child_metrics in scope.children:
+            metrics.nands += child_metrics.nands
+            metrics.tristates += child_metrics.tristates
+            metrics.registers += child_metrics.registers
+            metrics.fanout.update(child_metrics.fanout)
+            if child_metrics.internal is not None:
+                internal.append(child_metrics.internal)
+            for cls, row in [
+                *child_metrics.classes.items(),
+                (type(child), [
+                    1,
+                    child_metrics.nands,
+                    child_metrics.tristates,
+                    child_metrics.registers,
+                    child_metrics.depth,
+                ]),
+            ]:
+                total = metrics.classes.get(cls)
+                if total is None:
+                    metrics.classes[cls] = list(row)
+                else:
+                    for k in range(4):
+                        total[k] += row[k]
+                    total[4] = max(total[4], row[4])
+
+        for i, net in enumerate(scope.inputs):
+            arrival, reached = scope.longest([(net, 0, None)])
+            for o, out in enumerate(scope.outputs):
+                if out in arrival:
+                    metrics.arcs[i, o] = arrival[out]
+            capture = scope.captured(arrival)
+            if capture is not None:
+                metrics.capture[i] = capture[0]
+
+        arrival, reached = scope.longest(scope.launches)
+        for o, out in enumerate(scope.outputs):
+            if out in arrival:
+                metrics.launch[o] = arrival[out]
+        capture = scope.captured(arrival)
+        if capture is not None:
+            internal.append(capture[0])
+        metrics.internal = deepest(internal)
+
+        metrics.reads = [scope.reads[net] for net in scope.inputs]
+        metrics.out_reads = [scope.reads[net] for net in scope.outputs]
+        pins = set(scope.inputs) | set(scope.outputs)
+        metrics.fanout.update(
+            scope.reads[net] for net in scope.driven if net not in pins
+        )
+        return metrics
+
+    def trace(self, component, source, sink):
+        """
+        The gates on the longest path inside `component` from input bit
+        `source` (or None, from a Register inside) to output bit `sink` (or
+        None, to a Register inside).
+        """
+        if component.primitive:
+            if source is None or sink is None:
+                return []
+            return [component]
+
+        scope = Scope(self, component)
+        if source is None:
+            arrival, reached = scope.longest(scope.launches)
+        else:
+            arrival, reached = scope.longest([(scope.inputs[source], 0, None)])
+
+        if sink is None:
+            depth, net, step = scope.captured(arrival)
+            steps = [step]
+        else:
+            net = scope.outputs[sink]
+            steps = []
+        while True:
+            previous, step = reached[net]
+            if step is not None:
+                steps.append(step)
+            if previous is None:
+                break
+            net = previous
+
+        path = []
+        for child, i, o in reversed(steps):
+            path += self.trace(child, i, o)
+        return path
+
+    def trace_internal(self, component):
+        """
+        The gates on the longest path from Register to Register inside
+        `component`.
+        """
+        scope = Scope(self, component)
+        arrival, reached = scope.longest(scope.launches)
+        capture = scope.captured(arrival)
+        here = -1 if capture is None else capture[0]
+        child, metrics = max(
+            (
+                (child, metrics) for child, metrics in scope.children
+                if metrics.internal is not None
+            ),
+            key=lambda pair: pair[1].internal,
+            default=(None, None),
+        )
+        if metrics is not None and metrics.internal > here:
+            return self.trace_internal(child)
+        return self.trace(component, None, None)
+
+    @property
+    def nands(self):
+        return self.top.nands
+
+    @property
+    def tristates(self):
+        return self.top.tristates
+
+    @property
+    def registers(self):
+        return self.top.registers
+
+    @property
+    def depth(self):
+        return self.top.depth
+
+    @property
+    def classes(self):
+        return self.top.classes
+
+    @property
+    def fanout(self):
+        """
+        The number of nets with each fanout, counting the pins of the
+        Component too, though not the readers of its outputs outside it.
+        """
+        top = self.top
+        fanout = Counter(top.fanout)
+        reads = {}
+        for net, count in zip(wires_of(self.component.inputs), top.reads):
+            reads[net] = count
+        for net, count in zip(wires_of(self.component.outputs), top.out_reads):
+            reads[net] = count
+        fanout.update(reads.values())
+        return fanout
+
+    @property
+    def critical_path(self):
+        """
+        The gates (NANDs and TriStates) on a longest path, in order.
+        """
+        if self._critical_path is None:
+            top = self.top
+            candidates = [(depth, i, o) for (i, o), depth in top.arcs.items()]
+            candidates += [(depth, i, None) for i, depth in top.capture.items()]
+            candidates += [(depth, None, o) for o, depth in top.launch.items()]
+            if top.internal is not None:
+                candidates.append((top.internal, None, None))
+            if not candidates:
+                self._critical_path = []
+            else:
+                depth, source, sink = max(candidates, key=lambda c: c[0])
+                if source is None and sink is None:
+                    self._critical_path = self.trace_internal(self.component)
+                else:
+                    self._critical_path = self.trace(self.component, source, sink)
+        return self._critical_path
+
+    def name(self, component):
+        """
+        The class names of the Components from the analyzed one down to
+        `component`, like "RAM/Decoder/AND/NAND".
+        """
+        names = []
+        while component is not None and component is not self.component:
+            names.append(type(component).__name__)
+            component = component.parent
+        names.append(type(self.component).__name__)
+        return "/".join(reversed(names))
+
+    def report(self, levels=2):
+        """
+        A printable report: the totals, the critical path, the metrics of
+        each class, and of each instance down to `levels` levels of the
+        hierarchy, with consecutive identical instances listed once.
+        """
+        top = self.top
+        lines = [
+            f"{type(self.component).__name__}: {top.nands} NANDs, "
+            f"{top.tristates} TriStates, {top.registers} Registers, depth {top.depth}",
+            "fanout: " + ", ".join(
+                f"{fanout}: {count}" for fanout, count in sorted(self.fanout.items())
+            ),
+            f"critical path ({len(self.critical_path)} gates):",
+        ]
+        lines += [f"    {self.name(gate)}" for gate in self.critical_path]
+
+        lines.append(f"{'class':>20} {'instances':>9} {'NANDs':>7} {'TriStates':>9} {'Registers':>9} {'depth':>5}")
+        for cls, (instances, nands, tristates, registers, depth) in sorted(
+            top.classes.items(), key=lambda item: -item[1][1]
+        ):
+            lines.append(
+                f"{cls.__name__:>20} {instances:>9} {nands:>7} {tristates:>9} {registers:>9} {depth:>5}"
+            )
+
+        lines.append("instances:")
+
+        def describe(component, metrics, count, level):
+            repeat = f"{count} x " if count > 1 else ""
+            lines.append(
+                f"{'    ' * level}{repeat}{type(component).__name__}: {metrics.nands} NANDs, "
+                f"{metrics.tristates} TriStates, {metrics.registers} Registers, depth {metrics.depth}"
+            )
+            if level >= levels:
+                return
+            # children with the same class and metrics, in order of appearance
+            groups = {}
+            for child in component.children:
+                metrics = self.metrics(child)
+                signature = (
+                    type(child), metrics.nands, metrics.tristates,
+                    metrics.registers, metrics.depth,
+                )
+                if signature in groups:
+                    groups[signature][2] += 1
+                else:
+                    groups[signature] = [child, metrics, 1]
+            for child, metrics, count in groups.values():
+                describe(child, metrics, count, level + 1)
+
+        describe(self.component, top, 1, 0)
+        return "\n".join(lines)
+
+
+def analyze(component):
+    """
+    Statically analyzes a built Component; see `Analysis`.
+    """
+    return Analysis(component)
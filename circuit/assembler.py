@@ -0,0 +1,272 @@
+"""
+An assembler for the CPU's instruction set (see `Controller`).
+
+    image = assemble('''
+            LDI X, 10         ; X counts down from 10
+            LDI Y, 0
+    loop:   ALU Y, ADD        ; Y = Y + X, with any ALU.OPCODE
+            ADDI X, -1
+            JNZ loop
+            ST Y, total
+            HLT
+    total:  .byte 0
+    ''')
+    cpu.load(image)
+
+Each line holds an optional `label:`, then an instruction or a directive,
+then an optional `;` comment. Registers are X and Y. Operands are
+expressions of numbers (decimal, 0x hex, 0b binary or 'c' characters),
+labels and `.equ` names added or subtracted, taken modulo 256; the operand
+of ALU may also name an `ALU.OPCODE`, and immediates may be written with a
+leading `#`. The directives are:
+
+    .org address        continue assembling at `address`
+    .byte value, ...    bytes, or "strings" of them
+    .equ name, value    define a name, which may refer to later labels
+
+The result is the memory image from address 0 up to the last byte
+assembled, with any gaps zero, ready for `RAM.load()`.
+"""
+import re
+
+from .kernel import CircuitError
+from .combinational import ALU
+from .cpu import Controller
+
+__all__ = [
+    "AssemblyError",
+    "assemble",
+]
+
+
+class AssemblyError(CircuitError):
+    """
+    Raised for invalid assembly, with the number of the offending line.
+    """
+    def __init__(self, line, message):
+        self.line = line
+        super().__init__(f"line {line}: {message}")
+
+
+# the operands each instruction takes after its mnemonic: "r" is a register
+# folded into the opcode, "byte" is an operand byte.
+FORMATS = {
+    "NOP": (),
+    "LDI": ("r", "byte"),
+    "LD": ("r", "byte"),
+    "ST": ("r", "byte"),
+    "LDX": ("r", "byte"),
+    "STX": ("r", "byte"),
+    "ALU": ("r", "byte"),
+    "ADDI": ("r", "byte"),
+    "CMPI": ("r", "byte"),
+    "JMP": ("byte",),
+    "JZ": ("byte",),
+    "JNZ": ("byte",),
+    "JC": ("byte",),
+    "JNC": ("byte",),
+    "MOV": ("r",),
+    "HLT": (),
+}
+
+REGISTERS = {"X": 0, "Y": 1}
+
+ALU_OPCODES = {
+    name: value for name, value in vars(ALU.OPCODE).items()
+    if not name.startswith("_")
+}
+
+TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<number>0x[0-9a-f]+|0b[01]+|\d+)
+      | '(?P<char>[^'])'
+      | (?P<name>[a-z_.][a-z_0-9.]*)
+      | (?P<sign>[-+])
+    )\s*
+""", re.VERBOSE | re.IGNORECASE)
+
+
+# a line up to its comment, if any; strings and characters may hold ";".
+CODE = re.compile(r"""(?:"[^"]*"|'[^']'|[^;"'])*""")
+
+
+def split_operands(text):
+    """
+    Splits operands at the commas which are not inside a string.
+    """
+    return [operand.strip() for operand in re.findall(r'(?:"[^"]*"|[^,])+', text)]
+
+
+class Assembler:
+    def __init__(self):
+        self.symbols = {}
+        self.memory = {}
+        self.address = 0
+
+    def parse(self, source):
+        """
+        Splits the source into (line number, label, mnemonic, operands).
+        """
+        statements = []
+        for number, line in enumerate(source.splitlines(), 1):
+            line = CODE.match(line).group().strip()
+            label = None
+            match = re.match(r"([a-z_][a-z_0-9]*)\s*:\s*(.*)", line, re.IGNORECASE)
+            if match:
+                label, line = match.groups()
+            # any whitespace, such as a tab, ends the mnemonic.
+            words = line.split(None, 1)
+            mnemonic = words[0] if words else ""
+            rest = words[1] if len(words) > 1 else ""
+            operands = split_operands(rest) if rest.strip() else []
+            statements.append((number, label, mnemonic.upper(), operands))
+        return statements
+
+    def size(self, number, mnemonic, operands):
+        if mnemonic in FORMATS:
+            return 1 + FORMATS[mnemonic].count("byte")
+        if mnemonic == ".BYTE":
+            return sum(
+                len(operand) - 2 if operand.startswith('"') else 1
+                for operand in operands
+            )
+        if mnemonic in ("", ".ORG", ".EQU"):
+            return 0
+        raise AssemblyError(number, f"unknown instruction {mnemonic}.")
+
+    def value(self, number, text, names=()):
+        """
+        Evaluates an operand expression, modulo 256. `names` maps more
+        names, in upper case, to values.
+        """
+        text = text.strip()
+        if text.startswith("#"):
+            text = text[1:]
+        tokens = []
+        position = 0
+        while position < len(text):
+            match = TOKEN.match(text, position)
+            if match is None:
+                raise AssemblyError(number, f"cannot parse {text!r}.")
+            tokens.append(match)
+            position = match.end()
+
+        total, sign, expect_term = 0, 1, True
+        for match in tokens:
+            if match["sign"]:
+                if match["sign"] == "-":
+                    sign = -sign
+                expect_term = True
+                continue
+            if not expect_term:
+                raise AssemblyError(number, f"missing + or - in {text!r}.")
+            if match["number"]:
+                term = int(match["number"], 0)
+            elif match["char"]:
+                term = ord(match["char"])
+            elif match["name"] in self.symbols:
+                term = self.symbols[match["name"]]
+            elif match["name"].upper() in names:
+                term = names[match["name"].upper()]
+            else:
+                raise AssemblyError(number, f"undefined name {match['name']}.")
+            total += sign * term
+            sign, expect_term = 1, False
+        if expect_term:
+            raise AssemblyError(number, f"missing operand in {text!r}.")
+        return total % 256
+
+    def emit(self, number, byte):
+        if not 0 <= self.address < 256:
+            raise AssemblyError(number, f"address {self.address} is outside memory.")
+        if self.address in self.memory:
+            raise AssemblyError(number, f"address {self.address:#04x} assembled twice.")
+        self.memory[self.address] = byte
+        self.address += 1
+
+    def assemble(self, source):
+        statements = self.parse(source)
+
+        # first pass: the address of every label, and the value of every
+        # `.equ` name, except those which need a label defined further on.
+        pending = []
+        for number, label, mnemonic, operands in statements:
+            if label is not None:
+                if label in self.symbols:
+                    raise AssemblyError(number, f"{label} is defined twice.")
+                self.symbols[label] = self.address
+            if mnemonic == ".ORG":
+                self.address = self.value(number, operands[0]) if operands else 0
+            elif mnemonic == ".EQU":
+                if len(operands) != 2:
+                    raise AssemblyError(number, ".equ takes a name and a value.")
+                try:
+                    self.symbols[operands[0]] = self.value(number, operands[1])
+                except AssemblyError:
+                    pending.append((number, operands))
+            else:
+                self.address += self.size(number, mnemonic, operands)
+
+        # the rest of the `.equ` names, once all the labels are known; they
+        # may refer to each other in any order, but not in a cycle.
+        while pending:
+            waiting = []
+            for number, operands in pending:
+                try:
+                    self.symbols[operands[0]] = self.value(number, operands[1])
+                except AssemblyError:
+                    waiting.append((number, operands))
+            if len(waiting) == len(pending):
+                number, operands = waiting[0]
+                self.value(number, operands[1])
+            pending = waiting
+
+        # second pass: the bytes.
+        self.address = 0
+        for number, label, mnemonic, operands in statements:
+            if mnemonic == ".ORG":
+                self.address = self.value(number, operands[0]) if operands else 0
+            elif mnemonic == ".BYTE":
+                for operand in operands:
+                    if operand.startswith('"'):
+                        for char in operand[1:-1]:
+                            self.emit(number, ord(char))
+                    else:
+                        self.emit(number, self.value(number, operand))
+            elif mnemonic in FORMATS:
+                self.instruction(number, mnemonic, operands)
+
+        if not self.memory:
+            return b""
+        image = bytearray(max(self.memory) + 1)
+        for address, byte in self.memory.items():
+            image[address] = byte
+        return bytes(image)
+
+    def instruction(self, number, mnemonic, operands):
+        formats = FORMATS[mnemonic]
+        if len(operands) != len(formats):
+            raise AssemblyError(
+                number, f"{mnemonic} takes {len(formats)} operands, not {len(operands)}."
+            )
+        opcode = getattr(Controller.OPCODE, mnemonic)
+        operand = None
+        for kind, text in zip(formats, operands):
+            if kind == "r":
+                register = REGISTERS.get(text.upper())
+                if register is None:
+                    raise AssemblyError(number, f"{text} is not a register.")
+                opcode |= register
+            else:
+                names = ALU_OPCODES if mnemonic == "ALU" else ()
+                operand = self.value(number, text, names)
+        self.emit(number, opcode)
+        if operand is not None:
+            self.emit(number, operand)
+
+
+def assemble(source):
+    """
+    Assembles `source` into a memory image; see the module documentation.
+    """
+    return Assembler().assemble(source)
@@ -0,0 +1,381 @@
+"""
+Symbolic simulation with reduced ordered binary decision diagrams.
+
+A `BDD` manager stores every node once in a unique table, so two Boolean
+functions are equal exactly when they are the same node, and memoizes the
+if-then-else operator in a computed table. `Symbolic(component)` assigns a
+BDD variable to every input bit of a Component and evaluates its gates
+over BDDs instead of values, in topological order, which gives a BDD
+for every output bit in one pass.
+
+Those BDDs answer questions about all 2**n input patterns at once:
+
+    alu = Symbolic(ALU(Bus(8), Bus(8), Bus(8), Wire()))
+    alu.satisfy(alu.output("cout"), op=ALU.OPCODE.AND)  # can cout be 1?
+    alu.dont_cares("out", op=ALU.OPCODE.AND)           # {'cin'}
+
+Registers are not variables: their outputs hold their current state.
+"""
+from .kernel import CircuitError
+from .netlist import Netlist
+
+__all__ = [
+    "BDD",
+    "Symbolic",
+]
+
+
+class BDD:
+    """
+    A manager for reduced ordered BDDs. Nodes are integers: 0 and 1 are
+    the constant functions, and every other node tests one variable and
+    branches to a `low` (variable False) and `high` (variable True) node.
+    Variables are tested in the order they were created.
+    """
+    FALSE = 0
+    TRUE = 1
+
+    # level of the terminals, below every variable.
+    TERMINAL = float("inf")
+
+    def __init__(self):
+        self.var = [self.TERMINAL, self.TERMINAL]
+        self.low = [0, 1]
+        self.high = [0, 1]
+        self.labels = []
+        self.unique = {}
+        self.computed = {}
+
+    def __len__(self):
+        return len(self.var)
+
+    def variable(self, label=None):
+        """
+        Creates a new variable, ordered after all existing ones, and
+        returns the node which is True exactly when it is.
+        """
+        self.labels.append(label)
+        return self.node(len(self.labels) - 1, self.FALSE, self.TRUE)
+
+    def node(self, var, low, high):
+        if low == high:
+            return low
+        key = (var, low, high)
+        node = self.unique.get(key)
+        if node is None:
+            node = self.unique[key] = len(self.var)
+            self.var.append(var)
+            self.low.append(low)
+            self.high.append(high)
+        return node
+
+    def ite(self, f, g, h):
+        """
+        If-then-else: the function which is `g` where `f` holds and `h`
+        elsewhere. Every other operation is built on this one.
+        """
+        if f == 1:
+            return g
+        if f == 0:
+            return h
+        if g == h:
+            return g
+        if g == 1 and h == 0:
+            return f
+
+        key = (f, g, h)
+        result = self.computed.get(key)
+        if result is not None:
+            return result
+
+        var = self.var
+        top = min(var[f], var[g], var[h])
+        f0, f1 = self.cofactors(f, top)
+        g0, g1 = self.cofactors(g, top)
+        h0, h1 = self.cofactors(h, top)
+        result = self.node(top, self.ite(f0, g0, h0), self.ite(f1, g1, h1))
+        self.computed[key] = result
+        return result
+
+    def cofactors(self, node, var):
+        if self.var[node] == var:
+            return self.low[node], self.high[node]
+        return node, node
+
+    def NOT(self, f):
+        return self.ite(f, 0, 1)
+
+    def AND(self, f, g):
+        return self.ite(f, g, 0)
+
+    def OR(self, f, g):
+        return self.ite(f, 1, g)
+
+    def XOR(self, f, g):
+        return self.ite(f, self.NOT(g), g)
+
+    def NAND(self, f, g):
+        return self.ite(f, self.NOT(g), 1)
+
+    def restrict(self, f, values):
+        """
+        Fixes some variables, given as a dict of variable number to bool,
+        and returns the resulting function of the rest.
+        """
+        memo = {}
+
+        def walk(node):
+            if node < 2:
+                return node
+            result = memo.get(node)
+            if result is None:
+                var = self.var[node]
+                if var in values:
+                    result = walk(self.high[node] if values[var] else self.low[node])
+                else:
+                    result = self.node(var, walk(self.low[node]), walk(self.high[node]))
+                memo[node] = result
+            return result
+
+        return walk(f)
+
+    def support(self, f):
+        """
+        The set of variables `f` actually depends on.
+        """
+        seen = set()
+        variables = set()
+        stack = [f]
+        while stack:
+            node = stack.pop()
+            if node < 2 or node in seen:
+                continue
+            seen.add(node)
+            variables.add(self.var[node])
+            stack.append(self.low[node])
+            stack.append(self.high[node])
+        return variables
+
+    def satisfy_one(self, f):
+        """
+        Returns one assignment (dict of variable number to bool) which
+        makes `f` True, or None if `f` is unsatisfiable. Variables not in
+        the assignment may take either value.
+        """
+        if f == 0:
+            return None
+        assignment = {}
+        while f > 1:
+            if self.low[f] != 0:
+                assignment[self.var[f]] = False
+                f = self.low[f]
+            else:
+                assignment[self.var[f]] = True
+                f = self.high[f]
+        return assignment
+
+    def count(self, f):
+        """
+        The number of assignments to all variables which make `f` True.
+        """
+        n = len(self.labels)
+        memo = {}
+
+        def level(node):
+            return n if node < 2 else self.var[node]
+
+        def walk(node):
+            # satisfying assignments of the variables from level(node) down
+            if node < 2:
+                return node
+            result = memo.get(node)
+            if result is None:
+                low, high = self.low[node], self.high[node]
+                result = (
+                    walk(low) << (level(low) - self.var[node] - 1)
+                ) + (
+                    walk(high) << (level(high) - self.var[node] - 1)
+                )
+                memo[node] = result
+            return result
+
+        return walk(f) << level(f)
+
+
+class Symbolic:
+    """
+    BDDs for every output bit of a Component as functions of its input
+    bits. By default the bits of all input pins are interleaved, least
+    significant bits aligned, which keeps arithmetic circuits small; pass
+    `order`, a list of input pin names, to place whole pins in that order
+    instead. Pass `share`, another Symbolic over the same input pins, to
+    reuse its manager and variables so the two can be compared.
+    """
+    def __init__(self, component, order=None, share=None):
+        self.netlist = netlist = Netlist(component)
+
+        if share is not None:
+            self.manager = share.manager
+            self.inputs = share.inputs
+            if {n: len(v) for n, v in self.inputs.items()} != {
+                n: len(v) for n, v in netlist.inputs.items()
+            }:
+                raise CircuitError("shared Symbolic has different input pins.")
+        else:
+            self.manager = BDD()
+            self.inputs = {name: [None] * len(nets) for name, nets in netlist.inputs.items()}
+            for name, k in self.variable_order(order):
+                bits = self.inputs[name]
+                bits[-1 - k] = self.manager.variable((name, k))
+
+        m = self.manager
+        v = [0] * len(netlist)
+        v[netlist.true] = 1
+        for register, (inp, enable, out) in zip(netlist.registers, netlist.register_nets):
+            v[out] = 1 if register.state else 0
+        for name, nets in netlist.inputs.items():
+            for net, node in zip(nets, self.inputs[name]):
+                v[net] = node
+        driven = set()
+        for i, (a, b, out) in enumerate(netlist.table):
+            if i in netlist.roms:
+                self.rom(netlist.roms[i], [v[net] for net in a], out, v)
+            elif i not in netlist.tristates:
+                v[out] = m.NAND(v[a], v[b])
+            elif out in driven:
+                v[out] = m.OR(v[out], m.AND(v[a], v[b]))
+            else:
+                v[out] = m.AND(v[a], v[b])
+                driven.add(out)
+
+        self.outputs = {
+            name: [v[net] for net in nets]
+            for name, nets in netlist.outputs.items()
+        }
+
+    def rom(self, rom, address, out, v):
+        """
+        Builds each output bit of a ROM as a tree of if-then-else over the
+        BDDs of its address bits, with the bits of the words as leaves.
+        """
+        m = self.manager
+        width = len(out)
+        for k, net in enumerate(out):
+            nodes = [word >> (width - 1 - k) & 1 for word in rom.contents]
+            for bit in reversed(address):
+                nodes = [
+                    m.ite(bit, nodes[j + 1], nodes[j])
+                    for j in range(0, len(nodes), 2)
+                ]
+            v[net] = nodes[0]
+
+    def variable_order(self, order):
+        """
+        Lists (pin name, bit position from the LSB) in variable order.
+        """
+        widths = {name: len(nets) for name, nets in self.netlist.inputs.items()}
+        if order is not None:
+            return [
+                (name, k)
+                for name in order
+                for k in range(widths[name] - 1, -1, -1)
+            ]
+        return [
+            (name, k)
+            for k in range(max(widths.values(), default=0) - 1, -1, -1)
+            for name in widths
+            if k < widths[name]
+        ]
+
+    def output(self, name, bit=None):
+        """
+        The BDD of a 1-bit output pin, or of one bit (counting from the
+        most significant, like a Bus) of a wider one.
+        """
+        bits = self.outputs[name]
+        if bit is None:
+            if len(bits) != 1:
+                raise CircuitError(f"output {name} has {len(bits)} bits; choose one.")
+            bit = 0
+        return bits[bit]
+
+    def constraint(self, **values):
+        """
+        Converts input pin values into a dict of BDD variable to bool.
+        """
+        assignment = {}
+        for name, value in values.items():
+            for node in reversed(self.inputs[name]):
+                assignment[self.manager.var[node]] = bool(value & 1)
+                value >>= 1
+        return assignment
+
+    def pins(self, assignment):
+        """
+        Converts a dict of BDD variable to bool into input pin values,
+        taking unassigned bits as 0.
+        """
+        values = {}
+        for name, nodes in self.inputs.items():
+            value = 0
+            for node in nodes:
+                value = (value << 1) | assignment.get(self.manager.var[node], False)
+            values[name] = value
+        return values
+
+    def evaluate(self, **values):
+        """
+        Evaluates every output for concrete input values.
+        """
+        assignment = self.constraint(**values)
+        return {
+            name: sum(
+                self.manager.restrict(node, assignment) << k
+                for k, node in enumerate(reversed(nodes))
+            )
+            for name, nodes in self.outputs.items()
+        }
+
+    def satisfy(self, f, **constraints):
+        """
+        Finds input pin values which make the function `f` True while the
+        input pins given as keywords hold the given values, or returns None
+        if there are none.
+        """
+        assignment = self.constraint(**constraints)
+        found = self.manager.satisfy_one(self.manager.restrict(f, assignment))
+        if found is None:
+            return None
+        found.update(assignment)
+        return self.pins(found)
+
+    def dont_cares(self, name, **constraints):
+        """
+        The input pins which the output pin `name` does not depend on at
+        all while the keyword input pins hold the given values.
+        """
+        assignment = self.constraint(**constraints)
+        support = set()
+        for node in self.outputs[name]:
+            support |= self.manager.support(self.manager.restrict(node, assignment))
+        return {
+            pin for pin, nodes in self.inputs.items()
+            if pin not in constraints
+            and not any(self.manager.var[node] in support for node in nodes)
+        }
+
+    def equivalent(self, other, outputs=None):
+        """
+        Compares the outputs of two Symbolics sharing the same manager.
+        Returns None if they are equivalent, otherwise a counterexample
+        mapping each input pin to a value.
+        """
+        if other.manager is not self.manager:
+            raise CircuitError("use Symbolic(..., share=...) to compare components.")
+        m = self.manager
+        difference = 0
+        for name in outputs if outputs is not None else self.outputs:
+            for f, g in zip(self.outputs[name], other.outputs[name]):
+                difference = m.OR(difference, m.XOR(f, g))
+        found = m.satisfy_one(difference)
+        return None if found is None else self.pins(found)
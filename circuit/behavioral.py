@@ -0,0 +1,152 @@
+"""
+Hybrid simulation: selected Component instances are simulated with their
+word-level `evaluate()` model while the rest of the circuit stays at gate
+level.
+
+`behavioral(component)` detaches every Component built inside `component`
+from the Wires which drive it, so that none of its gates are ever reset or
+propagated, and connects a single `Behavior` in its place. `gate_level()`
+reverses this. Stateful Components keep their state in their gate-level
+Registers in both modes, so it is safe to switch back and forth between
+clock cycles.
+
+A behavioral model sees only whole words: if any bit of an input Bus is
+floating, the model sees `None` for that pin. Models only drive the
+outputs they can determine from the known inputs, and leave the rest
+floating, just as the gates would.
+"""
+from .kernel import Wire, Bus, Component, Register, Clock, CircuitError, wires_of
+
+__all__ = [
+    "Behavior",
+    "behavioral",
+    "gate_level",
+]
+
+
+class Behavior(Component):
+    """
+    Stands in for a gate-level Component, driving its output pins from its
+    word-level model. It follows the same two-phase protocol as `Register`:
+    `propagate()` evaluates the outputs and captures the next state, and
+    `reset()` commits that state (once per cycle) and resets the outputs.
+    """
+    def __init__(self, component):
+        super().__init__()
+        self.component = component
+        self.input_pins = component.input_pins()
+        self.output_pins = component.output_pins()
+        for wire in self.input_pins.values():
+            self.input(wire)
+        for wire in self.output_pins.values():
+            self.output(wire)
+
+        # Registers which captured a new state at gate level before the
+        # switch; that state still has to be committed on the next clock.
+        self.pending = [
+            register for register in component.primitives()
+            if isinstance(register, Register)
+            and register.next_state != register.state
+        ]
+        self.already_reset = False
+
+    def propagate(self):
+        self.already_reset = False
+
+        values = { name: wire.value for name, wire in self.input_pins.items() }
+        self.component.capture(**values)
+        outputs = self.component.evaluate(**values)
+
+        for name, value in outputs.items():
+            if value is None:
+                continue
+            pin = self.output_pins[name]
+            if isinstance(pin, Bus):
+                for wire in reversed(pin.wires):
+                    if wire.value is None:
+                        wire.value = bool(value & 1)
+                    value >>= 1
+            elif pin.value is None:
+                pin.value = bool(value)
+
+    def reset(self):
+        if not self.already_reset:
+            for register in self.pending:
+                register.state = register.next_state
+            self.pending = []
+            self.component.commit()
+            self.already_reset = True
+            for wire in self.outputs:
+                wire.reset()
+
+
+def behavioral(component):
+    """
+    Switches `component` to behavioral simulation and returns its Behavior.
+    Does nothing if it is already behavioral. Raises CircuitError if its
+    class has no word-level model, that is, doesn't override `evaluate()`.
+    """
+    if getattr(component, "behavior", None) is not None:
+        return component.behavior
+    if type(component).evaluate is Component.evaluate:
+        raise CircuitError(f"{type(component).__name__} has no behavioral model.")
+
+    internals = list(component.descendants())
+    internal_ids = { id(c) for c in internals }
+
+    # detach the internals from every wire which might trigger them,
+    # including the boundary pins and the TRUE/FALSE rails.
+    detached = []
+    seen = set()
+    for internal in internals:
+        for wire in wires_of(internal.inputs):
+            if id(wire) in seen:
+                continue
+            seen.add(id(wire))
+            kept = []
+            removed = []
+            for downstream in wire.downstream_components:
+                if id(downstream) in internal_ids:
+                    removed.append(downstream)
+                else:
+                    kept.append(downstream)
+            if removed:
+                wire.downstream_components = kept
+                detached.append((wire, removed))
+
+    behavior = Behavior(component)
+    behavior.detached = detached
+    component.behavior = behavior
+    Clock.generation += 1
+    return behavior
+
+
+def gate_level(component):
+    """
+    Switches `component` back to gate-level simulation. Does nothing if it
+    is not behavioral.
+    """
+    behavior = getattr(component, "behavior", None)
+    if behavior is None:
+        return
+
+    for wire in wires_of(behavior.inputs):
+        wire.downstream_components = [
+            c for c in wire.downstream_components
+            if c is not behavior
+        ]
+    for wire, removed in behavior.detached:
+        wire.downstream_components = [*wire.downstream_components, *removed]
+
+    # internal wires still hold whatever they had when the component was
+    # detached; clear them so the gates start from a clean slate.
+    for internal in component.descendants():
+        for wire in wires_of(internal.outputs):
+            if not wire.hard:
+                wire._value = None
+            wire.already_reset = False
+        if hasattr(internal, "already_reset"):
+            internal.already_reset = False
+
+    component.behavior = None
+    Clock.generation += 1
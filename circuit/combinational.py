@@ -1,23 +1,47 @@
 """
-Provdes more advanced combinational (stateless) components implemented purely
-in terms of NAND - Register is not used.  These are mainly 8-bit arithmetic and
-bitwise logic operators. Also provides the very general ALU component, which
-can implement many 8-bit math and logic operations.
+Provdes more advanced combinational (stateless) components built from NAND
+gates - Register is not used - apart from TriStateN and TriState8, which
+drive a shared bus of ResolvedWires through TriState primitives. These are
+mainly 8-bit arithmetic and bitwise logic operators, plus a Decoder and
+DecodedROM, the gate-level expansion of a ROM. Also provides the very
+general ALU component, which can implement many 8-bit math and logic
+operations.
+
+The datapath components also come in width-generic versions (AddN, MuxN,
+ALUN, ...) which take their width from their input pins; the 8-bit classes
+are simply these with `width = 8`.
 """
-from .kernel import Wire, Bus, Component, TRUE, FALSE
+from .kernel import Wire, Bus, Component, TriState, ResolvedWire, ROM, TRUE, FALSE, CircuitError
 from .logic_gates import NOT, AND, OR, XOR, Mux
 
 __all__ = [
     "HalfAdder",
     "FullAdder",
+    "AddN",
     "Add8",
+    "CarryLookaheadAddN",
+    "CarryLookaheadAdd8",
+    "PrefixAddN",
+    "KoggeStoneAddN",
+    "KoggeStoneAdd8",
+    "BrentKungAddN",
+    "BrentKungAdd8",
+    "NotN",
     "Not8",
+    "AndN",
     "And8",
+    "OrN",
     "Or8",
+    "MuxN",
     "Mux8",
+    "TriStateN",
+    "TriState8",
     "LeftShift8",
     "NonZero8",
     "Equal8",
+    "Decoder",
+    "DecodedROM",
+    "ALUN",
     "ALU",
     "ZERO",
 ]
@@ -52,99 +76,415 @@ class FullAdder(Component):
         OR(a=first_half.c, b=second_half.c, out=self.cout)
 
 
-class Add8(Component):
+class AddN(Component):
     """
-    Add two 8-bit unsigned integers. 
+    Add two N-bit unsigned integers. The width is taken from `a`.
 
-    Inputs `a` and `b` and output `c` must all be 8-bit busses. The first wire
-    is the most significant bit and the 8th wire is the least. 
+    Inputs `a` and `b` and output `c` must all be N-bit busses. The first wire
+    is the most significant bit and the last wire is the least. 
     
-    If the result doesn't fit in 8 bits, the output carry flag `cout` will be
-    set high, and the result in `out` will be the sum modulo 256. An input carry
-    flag `cin` is also accepted, and the result in `out` is increased by 1 if the
-    input carry flag is set. This allows for the addition of 16-bit or larger
+    If the result doesn't fit in N bits, the output carry flag `cout` will be
+    set high, and the result in `out` will be the sum modulo 2**N. An input
+    carry flag `cin` is also accepted, and the result in `out` is increased by
+    1 if the input carry flag is set. This allows for the addition of wider
     integers.
 
     This component can also be used for subtraction by first taking the two's
-    complement of one of the inputs using the `Not8` component.
+    complement of one of the inputs using the `NotN` component.
     """
+    width = None
+    templated = True
+
     def __init__(self, a, b, cin, out=None, cout=None):
         super().__init__()
-        self.a = self.input(a, 8)
-        self.b = self.input(b, 8)
+        self.a = self.input(a, self.width)
+        self.width = width = len(self.a)
+        self.b = self.input(b, width)
         self.cin = self.input(cin)
-        self.out = self.output(out, 8)
+        self.out = self.output(out, width)
         self.cout = self.output(cout)
 
-        adder = FullAdder(
-            a=self.a[7], 
-            b=self.b[7], 
-            cin=self.cin,
-            out=self.out[7],
-        )
-        for i in range(6, -1, -1):
-            adder = FullAdder(
+        carry = self.cin
+        for i in range(width - 1, -1, -1):
+            carry = FullAdder(
                 a=self.a[i], 
                 b=self.b[i], 
-                cin=adder.cout, 
+                cin=carry, 
                 out=self.out[i], 
                 cout=self.cout if i == 0 else None,
+            ).cout
+
+    def evaluate(self, a, b, cin):
+        if a is None or b is None or cin is None:
+            return {"out": None, "cout": None}
+        total = a + b + cin
+        return {"out": total % (1 << self.width), "cout": total >= 1 << self.width}
+
+
+class Add8(AddN):
+    """
+    Add two 8-bit unsigned integers with a ripple-carry chain of FullAdders.
+    """
+    width = 8
+
+
+def and_tree(wires):
+    """
+    ANDs any number of wires together with a balanced tree of AND gates.
+    """
+    wires = list(wires)
+    while len(wires) > 1:
+        paired = [AND(wires[i], wires[i + 1]).out for i in range(0, len(wires) - 1, 2)]
+        wires = paired + wires[len(paired) * 2:]
+    return wires[0]
+
+
+def or_tree(wires, out=None):
+    """
+    ORs two or more wires together with a balanced tree of OR gates. The
+    last gate drives `out`, if given.
+    """
+    wires = list(wires)
+    while len(wires) > 2:
+        paired = [OR(wires[i], wires[i + 1]).out for i in range(0, len(wires) - 1, 2)]
+        wires = paired + wires[len(paired) * 2:]
+    return OR(wires[0], wires[1], out=out).out
+
+
+def lookahead(g, p, cin=None, cout=None):
+    """
+    Carry-lookahead logic for bits with generate signals `g` and propagate
+    signals `p`, least significant first. Every carry is computed directly
+    as a sum of products, so they are all available after the same short
+    delay instead of rippling:
+
+        c[j+1] = g[j] | p[j] & g[j-1] | ... | p[j] & ... & p[0] & cin
+
+    Returns the carry out of each bit if `cin` is given (the last one
+    driving `cout`, if given), and otherwise the group generate (the carry
+    out of the last bit assuming no carry in) and group propagate signals.
+    """
+    def carry(j, cin, out=None):
+        terms = [
+            and_tree([g[k]] + p[k + 1:j + 1])
+            for k in range(j + 1)
+        ]
+        if cin is not None:
+            terms.append(and_tree(p[:j + 1] + [cin]))
+        if len(terms) == 1:
+            return terms[0]
+        return or_tree(terms, out)
+
+    if cin is None:
+        return carry(len(g) - 1, None), and_tree(p)
+    last = len(g) - 1
+    return [carry(j, cin, cout if j == last else None) for j in range(len(g))]
+
+
+class CarryLookaheadAddN(Component):
+    """
+    A drop-in replacement for `AddN` which computes its carries with
+    two-level carry lookahead instead of rippling them through every bit:
+    each 4-bit block computes its group generate and propagate signals,
+    the carry into each block is looked ahead from those, and the carries
+    within each block are looked ahead from the block's carry in. The
+    longest path grows with the logarithm of the width instead of the
+    width itself, at the cost of more gates.
+    """
+    BLOCK = 4
+    width = None
+    templated = True
+
+    def __init__(self, a, b, cin, out=None, cout=None):
+        super().__init__()
+        self.a = self.input(a, self.width)
+        self.width = width = len(self.a)
+        self.b = self.input(b, width)
+        self.cin = self.input(cin)
+        self.out = self.output(out, width)
+        self.cout = self.output(cout)
+
+        # generate and propagate for each bit, least significant first
+        a_bits, b_bits = self.a[::-1], self.b[::-1]
+        g = [AND(x, y).out for x, y in zip(a_bits, b_bits)]
+        p = [XOR(x, y).out for x, y in zip(a_bits, b_bits)]
+
+        blocks = range(0, width, self.BLOCK)
+        groups = [lookahead(g[i:i + self.BLOCK], p[i:i + self.BLOCK]) for i in blocks]
+        block_carries = [self.cin] + lookahead(
+            [G for G, P in groups],
+            [P for G, P in groups],
+            self.cin,
+            self.cout,
+        )
+        carries = []
+        for block, i in enumerate(blocks):
+            carries.append(block_carries[block])
+            carries += lookahead(
+                g[i:i + self.BLOCK - 1],
+                p[i:i + self.BLOCK - 1],
+                block_carries[block],
             )
 
+        for i in range(width):
+            XOR(p[i], carries[i], out=self.out[width - 1 - i])
+
+    evaluate = AddN.evaluate
+
+
+class CarryLookaheadAdd8(CarryLookaheadAddN):
+    width = 8
+
+
+class PrefixAddN(Component):
+    """
+    Base class for parallel prefix adders, which are drop-in replacements
+    for `AddN`. Each bit's (generate, propagate) pair is combined with its
+    neighbors' by the associative operator
+
+        (G, P) o (G', P') = (G | P & G', P & P')
+
+    and the carry into every bit is the combination of all the bits below
+    it, with `cin` as an extra bit below bit 0 which generates `cin` and
+    propagates nothing. Subclasses choose the order of combinations,
+    trading depth against gate count, with `network(n)`: it lists the
+    combinations (i, j), in order, by which node i absorbs node j, so that
+    every node i ends up combined with all of nodes 0 to i.
+    """
+    width = None
+    templated = True
+    network = None
+
+    def __init__(self, a, b, cin, out=None, cout=None):
+        super().__init__()
+        if self.network is None:
+            raise CircuitError(f"{type(self).__name__} has no prefix network.")
+        self.a = self.input(a, self.width)
+        self.width = width = len(self.a)
+        self.b = self.input(b, width)
+        self.cin = self.input(cin)
+        self.out = self.output(out, width)
+        self.cout = self.output(cout)
+
+        a_bits, b_bits = self.a[::-1], self.b[::-1]
+        p = [XOR(x, y).out for x, y in zip(a_bits, b_bits)]
+
+        # node 0 is the carry in; node i + 1 is bit i. A propagate of None
+        # is known to be False, since the group includes the carry in.
+        G = [self.cin] + [AND(x, y).out for x, y in zip(a_bits, b_bits)]
+        P = [None] + p
+        combinations = self.network(len(G))
+        last = max(k for k, (i, j) in enumerate(combinations) if i == len(G) - 1)
+        for k, (i, j) in enumerate(combinations):
+            # the last combination into the last node yields the carry out.
+            out = self.cout if k == last else None
+            if P[i] is None:
+                G[i] = OR(G[i], G[j], out=out).out
+            else:
+                G[i] = OR(G[i], AND(P[i], G[j]).out, out=out).out
+                P[i] = None if P[j] is None else AND(P[i], P[j]).out
+
+        # node i now holds the carry into bit i.
+        for i in range(width):
+            XOR(p[i], G[i], out=self.out[width - 1 - i])
+
+    evaluate = AddN.evaluate
+
+
+class KoggeStoneAddN(PrefixAddN):
+    """
+    The Kogge-Stone adder has the minimum depth: log2(n) levels of
+    combinations, each of which combines every node with the one `d` below
+    it, at the cost of the most gates.
+    """
+    @staticmethod
+    def network(n):
+        combinations = []
+        d = 1
+        while d < n:
+            combinations += [(i, i - d) for i in range(n - 1, d - 1, -1)]
+            d *= 2
+        return combinations
+
+
+class BrentKungAddN(PrefixAddN):
+    """
+    The Brent-Kung adder combines a binary tree up to the last node and
+    then back down to the others, which takes about twice the depth of
+    Kogge-Stone but only about 2n combinations.
+    """
+    @staticmethod
+    def network(n):
+        combinations = []
+        distances = []
+        d = 1
+        while d < n:
+            distances.append(d)
+            combinations += [(i, i - d) for i in range(2 * d - 1, n, 2 * d)]
+            d *= 2
+        for d in reversed(distances):
+            combinations += [(i, i - d) for i in range(3 * d - 1, n, 2 * d)]
+        return combinations
+
+
+class KoggeStoneAdd8(KoggeStoneAddN):
+    width = 8
+
+
+class BrentKungAdd8(BrentKungAddN):
+    width = 8
+
+
+class NotN(Component):
+    width = None
+    templated = True
 
-class Not8(Component):
     def __init__(self, inp, out=None):
         super().__init__()
-        self.inp = self.input(inp, 8)
-        self.out = self.output(out, 8)
+        self.inp = self.input(inp, self.width)
+        self.width = len(self.inp)
+        self.out = self.output(out, self.width)
 
-        for i in range(0, 8):
+        for i in range(0, self.width):
             NOT(inp=self.inp[i], out=self.out[i])
 
+    def evaluate(self, inp):
+        return {"out": None if inp is None else inp ^ ((1 << self.width) - 1)}
+
+
+class Not8(NotN):
+    width = 8
+
+
+class AndN(Component):
+    width = None
+    templated = True
 
-class And8(Component):
     def __init__(self, a, b, out=None):
         super().__init__()
-        self.a = self.input(a, 8)
-        self.b = self.input(b, 8)
-        self.out = self.output(out, 8)
+        self.a = self.input(a, self.width)
+        self.width = len(self.a)
+        self.b = self.input(b, self.width)
+        self.out = self.output(out, self.width)
 
-        for i in range(0, 8):
+        for i in range(0, self.width):
             AND(a=self.a[i], b=self.b[i], out=self.out[i])
 
+    def evaluate(self, a, b):
+        if a is None or b is None:
+            return {"out": None}
+        return {"out": a & b}
+
+
+class And8(AndN):
+    width = 8
+
+
+class OrN(Component):
+    width = None
+    templated = True
 
-class Or8(Component):
     def __init__(self, a, b, out=None):
         super().__init__()
-        self.a = self.input(a, 8)
-        self.b = self.input(b, 8)
-        self.out = self.output(out, 8)
+        self.a = self.input(a, self.width)
+        self.width = len(self.a)
+        self.b = self.input(b, self.width)
+        self.out = self.output(out, self.width)
 
-        for i in range(0, 8):
+        for i in range(0, self.width):
             OR(a=self.a[i], b=self.b[i], out=self.out[i])
 
+    def evaluate(self, a, b):
+        if a is None or b is None:
+            return {"out": None}
+        return {"out": a | b}
+
+
+class Or8(OrN):
+    width = 8
 
-class Mux8(Component):
+
+class MuxN(Component):
     """
-    8-bit Multiplexer.
+    N-bit Multiplexer.
 
-    Selects one of two 8-bit inputs controlled by a single `select` pin.
+    Selects one of two N-bit inputs controlled by a single `select` pin. The
+    width is taken from `a`.
     """
+    width = None
+    templated = True
+
     def __init__(self, a, b, select, out=None):
         super().__init__()
-        self.a = self.input(a, 8)
-        self.b = self.input(b, 8)
+        self.a = self.input(a, self.width)
+        self.width = len(self.a)
+        self.b = self.input(b, self.width)
         self.select = self.input(select)
-        self.out = self.output(out, 8)
+        self.out = self.output(out, self.width)
 
-        for i in range(8):
+        for i in range(self.width):
             Mux(
                 a=self.a[i], 
                 b=self.b[i],
                 select=self.select,
                 out=self.out[i]
             )
-            
+
+    def evaluate(self, a, b, select):
+        if select is None:
+            return {"out": None}
+        return {"out": b if select else a}
+
+
+class Mux8(MuxN):
+    """
+    8-bit Multiplexer.
+    """
+    width = 8
+
+
+def resolved_bus(out):
+    """
+    Returns a Bus of ResolvedWires which TriStates can share. This is `out`
+    itself if it is already made of ResolvedWires, otherwise a new bus which
+    is buffered onto `out` (a plain Wire can only have one driver). Like any
+    Component construction, call this from inside an `__init__()`.
+    """
+    if all(isinstance(wire, ResolvedWire) for wire in out):
+        return out
+
+    bus = Bus([ResolvedWire() for i in range(len(out))])
+    for i in range(len(out)):
+        NOT(NOT(bus[i]).out, out=out[i])
+    return bus
+
+
+class TriStateN(Component):
+    """
+    Word-wide tri-state buffer: drives `out` with `inp` while `enable` is
+    high, and leaves it floating otherwise, so several can share one output
+    Bus (of ResolvedWires) as long as only one is enabled at a time. The
+    width is taken from `inp`.
+    """
+    width = None
+    templated = True
+
+    def __init__(self, inp, enable, out=None):
+        super().__init__()
+        self.inp = self.input(inp, self.width)
+        self.width = len(self.inp)
+        self.enable = self.input(enable)
+        if out is None:
+            out = Bus([ResolvedWire() for i in range(self.width)])
+        self.out = self.output(out, self.width)
+
+        for i in range(self.width):
+            TriState(inp=self.inp[i], enable=self.enable, out=self.out[i])
+
+
+class TriState8(TriStateN):
+    width = 8
+
 
 class LeftShift8(Component):
     """
@@ -197,13 +537,19 @@ class LeftShift8(Component):
             out=self.out
         )
 
+    def evaluate(self, a, b):
+        if a is None or b is None:
+            return {"out": None}
+        return {"out": (a << b) % 256 if b < 8 else 0}
+
 
 class NonZero8(Component):
     def __init__(self, inp, out=None):
         super().__init__()
-        self.a = self.input(a, 8)
+        self.inp = self.input(inp, 8)
         self.out = self.output(out)
 
+        a = self.inp
         OR(
             OR(
                 OR(a[0], a[1]).out,
@@ -216,6 +562,9 @@ class NonZero8(Component):
             out=self.out
         )
 
+    def evaluate(self, inp):
+        return {"out": None if inp is None else inp != 0}
+
 
 class Equal8(Component):
     def __init__(self, a, b, out=None):
@@ -224,21 +573,114 @@ class Equal8(Component):
         self.b = self.input(b, 8)
         self.out = self.output(out)
 
-        bit_compare = Bus([
-            XNOR(inp=self.inp[i], out=self.out[i])
+        # any differing bit makes the two values unequal.
+        bit_differs = Bus([
+            XOR(a=self.a[i], b=self.b[i]).out
             for i in range(0, 8)
         ])
-        non_zero = NonZero8(bit_compare).out
+        non_zero = NonZero8(bit_differs).out
         NOT(inp=non_zero, out=self.out)
 
+    def evaluate(self, a, b):
+        if a is None or b is None:
+            return {"out": None}
+        return {"out": a == b}
+
+
+class Decoder(Component):
+    """
+    N-to-2**N line decoder: for an N-bit input Bus `inp`, exactly one wire of
+    the 2**N-wire output Bus is high, namely `out[inp.value]`.
+
+    Rather than a separate N-input AND tree for every output, this uses
+    two-level predecoding: the high and low halves of `inp` are decoded by
+    two smaller Decoders, and each output is a single AND of one line from
+    each. Applied recursively, an 8-to-256 decoder needs about 600 NAND
+    gates instead of about 3,600.
+    """
+    templated = True
 
-class ALU(Component):
+    def __init__(self, inp, out=None):
+        super().__init__()
+        self.inp = self.input(inp)
+        width = len(self.inp)
+        if width < 1:
+            raise CircuitError("a Decoder needs at least one input bit.")
+        self.out = self.output(out, 1 << width)
+
+        if width == 1:
+            bit = self.inp[0]
+            NOT(bit, out=self.out[0])
+            NOT(NOT(bit).out, out=self.out[1])
+        elif width == 2:
+            high, low = self.inp
+            not_high, not_low = NOT(high).out, NOT(low).out
+            AND(not_high, not_low, out=self.out[0])
+            AND(not_high, low, out=self.out[1])
+            AND(high, not_low, out=self.out[2])
+            AND(high, low, out=self.out[3])
+        else:
+            low_width = width // 2
+            high = Decoder(Bus(self.inp[:width - low_width])).out
+            low = Decoder(Bus(self.inp[width - low_width:])).out
+            for i in range(1 << width):
+                AND(high[i >> low_width], low[i % (1 << low_width)], out=self.out[i])
+
+    def evaluate(self, inp):
+        if inp is None:
+            return {"out": None}
+        return {"out": 1 << (len(self.out) - 1 - inp)}
+
+
+class DecodedROM(Component):
+    """
+    The gate-level expansion of a `ROM`, with the same pins and arguments:
+    a Decoder raises the line of the addressed word, and each output bit
+    ORs together the lines of the words it is set in. It needs thousands of
+    gates where the ROM primitive is a single table lookup, and exists to
+    check the fidelity of circuits built with ROMs.
+    """
+    templated = True
+
+    def __init__(self, addr, contents, out=None, word_bits=8):
+        super().__init__()
+        self.addr = self.input(addr)
+        self.out = self.output(Bus(word_bits) if out is None else out)
+        width = len(self.out)
+        self.contents = ROM.table(contents, len(self.addr), width)
+
+        lines = Decoder(self.addr).out
+        for k in range(width):
+            selected = [
+                lines[address]
+                for address, word in enumerate(self.contents)
+                if word >> (width - 1 - k) & 1
+            ]
+            if not selected:
+                NOT(TRUE, out=self.out[k])
+            elif len(selected) == 1:
+                NOT(NOT(selected[0]).out, out=self.out[k])
+            else:
+                or_tree(selected, out=self.out[k])
+
+    def evaluate(self, addr):
+        return {"out": None if addr is None else self.contents[addr]}
+
+
+class ALUN(Component):
     """
     Arithmetic/Logic Unit.
 
     It turns out we can cover a large number of cases with relatively few
     transisters by leveraging de Morgan's laws.
+
+    The width of the operands is taken from `a`; the opcode `op` is always
+    8 bits. `adder` chooses the adder architecture, any Component class
+    with the same pins as `AddN` (such as `KoggeStoneAddN`).
     """
+    width = None
+    templated = True
+
 
     class OPCODE:
         ZERO = 40
@@ -274,11 +716,13 @@ class ALU(Component):
         op,
         cin,
         out=None,
-        cout=None
+        cout=None,
+        adder=AddN,
     ):
         super().__init__()
-        self.a = self.input(a, 8)
-        self.b = self.input(b, 8)
+        self.a = self.input(a, self.width)
+        self.width = width = len(self.a)
+        self.b = self.input(b, width)
         self.op = self.input(op, 8)
         self.cin = self.input(cin)
 
@@ -290,31 +734,55 @@ class ALU(Component):
         self.nout = self.op[6] # negate OUT
         self.m = self.op[7]    # 1 for "math", 0 for "logic"
 
-        self.out = self.output(out, 8)
+        self.out = self.output(out, width)
         self.cout = self.output(cout)
+        zero = ZERO if width == 8 else Bus([FALSE] * width)
         
         # Optionally zero-out and/or negate input A
-        a2 = Mux8(self.a, ZERO, self.za).out
-        a3 = Mux8(a2, Not8(a2).out, self.na).out
+        a2 = MuxN(self.a, zero, self.za).out
+        a3 = MuxN(a2, NotN(a2).out, self.na).out
 
         # Optionally zero-out and/or negate input B
-        b2 = Mux8(self.b, ZERO, self.zb).out
-        b3 = Mux8(b2, Not8(b2).out, self.nb).out
+        b2 = MuxN(self.b, zero, self.zb).out
+        b3 = MuxN(b2, NotN(b2).out, self.nb).out
 
         # Do either Arithmetic or Logic
-        math = And8(a=a3, b=b3).out
-        logic = Add8(a=a3, b=b3, cin=self.cin, cout=self.cout).out
+        math = AndN(a=a3, b=b3).out
+        logic = adder(a=a3, b=b3, cin=self.cin, cout=self.cout).out
 
-        result = Mux8(
+        result = MuxN(
             a=math,
             b=logic,
             select=self.m
         ).out
 
         # Optionally negate the output
-        Mux8(
+        MuxN(
             a=result,
-            b=Not8(inp=result).out,
+            b=NotN(inp=result).out,
             select=self.nout,
             out=self.out
         )
+
+    def evaluate(self, a, b, op, cin):
+        if a is None or b is None or op is None or cin is None:
+            return {"out": None, "cout": None}
+
+        mask = (1 << self.width) - 1
+        a = 0 if op & 32 else a
+        a = a ^ mask if op & 16 else a
+        b = 0 if op & 8 else b
+        b = b ^ mask if op & 4 else b
+
+        # the adder's carry flag is wired out even for logic operations.
+        total = a + b + cin
+        result = total & mask if op & 1 else a & b
+        result = result ^ mask if op & 2 else result
+        return {"out": result, "cout": total > mask}
+
+
+class ALU(ALUN):
+    """
+    8-bit Arithmetic/Logic Unit.
+    """
+    width = 8
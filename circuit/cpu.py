@@ -1,10 +1,18 @@
 """
 An 8-bit computer.
+
+The `CPU` is microcoded: every clock cycle, its `Controller` looks up a
+control word in a ROM, addressed by the instruction being executed, the
+step within it and the flags, and the control word drives the selects and
+enables of the datapath, including the next step. Changing the instruction
+set means changing the table built by `microcode()`, not the gates.
 """
-from circuit.kernel import Wire, Bus, Component, Register, TRUE, FALSE
-from circuit.logic_gates import NOT
-from circuit.combinational import ALU, Mux8, ZERO
-from circuit.sequential import Register8, Counter8, RAM
+from circuit.kernel import Wire, Bus, Component, Register, ROM, TRUE, FALSE, CircuitError
+from circuit.logic_gates import NOT, AND, OR
+from circuit.combinational import (
+    Add8, ALU, Mux8, NonZero8, TriState8, ZERO, resolved_bus
+)
+from circuit.sequential import RegisterN, Register8, RAM
 
 __all__ = [
     "Controller",
@@ -18,11 +26,13 @@ def constant(value, bits=8):
         wire = TRUE if (value & 1) else FALSE
         value = (value >> 1)
         wires.insert(0, wire)
-    
+
     return Bus(wires)
 
 
 class Mux8X4(Component):
+    templated = True
+
     def __init__(
         self,
         a,
@@ -40,89 +50,307 @@ class Mux8X4(Component):
         self.select = self.input(select, 2)
         self.out = self.output(out, 8)
 
-        Mux8(
-            Mux8(self.a, self.b, select=self.select[1]).out,
-            Mux8(self.c, self.d, select=self.select[1]).out,
-            select=self.select[0],
-            out=self.out,
-        )
+        # decode the select lines, then let exactly one input drive the bus.
+        high, low = self.select
+        not_high, not_low = NOT(high).out, NOT(low).out
+        enables = [
+            AND(not_high, not_low).out,
+            AND(not_high, low).out,
+            AND(high, not_low).out,
+            AND(high, low).out,
+        ]
+        bus = resolved_bus(self.out)
+        for inp, enable in zip((self.a, self.b, self.c, self.d), enables):
+            TriState8(inp=inp, enable=enable, out=bus)
+
+    def evaluate(self, a, b, c, d, select):
+        if select is None:
+            return {"out": None}
+        return {"out": (a, b, c, d)[select]}
 
 
 
 class Controller(Component):
-    def __init__(
-        self, 
-        fetch_execute, 
-        pc_enable=None,
-        pc_data=None,
-        alu_op=None,
-        alu_a_select=None,
-        alu_b_select=None
-    ):
+    """
+    The microcoded control unit. The ROM is addressed by the high nibble of
+    the instruction register `op` (the opcode), its lowest bit `r` (which
+    register the instruction works on: 0 for X, 1 for Y), the two-bit
+    `step` and the `zero` and `carry` flags, and each output pin is one
+    field of the control word it holds (see `FIELDS`). `rom` is the ROM
+    implementation: `ROM` looks the word up directly, and `DecodedROM`
+    builds the same table out of gates.
+
+    Every instruction starts with a fetch step, which loads the byte at PC
+    into `op` and increments PC. The instructions which take an operand
+    read it from the next byte:
+
+        NOP             do nothing
+        LDI r, #imm     r <- imm
+        LD r, addr      r <- RAM[addr]
+        ST r, addr      RAM[addr] <- r
+        LDX r, addr     r <- RAM[addr + X]
+        STX r, addr     RAM[addr + X] <- r
+        ALU r, op       r <- ALU(r, the other register) with `ALU.OPCODE` op
+        ADDI r, #imm    r <- r + imm
+        CMPI r, #imm    compare r with imm: only the flags are set
+        JMP addr        PC <- addr
+        JZ, JNZ addr    jump if the zero flag is set, or clear
+        JC, JNC addr    jump if the carry flag is set, or clear
+        MOV r           r <- the other register
+        HLT             stay on this instruction forever
+
+    ALU, ADDI and CMPI set the flags: zero if the result is zero, and carry
+    from the carry out of the ALU's adder, which after CMPI means r < imm.
+    """
+    templated = True
+
+    class OPCODE:
+        NOP = 0x00
+        LDI = 0x10
+        LD = 0x20
+        ST = 0x30
+        LDX = 0x40
+        STX = 0x50
+        ALU = 0x60
+        ADDI = 0x70
+        CMPI = 0x80
+        JMP = 0x90
+        JZ = 0xa0
+        JNZ = 0xb0
+        JC = 0xc0
+        JNC = 0xd0
+        MOV = 0xe0
+        HLT = 0xf0
+
+    # the fields of a control word, most significant first, and their widths.
+    FIELDS = [
+        ("alu_op", 8),        # the ALU opcode, unless...
+        ("alu_op_din", 1),    # ...it is taken from the data bus instead
+        ("a_select", 2),      # ALU input a: X, Y, PC or the data bus
+        ("b_select", 2),      # ALU input b: X, Y, PC or the data bus
+        ("addr_select", 2),   # address bus: X, Y, PC or AR
+        ("load_x", 1),
+        ("load_y", 1),
+        ("load_pc", 1),       # PC <- ALU output
+        ("increment_pc", 1),  # PC <- PC + 1
+        ("load_op", 1),
+        ("load_ar", 1),
+        ("load_flags", 1),
+        ("write", 1),         # RAM[address] <- ALU output
+        ("read", 1),          # the byte at the address is used
+        ("next_step", 2),
+    ]
+
+    # values of the select fields.
+    SELECT = {"x": 0, "y": 1, "pc": 2, "din": 3, "ar": 3}
+
+    def __init__(self, op, step, zero, carry, rom=ROM):
         super().__init__()
-        self.fetch_execute = self.input(fetch_execute)
+        self.op = self.input(op, 8)
+        self.step = self.input(step, 2)
+        self.zero = self.input(zero)
+        self.carry = self.input(carry)
+
+        address = Bus([*self.op[0:4], self.op[7], *self.step, self.zero, self.carry])
+        width = sum(bits for name, bits in self.FIELDS)
+        word = rom(address, microcode(), word_bits=width).out
+
+        start = 0
+        for name, bits in self.FIELDS:
+            field = word[start] if bits == 1 else Bus(word[start:start + bits])
+            setattr(self, name, self.output(field))
+            start += bits
+
+    @classmethod
+    def encode(cls, **fields):
+        """
+        Packs a control word from field values; fields not given are zero,
+        and the selects may be given by name.
+        """
+        word = 0
+        for name, bits in cls.FIELDS:
+            value = fields.pop(name, 0)
+            value = cls.SELECT.get(value, value)
+            word = (word << bits) | value
+        if fields:
+            raise CircuitError(f"unknown control fields {sorted(fields)}.")
+        return word
+
 
-        self.alu_op = self.output(constant(ALU.OPCODE.INCA), 8) # increment "A"
-        self.alu_a_select = self.output(constant(2, bits=2), 2) # select PC 
-        self.alu_b_select = self.output(constant(2, bits=2), 2) # select PC
+def micro_step(opcode, r, step, zero, carry):
+    """
+    The control fields for one step of one instruction.
+    """
+    OP = Controller.OPCODE
+    reg, other = ("x", "y") if r == 0 else ("y", "x")
+    load = f"load_{reg}"
 
+    if step == 0:
+        return dict(
+            addr_select="pc", read=1, alu_op=ALU.OPCODE.B, b_select="din",
+            load_op=1, increment_pc=1, next_step=1,
+        )
+    if step == 1:
+        # the operand, if any, is the byte at PC.
+        operand = dict(addr_select="pc", read=1, increment_pc=1)
+        if opcode == OP.LDI:
+            return dict(operand, alu_op=ALU.OPCODE.B, b_select="din", **{load: 1})
+        if opcode in (OP.LD, OP.ST):
+            return dict(
+                operand, alu_op=ALU.OPCODE.B, b_select="din",
+                load_ar=1, next_step=2,
+            )
+        if opcode in (OP.LDX, OP.STX):
+            return dict(
+                operand, alu_op=ALU.OPCODE.ADD, a_select="x", b_select="din",
+                load_ar=1, next_step=2,
+            )
+        if opcode == OP.ALU:
+            return dict(
+                operand, alu_op_din=1, a_select=reg, b_select=other,
+                load_flags=1, **{load: 1},
+            )
+        if opcode == OP.ADDI:
+            return dict(
+                operand, alu_op=ALU.OPCODE.ADD, a_select=reg, b_select="din",
+                load_flags=1, **{load: 1},
+            )
+        if opcode == OP.CMPI:
+            return dict(
+                operand, alu_op=ALU.OPCODE.SUB, a_select=reg, b_select="din",
+                load_flags=1,
+            )
+        jumps = {
+            OP.JMP: True,
+            OP.JZ: zero,
+            OP.JNZ: not zero,
+            OP.JC: carry,
+            OP.JNC: not carry,
+        }
+        if opcode in jumps:
+            if jumps[opcode]:
+                return dict(
+                    addr_select="pc", read=1, alu_op=ALU.OPCODE.B, b_select="din",
+                    load_pc=1,
+                )
+            return dict(increment_pc=1)
+        if opcode == OP.MOV:
+            return dict(alu_op=ALU.OPCODE.A, a_select=other, **{load: 1})
+        if opcode == OP.HLT:
+            # undo the increment of the fetch.
+            return dict(alu_op=ALU.OPCODE.DECA, a_select="pc", load_pc=1)
+    if step == 2:
+        if opcode in (OP.LD, OP.LDX):
+            return dict(
+                addr_select="ar", read=1, alu_op=ALU.OPCODE.B, b_select="din",
+                **{load: 1},
+            )
+        if opcode in (OP.ST, OP.STX):
+            return dict(addr_select="ar", alu_op=ALU.OPCODE.A, a_select=reg, write=1)
+    return {}
+
+
+def microcode():
+    """
+    The contents of the Controller's ROM: the control word for every
+    combination of opcode, `r`, step, zero and carry, in address order.
+    """
+    words = []
+    for address in range(1 << 9):
+        opcode = (address >> 5) << 4
+        r = address >> 4 & 1
+        step = address >> 2 & 3
+        zero = address >> 1 & 1
+        carry = address & 1
+        words.append(Controller.encode(**micro_step(opcode, r, step, zero, carry)))
+    return tuple(words)
 
 
 class CPU(Component):
-    def __init__(self):
-        super().__init__()
+    """
+    The 8-bit computer: registers X and Y, the program counter PC, the
+    instruction register `op`, the address register AR and the zero and
+    carry flags around an ALU and 256 bytes of RAM, all driven by the
+    microcoded `Controller`. Everything the ALU computes goes out on the
+    data bus `dout`, which feeds RAM and every register; `din` is what RAM
+    reads at `addr`. It starts at address 0 with every register zero;
+    `rom` is passed on to the Controller.
+    """
+    templated = True
 
-        # Clock drives the fetch/execute tic-toc
-        self.clock = Counter8(enable=TRUE, zero=FALSE)
-        self.execute_flag = self.clock.out[7]
-        self.fetch_flag = NOT(self.execute_flag).out
+    def __init__(self, rom=ROM):
+        super().__init__()
 
         # 8-bit data bus with 8-bit addressing
         self.addr = Bus(8)
         self.din = Bus(8)
         self.dout = Bus(8)
 
+        # the register outputs the Controller reads, driven further down.
+        op = Bus(8)
+        step = Bus(2)
+        flags = Bus(2)
+        self.controller = control = Controller(
+            op=op, step=step, zero=flags[0], carry=flags[1], rom=rom,
+        )
+        # high when the byte at `addr` is written from `dout`, or read
+        # from `din` and used.
+        self.write = control.write
+        self.read = control.read
+
         # 256 bytes of RAM on the bus
         self.ram = RAM(
             inp=self.dout,
             addr=self.addr,
-            write=FALSE,
+            write=self.write,
             out=self.din,
         )
 
         # Registers
-        self.x = self.register(FALSE, FALSE)
-        self.y = self.register(FALSE, FALSE)
-        self.pc = self.register(FALSE, self.fetch_flag)
-        self.op = self.register(TRUE, self.fetch_flag)
+        self.x = Register8(self.dout, control.load_x)
+        self.y = Register8(self.dout, control.load_y)
+        self.op = Register8(self.dout, control.load_op, out=op)
+        self.ar = Register8(self.dout, control.load_ar)
+        pc = Bus(8)
+        self.pc = Register8(
+            inp=Mux8(
+                a=self.dout,
+                b=Add8(a=pc, b=ZERO, cin=TRUE).out,
+                select=control.increment_pc,
+            ).out,
+            enable=OR(control.load_pc, control.increment_pc).out,
+            out=pc,
+        )
+        self.step = RegisterN(control.next_step, TRUE, out=step)
 
         # Addressing Mode
-        self.addr_mode = self.register_select(
-            select=constant(2, 2), # PC
+        Mux8X4(
+            a=self.x.out,
+            b=self.y.out,
+            c=self.pc.out,
+            d=self.ar.out,
+            select=control.addr_select,
             out=self.addr,
         )
 
         # ALU
-        self.a = self.register_select(constant(2, 2)) # PC
-        self.b = self.register_select(constant(0, 2)) # Not used
+        self.a = self.register_select(control.a_select)
+        self.b = self.register_select(control.b_select)
         self.alu = ALU(
             a=self.a.out,
             b=self.b.out,
             cin=FALSE,
-            op=constant(ALU.OPCODE.INCA),
+            op=Mux8(control.alu_op, self.din, select=control.alu_op_din).out,
             out=self.dout
         )
+        zero = NOT(NonZero8(self.dout).out).out
+        self.flags = RegisterN(Bus([zero, self.alu.cout]), control.load_flags, out=flags)
 
-    def register(self, data, enable):
-        return Register8(
-            inp=Mux8(
-                #a=self.dout,
-                a=constant(42),
-                b=self.din,
-                select=data
-            ).out,
-            enable=enable,
-        )
+    def load(self, image, address=0):
+        """
+        Loads a memory image, such as one made by `assemble()`, into RAM.
+        """
+        self.ram.load(image, address)
 
     def register_select(self, select, out=None):
         return Mux8X4(
@@ -139,16 +367,13 @@ class CPU(Component):
         y = int(self.y.state or 0)
         pc = int(self.pc.state or 0)
         op = int(self.op.state or 0)
-        clock = int(self.clock.out.value or 0)
+        step = int(self.step.state or 0)
+        flags = int(self.flags.state or 0)
 
         return "\n".join([
-            f"CLOCK: {clock:02x}",
+            f"STEP: {step}   ZERO: {flags >> 1}   CARRY: {flags & 1}",
             f"X: {x:02x}         Y: {y:02x}        PC: {pc:02x}        OP: {op:02x}",
             "",
             self.ram.hex_dump(),
             ""
         ])
-        
-    
-
-
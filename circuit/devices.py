@@ -0,0 +1,234 @@
+"""
+Memory-mapped peripherals for the CPU.
+
+A `MemoryMap` connects host-side devices to the bus of a simulated CPU, each
+at its own range of addresses:
+
+    sim = Simulator(cpu, engine="compiled")
+    io = MemoryMap(sim, cpu)
+    console = io.attach(Console(0xf0))
+    keyboard = io.attach(InputFIFO(0xf1))   # data at 0xf1, count at 0xf2
+    timer = io.attach(Timer(0xf3))          # low byte at 0xf3, high at 0xf4
+    keyboard.feed(b"hello")
+    sim.run(10000)
+    console.drain()                         # everything written since
+
+The devices are modelled on the host, not built from gates, and the CPU
+and the engines are untouched: after every clock cycle the map reads the
+CPU's `read` and `write` strobes, and only when one of them is high and
+the address belongs to a device is the device called. A write hands it the
+byte on `dout`. A read tells it that the byte at that address has been
+used, so it can stage the next one: the bytes the CPU reads from a device
+are kept in the RAM words at its addresses, written between clock cycles.
+
+The host side of every device is a buffer, filled or drained in bulk, so
+the cost per clock cycle is only reading the strobes. Devices make the run
+depend on more than the state of the Registers, so a Simulator with a
+MemoryMap attached never fast-forwards.
+"""
+from .kernel import CircuitError, wires_of
+
+__all__ = [
+    "Device",
+    "Console",
+    "InputFIFO",
+    "Timer",
+    "MemoryMap",
+]
+
+
+class Device:
+    """
+    A peripheral at `size` consecutive addresses from `base`. Subclasses
+    override `read()` and `write()`, which take the address as an offset
+    from `base`, and stage what the CPU will read with `stage()`.
+    """
+    size = 1
+
+    def __init__(self, base):
+        self.base = base
+        self.map = None
+
+    def attached(self):
+        """
+        Called once the device is on a MemoryMap.
+        """
+        pass
+
+    def stage(self, offset, value):
+        """
+        Makes the CPU read `value` at `offset` from the next clock cycle on.
+        """
+        self.map.poke(self.base + offset, value)
+
+    def read(self, offset):
+        pass
+
+    def write(self, offset, value):
+        pass
+
+
+class Console(Device):
+    """
+    An output port: every byte written to it is appended to `output`, until
+    the host takes them with `drain()`.
+    """
+    def __init__(self, base):
+        super().__init__(base)
+        self.output = bytearray()
+
+    def write(self, offset, value):
+        self.output.append(value)
+
+    def drain(self):
+        """
+        Returns the bytes written since the last drain, and forgets them.
+        """
+        output = bytes(self.output)
+        self.output.clear()
+        return output
+
+
+class InputFIFO(Device):
+    """
+    An input port: reading `base` takes the next byte the host has given to
+    `feed()` (or 0 if there is none), and reading `base + 1` gives the
+    number of bytes waiting, up to 255.
+    """
+    size = 2
+
+    def __init__(self, base):
+        super().__init__(base)
+        self.buffer = bytearray()
+        self.position = 0
+
+    @property
+    def waiting(self):
+        return len(self.buffer) - self.position
+
+    def feed(self, data):
+        """
+        Queues `data` for the CPU to read.
+        """
+        if self.position > len(self.buffer) // 2:
+            del self.buffer[:self.position]
+            self.position = 0
+        self.buffer += data
+        if self.map is not None:
+            self.refresh()
+
+    def attached(self):
+        self.refresh()
+
+    def refresh(self):
+        """
+        Stages the next byte and the number waiting.
+        """
+        waiting = self.waiting
+        self.stage(0, self.buffer[self.position] if waiting else 0)
+        self.stage(1, min(waiting, 255))
+
+    def read(self, offset):
+        if offset == 0 and self.waiting:
+            self.position += 1
+            self.refresh()
+
+
+class Timer(Device):
+    """
+    A cycle counter: writing anything to `base` latches the number of clock
+    cycles simulated so far, which then reads as a 16-bit word, the low byte
+    at `base` and the high byte at `base + 1`. Nothing is done on the clock
+    cycles in between.
+    """
+    size = 2
+
+    def write(self, offset, value):
+        cycles = self.map.simulator.cycles
+        self.stage(0, cycles & 0xff)
+        self.stage(1, cycles >> 8 & 0xff)
+
+
+class MemoryMap:
+    """
+    The devices on the bus of `cpu`, simulated by `simulator`. `reads` and
+    `writes` count the accesses which reached a device.
+    """
+    def __init__(self, simulator, cpu):
+        self.simulator = simulator
+        self.cpu = cpu
+        self.devices = {}
+        self.reads = 0
+        self.writes = 0
+
+        if simulator.engine in simulator.NETLIST_ENGINES:
+            nets = simulator.netlist.nets
+            self.read_net, self.write_net = nets[cpu.read], nets[cpu.write]
+            self.addr_nets = [nets[wire] for wire in wires_of([cpu.addr])]
+            self.dout_nets = [nets[wire] for wire in wires_of([cpu.dout])]
+        simulator.monitors.append(self)
+
+    def attach(self, device):
+        """
+        Puts `device` on the bus at its addresses, and returns it.
+        """
+        addresses = range(device.base, device.base + device.size)
+        if addresses.start < 0 or addresses.stop > self.cpu.ram.size:
+            raise CircuitError(f"{type(device).__name__} does not fit in memory.")
+        for address in addresses:
+            if address in self.devices:
+                raise CircuitError(f"address {address:#04x} already has a device.")
+        for address in addresses:
+            self.devices[address] = device
+        device.map = self
+        device.attached()
+        return device
+
+    def poke(self, address, value):
+        """
+        Sets a byte of RAM from the next clock cycle on.
+        """
+        self.cpu.ram.registers[address].next_state = value
+
+    def sample(self):
+        simulator = self.simulator
+        if simulator.engine == "compiled":
+            v = simulator.v
+            read, write = v[self.read_net], v[self.write_net]
+            if not (read or write):
+                return
+            netlist = simulator.netlist
+            address = netlist.read(v, self.addr_nets)
+            device = self.devices.get(address)
+            if device is None:
+                return
+            value = netlist.read(v, self.dout_nets)
+        elif simulator.engine == "ternary":
+            # the strobes are only acted on when known True
+            hi, lo = simulator.hi, simulator.lo
+            read, write = hi[self.read_net], hi[self.write_net]
+            if not (read or write):
+                return
+            netlist = simulator.netlist
+            address = netlist.read_ternary(hi, lo, self.addr_nets)
+            device = self.devices.get(address)
+            if device is None:
+                return
+            value = netlist.read_ternary(hi, lo, self.dout_nets)
+        else:
+            cpu = self.cpu
+            read, write = cpu.read.value, cpu.write.value
+            if not (read or write):
+                return
+            address = cpu.addr.value
+            device = self.devices.get(address)
+            if device is None:
+                return
+            value = cpu.dout.value
+
+        if write:
+            self.writes += 1
+            device.write(address - device.base, value)
+        else:
+            self.reads += 1
+            device.read(address - device.base)
@@ -0,0 +1,162 @@
+"""
+Parallel stuck-at fault simulation.
+
+`fault_simulate(component, vectors)` injects a stuck-at-0 and a stuck-at-1
+fault on the output of every NAND gate inside `component` and reports which
+of them the test vectors detect, i.e. which faults make some output differ
+from the fault-free circuit.
+
+Faulty machines are simulated in the bit lanes of the compiled Netlist:
+lane 0 is always the fault-free machine, and every other lane carries one
+fault. Vectors are applied round-robin, and as soon as a fault is detected
+(or has seen every vector) its lane is handed to the next fault in line,
+so the lanes stay full and throughput rises with coverage.
+
+Registers are treated as fully scanned: their outputs hold their current
+state for every vector, and their inputs are observed like output pins.
+"""
+from collections import namedtuple
+
+from .kernel import NAND
+from .netlist import Netlist
+
+__all__ = [
+    "Fault",
+    "FaultReport",
+    "fault_simulate",
+]
+
+
+Fault = namedtuple("Fault", ["gate", "stuck_at"])
+
+
+class FaultReport:
+    """
+    The outcome of a fault simulation. `detected` maps each detected Fault
+    to the index of the vector which detected it. Without fault
+    dropping, `detections` also counts how many vectors detected each one.
+    """
+    def __init__(self, faults, detected, detections=None):
+        self.faults = faults
+        self.detected = detected
+        self.detections = detections
+
+    @property
+    def undetected(self):
+        return [fault for fault in self.faults if fault not in self.detected]
+
+    @property
+    def coverage(self):
+        if not self.faults:
+            return 1.0
+        return len(self.detected) / len(self.faults)
+
+    def __repr__(self):
+        return (
+            f"<FaultReport {len(self.detected)}/{len(self.faults)} "
+            f"faults detected ({self.coverage:.1%})>"
+        )
+
+
+def lanes_of(bits):
+    """
+    Iterates over the lane numbers of the set bits in `bits`.
+    """
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def fault_simulate(component, vectors, lanes=256, drop=True):
+    """
+    Simulates every single stuck-at fault on the NAND outputs of
+    `component` against `vectors`, a list of dicts mapping each input pin
+    name to an integer value. `lanes` is the number of machines evaluated
+    per pass, including the fault-free one. With `drop`, a fault is no
+    longer simulated once it has been detected.
+    """
+    netlist = Netlist(component)
+    evaluate = netlist.compile(inject=True)
+    gate_index = { gate: i for i, gate in enumerate(netlist.gates) }
+
+    faults = [
+        Fault(gate, stuck_at)
+        for gate in netlist.gates
+        if isinstance(gate, NAND)
+        for stuck_at in (False, True)
+    ]
+    detected = {}
+    detections = None if drop else dict.fromkeys(faults, 0)
+    if not vectors or not faults:
+        return FaultReport(faults, detected, detections)
+
+    observed = [net for nets in netlist.outputs.values() for net in nets]
+    observed += [net for inp, enable, _ in netlist.register_nets for net in (inp, enable)]
+
+    mask = (1 << lanes) - 1
+    initial = netlist.values(mask)
+    keep = [mask] * len(netlist.gates)
+    force = [0] * len(netlist.gates)
+
+    lane_fault = [None] * lanes
+    free = list(range(lanes - 1, 0, -1))
+    expiring = {}
+    queue = iter(faults)
+    active = 0
+    step = 0
+
+    def retire(lane):
+        nonlocal active
+        bit = 1 << lane
+        i = gate_index[lane_fault[lane].gate]
+        keep[i] |= bit
+        force[i] &= ~bit
+        lane_fault[lane] = None
+        free.append(lane)
+        active &= ~bit
+
+    while True:
+        # hand every free lane to the next fault; it will see every vector
+        # once, starting from this step.
+        while free:
+            fault = next(queue, None)
+            if fault is None:
+                break
+            lane = free.pop()
+            bit = 1 << lane
+            i = gate_index[fault.gate]
+            if fault.stuck_at:
+                force[i] |= bit
+            else:
+                keep[i] &= ~bit
+            lane_fault[lane] = fault
+            expiring.setdefault(step + len(vectors), []).append((lane, fault))
+            active |= bit
+        if not active:
+            break
+
+        index = step % len(vectors)
+        v = initial[:]
+        netlist.set_inputs(v, vectors[index], mask)
+        evaluate(v, mask, keep, force)
+
+        difference = 0
+        for net in observed:
+            value = v[net]
+            difference |= value ^ (mask if value & 1 else 0)
+
+        for lane in lanes_of(difference & active):
+            fault = lane_fault[lane]
+            detected.setdefault(fault, index)
+            if drop:
+                retire(lane)
+            else:
+                detections[fault] += 1
+
+        step += 1
+        for lane, fault in expiring.pop(step, ()):
+            if lane_fault[lane] is fault:
+                retire(lane)
+
+    return FaultReport(faults, detected, detections)
@@ -10,18 +10,52 @@ NAND: the primitive used to implement all other combinatorial logic.
 Register: a 1-bit register that can store a single Boolean value across clock
 cycles. This is the primitive used to implement all sequential logic.
 
+RegisterFile: dense storage for the state of every Register.
+
+Clock: clocks the Registers of one circuit.
+
+release: disconnects a circuit from the TRUE and FALSE rails.
+
+TriState and ResolvedWire: a driver which only drives its output when
+enabled, and a Wire which can be shared by many such drivers.
+
+ROM: a read-only table of words, looked up directly, for microcode and
+constant tables.
+
+levelize: sorts gates into levels, and finds combinational loops.
+
+seal: strips a built circuit down to what simulation needs.
+
 """
+import bisect
+import copyreg
+import gc
+import io
+import itertools
+import pickle
+import sys
 
 __all__ = [
     "Wire",
     "Component",
+    "Elaboration",
+    "Template",
     "Bus",
     "Register",
+    "RegisterFile",
+    "Clock",
+    "release",
     "CircuitError",
     "WireError",
+    "CombinationalLoop",
     "NAND",
+    "TriState",
+    "ResolvedWire",
+    "ROM",
     "TRUE",
     "FALSE",
+    "levelize",
+    "seal",
     "reset_globals",
 ]
 
@@ -33,6 +67,38 @@ class WireError(CircuitError):
     pass
 
 
+class CombinationalLoop(CircuitError):
+    """
+    Raised for a cycle of gates which is not broken by a Register. `path`
+    lists the gates around the cycle in order: each one drives an input of
+    the next, and the last drives an input of the first.
+    """
+    def __init__(self, path):
+        self.path = path
+        names = [hierarchical_name(gate) for gate in path]
+        super().__init__(
+            f"combinational loop through {len(path)} gates: "
+            + " -> ".join(names + names[:1])
+        )
+
+
+def hierarchical_name(component):
+    """
+    The class names of a Component and its ancestors, outermost first,
+    like "CPU/RAM/TriStateN/TriState".
+    """
+    names = []
+    while component is not None:
+        # a sealed primitive may keep its name from before it was inlined.
+        path = getattr(component, "path", None)
+        if path is not None:
+            names.append(path)
+            break
+        names.append(type(component).__name__)
+        component = component.parent
+    return "/".join(reversed(names))
+
+
 class Wire:
     def __init__(self, value=None, hard=False):
         self.downstream_components = []
@@ -76,15 +142,25 @@ class Wire:
             component.propagate()
 
     def connect(self, component):
-        self.downstream_components.append(component)
+        components = self.downstream_components
+        if type(components) is tuple:
+            # sealed, but a new reader may still be connected.
+            self.downstream_components = components + (component,)
+        else:
+            components.append(component)
 
 
 TRUE = Wire(value=True, hard=True)
 FALSE = Wire(value=False, hard=True)
 
 def reset_globals():
+    global REGISTERS
     TRUE.downstream_components = []
     FALSE.downstream_components = []
+    REGISTERS = RegisterFile()
+    Elaboration.templates.clear()
+    for cache in Elaboration.caches:
+        cache.clear()
 
 
 class Bus(Wire):
@@ -159,12 +235,574 @@ class Bus(Wire):
             value >>= 1
 
 
-class Component:
+class Elaboration(type):
+    """
+    Metaclass for Component which records the design hierarchy as the
+    circuit is built. Any Component constructed while the `__init__()` of
+    another Component is running becomes one of its `children`, and gets
+    that Component as its `parent`.
+
+    Classes with `templated = True` are elaborated as usual the first time
+    they are built with some combination of pin widths and other arguments.
+    The second time, unless the first had fewer than `Template.minimum`
+    Components inside, that instance is made into a `Template`, and every
+    later one is cloned from it.
+
+    The garbage collector is paused while a circuit is built: the build is
+    a burst of allocations which all stay reachable, so collecting in the
+    middle of it is wasted work.
+    """
+    building = []
+
+    # (class, argument shapes) -> Template, None if only built once, or
+    # SMALL if too small to clone. At most `template_limit` are kept, and
+    # the oldest are dropped first; `reset_globals()` clears them all.
+    templates = {}
+    template_limit = 256
+    SMALL = "small"
+
+    # other caches by the same keys, like the Metrics of `circuit.analysis`:
+    # a key dropped from `templates` is dropped from them too, and
+    # `reset_globals()` clears them with it.
+    caches = []
+
+    # when True, every Component built outside of any other is levelized
+    # right away, so a combinational loop raises CombinationalLoop where
+    # the circuit is built rather than where it is first simulated.
+    strict = False
+
+    def __call__(cls, *args, **kwargs):
+        if Elaboration.building:
+            return cls.build(*args, **kwargs)
+
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            component = cls.build(*args, **kwargs)
+        finally:
+            if collecting:
+                gc.enable()
+        if Elaboration.strict:
+            component.levelize()
+        return component
+
+    def build(cls, *args, **kwargs):
+        if cls.templated:
+            key = Template.key(cls, args, kwargs)
+            if key is not None:
+                templates = Elaboration.templates
+                template = templates.get(key, False)
+                if template is False or template is Elaboration.SMALL:
+                    component = cls.elaborate(*args, **kwargs)
+                    if template is False:
+                        inside = itertools.islice(component.descendants(), Template.minimum)
+                        small = sum(1 for c in inside) < Template.minimum
+                        Elaboration.remember(key, Elaboration.SMALL if small else None)
+                else:
+                    if template is None:
+                        template = Template(cls, args, kwargs)
+                        Elaboration.remember(key, template)
+                        component = template.built
+                        template.built = None
+                    else:
+                        component = None
+                    if component is None:
+                        component = template.instantiate(args, kwargs)
+                component.template_key = key
+                return component
+        return cls.elaborate(*args, **kwargs)
+
+    @staticmethod
+    def remember(key, template):
+        templates = Elaboration.templates
+        templates.pop(key, None)
+        templates[key] = template
+        while len(templates) > Elaboration.template_limit:
+            oldest = next(iter(templates))
+            del templates[oldest]
+            for cache in Elaboration.caches:
+                cache.pop(oldest, None)
+
+    def elaborate(cls, *args, **kwargs):
+        """
+        Constructs a Component by running its `__init__()`.
+        """
+        component = cls.__new__(cls)
+        building = Elaboration.building
+        component.parent = building[-1] if building else None
+        component.children = []
+        if component.parent is not None:
+            component.parent.children.append(component)
+
+        building.append(component)
+        try:
+            component.__init__(*args, **kwargs)
+        finally:
+            building.pop()
+        return component
+
+
+class Uncacheable(Exception):
+    pass
+
+
+def shape(value):
+    """
+    A hashable description of a constructor argument which captures
+    everything a constructor may depend on: the nesting and widths of
+    Buses, whether Wires are ResolvedWires, and the value of anything else.
+    """
+    if value is None:
+        return None
+    if isinstance(value, Bus):
+        types = tuple(map(type, value.wires))
+        if any(issubclass(t, Bus) for t in set(types)):
+            return tuple(shape(wire) for wire in value)
+        return types
+    if isinstance(value, Wire):
+        return type(value)
+    try:
+        hash(value)
+    except TypeError:
+        raise Uncacheable from None
+    return (type(value), value)
+
+
+def fresh(value):
+    """
+    New, unconnected Wires with the same shape as a constructor argument.
+    """
+    if isinstance(value, Bus):
+        return Bus([fresh(wire) for wire in value])
+    if isinstance(value, ResolvedWire):
+        return ResolvedWire()
+    if isinstance(value, Wire):
+        return Wire()
+    return value
+
+
+def reference(k):
+    """
+    Loads outside object number `k` of the Template being instantiated.
+    """
+    return Template.binding[k]
+
+
+class TemplatePickler(pickle.Pickler):
+    """
+    Pickles the Components and Wires of a Template as shells without
+    attributes, appending each one to `objects` as it is first met, so its
+    attributes can be pickled later. Every other object, apart from plain
+    values and containers which are simply copied, is pickled as a numbered
+    reference into `references`, appending new ones to `externals`, and so
+    is shared by every copy. TRUE and FALSE are always shared.
+    """
+    def __init__(self, stream, references, externals):
+        super().__init__(stream, pickle.HIGHEST_PROTOCOL)
+        self.objects = []
+        self.references = references
+        self.externals = externals
+        self.base = len(references)
+
+    def reducer_override(self, obj):
+        k = self.references.get(id(obj))
+        if k is None:
+            if isinstance(obj, (Wire, Component)) and obj is not TRUE and obj is not FALSE:
+                self.objects.append(obj)
+                return copyreg.__newobj__, (type(obj),)
+            if obj is reference or obj is copyreg.__newobj__:
+                return NotImplemented
+            k = self.references[id(obj)] = self.base + len(self.externals)
+            self.externals.append(obj)
+        return reference, (k,)
+
+
+class Template:
+    """
+    A Component elaborated once, and pickled as it was built. If some of its
+    pins are the same Wire, or TRUE or FALSE, it is elaborated on fresh pin
+    Wires instead, with its Registers in a private RegisterFile and its
+    readers of TRUE and FALSE disconnected, so it is never simulated itself.
+    `instantiate()` copies every Component, Wire and Bus inside it, binding
+    its pins to the given arguments instead of running any constructors.
+
+    The copy is made by the C unpickler: the template is pickled once, with
+    every object it refers to from outside (its pins, TRUE and FALSE, its
+    RegisterFile, classes) replaced by a numbered `reference()` which is
+    bound anew on every load. The objects are pickled as empty shells, and
+    their attributes in later rounds, so that the pickle is flat however
+    deep the circuit is.
+    """
+    # the outside objects of the Template being instantiated, by number.
+    binding = None
+
+    # the number of Components inside below which a clone is no faster to
+    # make than running the constructors.
+    minimum = 32
+
+    @staticmethod
+    def key(component_class, args, kwargs):
+        """
+        The cache key of an instantiation, or None if it can't be cached.
+        """
+        try:
+            return (
+                component_class,
+                tuple(shape(value) for value in args),
+                tuple(sorted((name, shape(value)) for name, value in kwargs.items())),
+            )
+        except Uncacheable:
+            return None
+
+    def __init__(self, component_class, args, kwargs):
+        global REGISTERS
+        # the instance being built is pickled as it is, unless some of its
+        # pins are the same Wire (or a rail), which its copies might not
+        # share: then it is elaborated once more on fresh pins.
+        pins = self.pins(args, kwargs)
+        distinct = {id(pin) for pin in pins}
+        captured = (
+            len(distinct) == len(pins)
+            and id(TRUE) not in distinct and id(FALSE) not in distinct
+        )
+        if not captured:
+            args = [fresh(value) for value in args]
+            kwargs = { name: fresh(value) for name, value in kwargs.items() }
+            pins = self.pins(args, kwargs)
+
+        saved = REGISTERS, Elaboration.building
+        rails = [(rail, len(rail.downstream_components)) for rail in (TRUE, FALSE)]
+        fanouts = [
+            0 if isinstance(pin, Bus) else len(pin.downstream_components)
+            for pin in pins
+        ]
+        if captured:
+            file = REGISTERS
+        else:
+            REGISTERS = file = RegisterFile()
+            Elaboration.building = []
+        first = len(file)
+        try:
+            root = component_class.elaborate(*args, **kwargs)
+        finally:
+            REGISTERS, Elaboration.building = saved
+
+        rail_readers = []
+        for rail, fanout in rails:
+            rail_readers.append((rail, rail.downstream_components[fanout:]))
+            if not captured:
+                del rail.downstream_components[fanout:]
+
+        # outside objects, by numbered reference: first the RegisterFile,
+        # then the pins in the order `pins()` will list the actual ones.
+        references = { id(file): 0 }
+        for k, pin in enumerate(pins):
+            references[id(pin)] = k + 1
+        self.externals = []
+
+        # the Components first, then the attributes of every object met so
+        # far, round after round, until no new Wires turn up; and last the
+        # list of all the objects, to pair them with their attributes. The
+        # parent of a captured instance is outside, so it is left out.
+        parent, root.parent = root.parent, None
+        try:
+            stream = io.BytesIO()
+            pickler = TemplatePickler(stream, references, self.externals)
+            objects = pickler.objects
+            pickler.dump([root, *root.descendants()])
+            done = 0
+            self.rounds = 0
+            while done < len(objects):
+                batch = objects[done:]
+                done = len(objects)
+                pickler.dump([vars(obj) for obj in batch])
+                self.rounds += 1
+            pickler.dump(objects)
+            self.pickle = stream.getvalue()
+        finally:
+            root.parent = parent
+
+        index = { id(obj): k for k, obj in enumerate(objects) }
+        self.registers = [
+            (index[id(obj)], obj.index - first)
+            for obj in objects
+            if isinstance(obj, Register)
+        ]
+        self.register_count = len(file) - first
+
+        # readers of each pin Wire, and of TRUE and FALSE
+        self.readers = [
+            (k, [index[id(c)] for c in pin.downstream_components[fanout:]])
+            for k, (pin, fanout) in enumerate(zip(pins, fanouts))
+            if not isinstance(pin, Bus) and len(pin.downstream_components) > fanout
+        ]
+        self.rail_readers = [
+            (rail, [index[id(c)] for c in readers])
+            for rail, readers in rail_readers
+            if readers
+        ]
+
+        # the instance itself, if it was captured
+        self.built = root if captured else None
+
+    @staticmethod
+    def pins(args, kwargs):
+        """
+        Flattens the Wires and Buses in the arguments of a constructor.
+        """
+        pins = []
+        def flatten(value):
+            if isinstance(value, Wire):
+                pins.append(value)
+                if isinstance(value, Bus):
+                    for wire in value.wires:
+                        if isinstance(wire, Bus):
+                            flatten(wire)
+                        else:
+                            pins.append(wire)
+        for value in args:
+            flatten(value)
+        for name in sorted(kwargs):
+            flatten(kwargs[name])
+        return pins
+
+    def instantiate(self, args, kwargs):
+        file = REGISTERS
+        pins = self.pins(args, kwargs)
+        Template.binding = [file] + pins + self.externals
+
+        # the copy is one big burst of allocations, all of them reachable,
+        # so collecting garbage in the middle of it is wasted work.
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            unpickler = pickle.Unpickler(io.BytesIO(self.pickle))
+            unpickler.load()
+            states = []
+            for i in range(self.rounds):
+                states += unpickler.load()
+            objects = unpickler.load()
+            for obj, state in zip(objects, states):
+                obj.__dict__ = state
+        finally:
+            Template.binding = None
+            if collecting:
+                gc.enable()
+
+        offset = file.allocate(self.register_count)
+        for k, index in self.registers:
+            objects[k].index = offset + index
+
+        for k, readers in self.readers:
+            pin = pins[k]
+            if type(pin.downstream_components) is tuple:
+                pin.downstream_components += tuple(objects[i] for i in readers)
+            else:
+                pin.downstream_components.extend([objects[i] for i in readers])
+        for rail, readers in self.rail_readers:
+            rail.downstream_components.extend([objects[i] for i in readers])
+
+        root = objects[0]
+        building = Elaboration.building
+        root.parent = building[-1] if building else None
+        if root.parent is not None:
+            root.parent.children.append(root)
+        return root
+
+
+def levelize(gates):
+    """
+    Assigns every gate (NAND, TriState or ROM) a level: 0 if none of its
+    inputs is driven by one of the `gates`, and otherwise one more than the
+    level of the highest gate driving them. Returns the gates grouped by level,
+    lowest first, so evaluating them level by level always finds their
+    inputs ready. Raises CombinationalLoop if the gates form a cycle.
+    """
+    drivers = {}
+    for gate in gates:
+        for wire in wires_of(gate.outputs):
+            shared = drivers.setdefault(wire, [])
+            shared.append(gate)
+            if len(shared) > 1 and not isinstance(wire, ResolvedWire):
+                raise CircuitError("wire driven by more than one gate.")
+
+    readers = {}
+    waiting = {}
+    ready = []
+    for gate in gates:
+        count = 0
+        for wire in wires_of(gate.inputs):
+            if wire in drivers:
+                count += len(drivers[wire])
+                readers.setdefault(wire, []).append(gate)
+        if count:
+            waiting[gate] = count
+        else:
+            ready.append(gate)
+
+    # a gate becomes ready in the level after its last driver's.
+    levels = []
+    while ready:
+        levels.append(ready)
+        following = []
+        for gate in ready:
+            for wire in wires_of(gate.outputs):
+                for reader in readers.get(wire, ()):
+                    waiting[reader] -= 1
+                    if not waiting[reader]:
+                        following.append(reader)
+        ready = following
+
+    stuck = { gate for gate, count in waiting.items() if count }
+    if stuck:
+        # every stuck gate has a stuck driver, so walking back from any of
+        # them along stuck drivers must come around a cycle.
+        gate = next(gate for gate in gates if gate in stuck)
+        trail = {}
+        while gate not in trail:
+            trail[gate] = len(trail)
+            gate = next(
+                driver
+                for wire in wires_of(gate.inputs)
+                for driver in drivers.get(wire, ())
+                if driver in stuck
+            )
+        path = list(trail)[trail[gate]:]
+        path.reverse()
+        # start from whichever gate around the cycle was given first.
+        order = { gate: i for i, gate in enumerate(gates) }
+        start = path.index(min(path, key=order.get))
+        raise CombinationalLoop(path[start:] + path[:start])
+    return levels
+
+
+def acts(component):
+    """
+    Whether propagating or resetting a Component does anything: true for
+    the primitives and for anything else which overrides either, like a
+    `Behavior`, but not for the Components which only group others.
+    """
+    cls = type(component)
+    return (
+        component.primitive
+        or cls.propagate is not Component.propagate
+        or cls.reset is not Component.reset
+    )
+
+
+def seal(component, names=True):
+    """
+    Strips a built Component down to what simulation needs, for less memory
+    and faster propagation; it simulates just the same afterwards.
+
+    Every Wire inside loses the Components which only group others from its
+    `downstream_components`, which becomes a tuple, so propagating a value
+    calls the primitives directly. Those Components are also inlined out of
+    the hierarchy: unless an attribute of its parent refers to it (as with
+    `cpu.ram`), a grouping Component is dropped, and its children become
+    children of its parent. Every Component left has tuples for `children`,
+    `inputs` and `outputs`.
+
+    With `names`, each primitive keeps its `hierarchical_name()` from
+    before as a `path`, with one interned string for every distinct path.
+    The TRUE and FALSE rails are shared by every circuit, so they stay
+    lists, only losing this circuit's grouping Components.
+    """
+    everything = [component, *component.descendants()]
+    members = {id(c) for c in everything}
+
+    seen = set()
+    for c in everything:
+        for wire in wires_of([*c.inputs, *c.outputs]):
+            if id(wire) in seen:
+                continue
+            seen.add(id(wire))
+            kept = [
+                reader for reader in wire.downstream_components
+                if acts(reader) or id(reader) not in members
+            ]
+            if wire is TRUE or wire is FALSE:
+                wire.downstream_components[:] = kept
+            else:
+                wire.downstream_components = tuple(kept)
+
+    if names:
+        for c in everything:
+            if c.primitive and getattr(c, "path", None) is None:
+                c.path = sys.intern(hierarchical_name(c))
+
+    def named(parent):
+        # the Components an attribute of `parent` refers to, directly or
+        # in a list, tuple or dict.
+        refs = set()
+        for name, value in vars(parent).items():
+            if name in ("parent", "children"):
+                continue
+            if isinstance(value, dict):
+                value = list(value.values())
+            if isinstance(value, (list, tuple)):
+                refs.update(id(item) for item in value if isinstance(item, Component))
+            elif isinstance(value, Component):
+                refs.add(id(value))
+        return refs
+
+    def inline(parent):
+        refs = named(parent)
+        children = []
+        stack = list(reversed(parent.children))
+        while stack:
+            child = stack.pop()
+            if acts(child) or id(child) in refs:
+                child.parent = parent
+                children.append(child)
+            else:
+                stack.extend(reversed(child.children))
+        parent.children = tuple(children)
+        parent.inputs = tuple(parent.inputs)
+        parent.outputs = tuple(parent.outputs)
+        for child in children:
+            inline(child)
+
+    inline(component)
+    component.sealed = True
+    Clock.generation += 1
+    return component
+
+
+def wires_of(pins):
+    """
+    Flattens a sequence of Wires and (possibly nested) Buses into individual
+    Wires.
+    """
+    for pin in pins:
+        if isinstance(pin, Bus):
+            yield from wires_of(pin)
+        else:
+            yield pin
+
+
+class Component(metaclass=Elaboration):
     """
     A component is simply a number of input and output
     pins (Wires) which internally are wired together
     from simplier constituent Components.
     """
+
+    # True only for the components which actually do something when
+    # propagated, as opposed to being a collection of simpler components.
+    primitive = False
+
+    # True for components which are cloned from a Template after being
+    # elaborated once; see `Elaboration`.
+    templated = False
+
+    # the cache key of a templated Component: every instance with the same
+    # key has the same structure.
+    template_key = None
+
+    # the gates inside, grouped by level, once levelized.
+    levels = None
+
     def __init__(self):
         self.inputs = []
         self.outputs = []
@@ -199,6 +837,82 @@ class Component:
     def reset(self):
         pass
 
+    def descendants(self):
+        """
+        Iterates over every Component built inside this one, depth first.
+        """
+        for child in self.children:
+            yield child
+            yield from child.descendants()
+
+    def primitives(self):
+        """
+        Iterates over the primitive Components (NAND, Register, ...) which
+        actually implement this Component.
+        """
+        if self.primitive:
+            yield self
+        for component in self.descendants():
+            if component.primitive:
+                yield component
+
+    def levelize(self):
+        """
+        Levelizes the gates inside this Component (see `levelize()`), and
+        keeps the levels as `levels`.
+        """
+        self.levels = levelize([
+            primitive for primitive in self.primitives()
+            if not isinstance(primitive, Register)
+        ])
+        return self.levels
+
+    def input_pins(self):
+        """
+        Maps the attribute name of each input pin to its Wire or Bus.
+        """
+        return self._pins(self.inputs)
+
+    def output_pins(self):
+        """
+        Maps the attribute name of each output pin to its Wire or Bus.
+        """
+        return self._pins(self.outputs)
+
+    def _pins(self, wires):
+        # a pin may also be aliased by later attributes; the first name wins.
+        unnamed = { id(wire) for wire in wires }
+        pins = {}
+        for name, value in vars(self).items():
+            if id(value) in unnamed:
+                unnamed.remove(id(value))
+                pins[name] = value
+        return pins
+
+    def evaluate(self, **values):
+        """
+        Word-level model of this Component used for behavioral simulation.
+        Takes the value of each input pin by name (`None` if floating) and
+        returns a dict of output pin values, where `None` means the output
+        cannot be determined from the inputs. Components which support
+        behavioral simulation override this.
+        """
+        raise NotImplementedError(f"{type(self).__name__} has no behavioral model.")
+
+    def capture(self, **values):
+        """
+        Behavioral counterpart of `Register.propagate()`: stateful
+        Components override this to capture their next state.
+        """
+        pass
+
+    def commit(self):
+        """
+        Behavioral counterpart of `Register.reset()`: stateful Components
+        override this to move the captured next state into the current one.
+        """
+        pass
+
 
 class NAND(Component):
     """
@@ -207,6 +921,8 @@ class NAND(Component):
     of `out` will be set as soon as it can be determined from `a` and `b`. The
     output value will be False if and only if both inputs are True.
     """
+    primitive = True
+
     def __init__(self, a, b, out=None):
         super().__init__()
         self.a = self.input(a)
@@ -230,22 +946,297 @@ class NAND(Component):
             wire.reset()
 
 
+class ResolvedWire(Wire):
+    """
+    A Wire shared by several TriState drivers, like a bus line in a real
+    circuit. At most one driver may be enabled in any clock cycle: the
+    enabled driver claims the wire, and a second enabled driver raises a
+    WireError for bus contention. If no driver is enabled, the wire floats.
+    """
+    def __init__(self):
+        super().__init__()
+        self.driver = None
+
+    def drive(self, driver, value=None):
+        if self.driver is None:
+            self.driver = driver
+        elif self.driver is not driver:
+            raise WireError("bus contention: two drivers enabled on one wire.")
+        if value is not None and self.value is None:
+            self.value = value
+
+    def reset(self):
+        self.driver = None
+        super().reset()
+
+
+class TriState(Component):
+    """
+    A tri-state buffer: while `enable` is high, `inp` is passed through to
+    `out`, and otherwise `out` is left alone (high impedance) so another
+    TriState may drive it. `out` must be a ResolvedWire, and is usually
+    shared with other TriStates.
+    """
+    primitive = True
+
+    def __init__(self, inp, enable, out=None):
+        super().__init__()
+        self.inp = self.input(inp)
+        self.enable = self.input(enable)
+        self.out = self.output(ResolvedWire() if out is None else out)
+        if not isinstance(self.out, ResolvedWire):
+            raise CircuitError(f"output of {self} must be a ResolvedWire.")
+
+    def propagate(self):
+        if self.enable.value is True:
+            self.out.drive(self, self.inp.value)
+
+    def reset(self):
+        super().reset()
+        for wire in self.outputs:
+            wire.reset()
+
+
+class ROM(Component):
+    """
+    A read-only memory: `out` is the word of `contents` at address `addr`,
+    found by a single table lookup rather than decoded by gates, so a large
+    table such as microcode costs no more to simulate than one gate. The
+    address width is taken from `addr` and the word width from `out`, or
+    else `word_bits`. `contents` may be shorter than the 2**len(addr) words
+    it can address; the rest read as zero.
+
+    `DecodedROM` (in `circuit.combinational`) builds the same table out of
+    gates, to check the two agree.
+    """
+    primitive = True
+
+    def __init__(self, addr, contents, out=None, word_bits=8):
+        super().__init__()
+        if not isinstance(addr, Bus):
+            raise CircuitError(f"address of {self} must be a Bus.")
+        self.addr = self.input(addr)
+        self.out = self.output(Bus(word_bits) if out is None else out)
+        if not isinstance(self.out, Bus):
+            raise CircuitError(f"output of {self} must be a Bus.")
+        self.contents = self.table(contents, len(self.addr), len(self.out))
+
+    @staticmethod
+    def table(contents, addr_bits, word_bits):
+        """
+        Checks that `contents` fits in 2**addr_bits words of word_bits each,
+        and returns it as a tuple of exactly 2**addr_bits words.
+        """
+        contents = tuple(contents)
+        size = 1 << addr_bits
+        if len(contents) > size:
+            raise CircuitError(f"{len(contents)} words do not fit in {size}.")
+        for word in contents:
+            if not 0 <= word < (1 << word_bits):
+                raise CircuitError(f"{word} does not fit in {word_bits} bits.")
+        return contents + (0,) * (size - len(contents))
+
+    def propagate(self):
+        if self.out.value is not None:
+            return
+        address = self.addr.value
+        if address is not None:
+            self.out.value = self.contents[address]
+
+    def reset(self):
+        super().reset()
+        for wire in self.outputs:
+            wire.reset()
+
+    def evaluate(self, addr):
+        return {"out": None if addr is None else self.contents[addr]}
+
+
+# translation tables between one-byte-per-bit state and ASCII binary digits.
+TO_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+FROM_DIGITS = bytes.maketrans(b"01", b"\x00\x01")
+
+
+class RegisterFile:
+    """
+    Dense storage for the state of Registers. Rather than each Register
+    holding its own `state` and `next_state` attributes, each one owns a
+    slot in the two contiguous bytearrays `state` and `next_state` (one byte
+    per bit, 0 or 1), and the Register is merely a view of that slot.
+
+    Slots are allocated in order of construction, so the bits of a
+    `Register8`, or all the words of a `RAM`, occupy a contiguous range of
+    slots and can be read, compared, and committed as a single slice.
+
+    New Registers are allocated in the global `REGISTERS` file, which is
+    replaced by `reset_globals()`, or, inside a `with` block, in the file
+    entered, so a circuit built in its own file takes the file with it
+    when it is freed:
+
+        with RegisterFile():
+            ram = RAM(Bus(8), Bus(8), Wire())
+
+    Once `checkpoint()` has been called, every slot whose state changes is
+    journaled, so `changed_since()` costs only as much as the changes.
+    """
+    def __init__(self):
+        self.state = bytearray()
+        self.next_state = bytearray()
+
+        # (sequence number, slot) for every change, in order, and the
+        # sequence number of the last change of each slot; None until
+        # tracking starts.
+        self.journal = None
+        self.last_change = None
+        self.sequence = 0
+
+        # the files which were allocating before each `with` on this one
+        self.entered = []
+
+    def __len__(self):
+        return len(self.state)
+
+    def __enter__(self):
+        global REGISTERS
+        self.entered.append(REGISTERS)
+        REGISTERS = self
+        return self
+
+    def __exit__(self, *exc_info):
+        global REGISTERS
+        REGISTERS = self.entered.pop()
+
+    def allocate(self, count=1):
+        """
+        Allocates `count` consecutive slots, initialized to False, and
+        returns the index of the first.
+        """
+        index = len(self.state)
+        self.state.extend(bytes(count))
+        self.next_state.extend(bytes(count))
+        return index
+
+    def commit(self, start=0, stop=None):
+        """
+        Moves the next state of the slots in `[start, stop)` into their
+        current state; by default, every slot at once.
+        """
+        if self.journal is not None:
+            self.record(start, self.next_state[start:stop])
+        self.state[start:stop] = self.next_state[start:stop]
+
+    def checkpoint(self):
+        """
+        Starts journaling changes, if it hasn't already, and returns a
+        checkpoint for `changed_since()`.
+        """
+        if self.journal is None:
+            self.journal = []
+            self.last_change = {}
+        return self.sequence
+
+    def changed_since(self, checkpoint):
+        """
+        The set of slots whose state has changed since `checkpoint`. A slot
+        which changed and then changed back is included.
+        """
+        journal = self.journal
+        if journal is None:
+            raise CircuitError("no checkpoint was taken on this RegisterFile.")
+        start = bisect.bisect_right(journal, (checkpoint, len(self.state)))
+        return { slot for sequence, slot in journal[start:] }
+
+    def record(self, start, new):
+        """
+        Journals the slots from `start` whose state is about to be
+        overwritten by the bytes `new` with a different value.
+        """
+        old = self.state[start:start + len(new)]
+        if old == new:
+            return
+        # each slot is one byte, so the differing bytes are found as the
+        # set bits of the XOR of the two slices read as integers.
+        difference = int.from_bytes(old, "little") ^ int.from_bytes(new, "little")
+        self.sequence += 1
+        sequence = self.sequence
+        journal = self.journal
+        last_change = self.last_change
+        while difference:
+            low = difference & -difference
+            slot = start + (low.bit_length() - 1) // 8
+            journal.append((sequence, slot))
+            last_change[slot] = sequence
+            difference ^= low
+
+        # only the last change of each slot matters, so drop the rest once
+        # they are the bulk of the journal.
+        if len(journal) > 2 * len(last_change) + 4096:
+            self.journal = sorted(
+                (sequence, slot) for slot, sequence in last_change.items()
+            )
+
+    def word(self, start, length, array=None):
+        """
+        Reads `length` slots starting at `start` as an unsigned integer,
+        most significant bit first, like `Bus.value`.
+        """
+        if array is None:
+            array = self.state
+        return int(array[start:start + length].translate(TO_DIGITS), 2)
+
+    def set_word(self, start, length, value, array=None):
+        """
+        Writes an unsigned integer into `length` slots starting at `start`.
+        """
+        if array is None:
+            array = self.state
+        digits = format(value % (1 << length), f"0{length}b").encode()
+        bits = digits.translate(FROM_DIGITS)
+        if array is self.state and self.journal is not None:
+            self.record(start, bits)
+        array[start:start + length] = bits
+
+
+REGISTERS = RegisterFile()
+
+
 class Register(Component):
     """
     The Register is the only "stateful" Component necessary to implement all
     of sequential logic. It's output is always determined from previous clock
     cycles.
     """
+    primitive = True
+
     def __init__(self, inp, enable, out=None):
         super().__init__()
         self.inp = self.input(inp)
         self.enable = self.input(enable)
         self.out = self.output(out)
 
-        self.state = False
-        self.next_state = False
+        self.file = REGISTERS
+        self.index = self.file.allocate()
         self.already_reset = False
 
+    @property
+    def state(self):
+        return self.file.state[self.index] == 1
+
+    @state.setter
+    def state(self, value):
+        file = self.file
+        if file.journal is not None:
+            file.record(self.index, bytes([bool(value)]))
+        file.state[self.index] = bool(value)
+
+    @property
+    def next_state(self):
+        return self.file.next_state[self.index] == 1
+
+    @next_state.setter
+    def next_state(self, value):
+        self.file.next_state[self.index] = bool(value)
+
     def propagate(self):
         self.already_reset = False
 
@@ -262,8 +1253,94 @@ class Register(Component):
     def reset(self):
         if not self.already_reset:
             # propagate the reset
-            self.state = self.next_state
+            file = self.file
+            if file.journal is not None:
+                file.record(self.index, file.next_state[self.index:self.index + 1])
+            file.state[self.index] = file.next_state[self.index]
             self.already_reset = True
             for wire in self.outputs:
                 wire.reset()
 
+
+
+class Clock:
+    """
+    Clocks a single circuit. The TRUE and FALSE rails are shared by every
+    circuit, so resetting and propagating them would clock every circuit
+    ever built; a Clock resets and propagates only the Registers of its
+    Component, and the Components inside it which read the rails.
+
+        clock = Clock(counter)
+        for i in range(10):
+            clock.reset()
+            clock.propagate()
+
+    The insides of a behavioral Component are left to its Behavior (see
+    `circuit.behavioral`).
+    """
+    # bumped whenever Components are detached or attached again, so every
+    # Clock looks for its Components anew.
+    generation = 0
+
+    def __init__(self, component):
+        self.component = component
+        self.components = []
+        self.found = None
+
+    def clocked(self):
+        """
+        The Components clocked, in order: the Registers, and then the
+        readers of TRUE and of FALSE.
+        """
+        if self.found != Clock.generation:
+            self.found = Clock.generation
+            members = set()
+            registers = []
+            stack = [self.component]
+            while stack:
+                component = stack.pop()
+                members.add(id(component))
+                behavior = getattr(component, "behavior", None)
+                if behavior is not None:
+                    members.add(id(behavior))
+                    continue
+                if isinstance(component, Register):
+                    registers.append(component)
+                stack.extend(reversed(component.children))
+
+            seen = set()
+            self.components = []
+            readers = [*TRUE.downstream_components, *FALSE.downstream_components]
+            for component in registers + readers:
+                if id(component) in members and id(component) not in seen:
+                    seen.add(id(component))
+                    self.components.append(component)
+        return self.components
+
+    def reset(self):
+        for component in self.clocked():
+            component.reset()
+
+    def propagate(self):
+        for component in self.clocked():
+            component.propagate()
+
+
+def release(component):
+    """
+    Disconnects a circuit which will not be simulated again from the TRUE
+    and FALSE rails, the only Wires it shares with every other circuit, so
+    that nothing outside keeps it alive once it is dropped.
+    """
+    members = set()
+    for c in (component, *component.descendants()):
+        members.add(id(c))
+        behavior = getattr(c, "behavior", None)
+        if behavior is not None:
+            members.add(id(behavior))
+    for rail in (TRUE, FALSE):
+        rail.downstream_components[:] = [
+            c for c in rail.downstream_components
+            if id(c) not in members
+        ]
+    Clock.generation += 1
@@ -0,0 +1,415 @@
+"""
+A flattened view of a built circuit, used by engines which simulate many
+values at once instead of propagating them through Wire objects.
+
+Every Wire used by the primitives inside a Component becomes a numbered
+net, and every primitive becomes a row of net numbers. The gates (NANDs,
+TriStates and ROMs) are levelized (see `kernel.levelize`) and sorted by
+level, so they can all be evaluated in a single pass, and a combinational
+loop raises a CombinationalLoop naming the gates around it. Registers break
+the combinational graph: their outputs are sources, like the input pins and
+the TRUE/FALSE rails, and their inputs are sinks.
+
+The compiled evaluator is bit-parallel: each net holds a Python int in
+which bit `k` is the value of that net in "lane" `k`, so a single pass
+evaluates the circuit for as many independent patterns (or, for fault
+simulation, faulty machines) as there are lanes. It is two-valued:
+floating nets are simply False, so a ResolvedWire is the OR of its enabled
+TriState drivers, and contention is not detected. A ROM looks up the
+word of every distinct address among the lanes once.
+
+The ternary evaluator keeps floating values: every net is two ints, or
+bitplanes, `hi` and `lo`, where bit `k` of `hi` is set if the net is True
+in lane `k`, bit `k` of `lo` if it is False, and neither if it is None (X).
+A NAND is then `hi = a.lo | b.lo` and `lo = a.hi & b.hi`, so a False input
+decides the output even when the other is X, exactly as `NAND.propagate()`
+does, and the whole circuit still costs a few bitwise operations per gate
+however many lanes there are. A TriState only drives its net in the lanes
+where its enable is known True, an X address makes every bit of a ROM's
+word X, and the lanes where two TriStates drive one net are reported
+instead of raising, so the ternary evaluator gives the object kernel's
+value of every Wire in every lane, None included. `compile_ternary_cycle()`
+clocks the Registers on the bitplanes as well, for the Simulator's
+"ternary" engine.
+"""
+from .kernel import (
+    TRUE, FALSE, NAND, TriState, ROM, Register, CircuitError, levelize, wires_of
+)
+
+__all__ = [
+    "Netlist",
+]
+
+
+def lookup(v, mask, addr, out, contents):
+    """
+    Evaluates a ROM in every lane of `mask`: the lanes are split by the
+    value of each address net in turn, so each distinct address is looked
+    up once, and its word is or-ed into the output nets for its lanes.
+    """
+    selected = {0: mask}
+    for net in addr:
+        high = v[net]
+        split = {}
+        for address, lanes in selected.items():
+            ones = lanes & high
+            if ones:
+                split[address << 1 | 1] = ones
+            if ones != lanes:
+                split[address << 1] = lanes ^ ones
+        selected = split
+
+    words = [0] * len(out)
+    for address, lanes in selected.items():
+        word = contents[address]
+        k = len(out) - 1
+        while word:
+            if word & 1:
+                words[k] |= lanes
+            word >>= 1
+            k -= 1
+    for net, lanes in zip(out, words):
+        v[net] = lanes
+
+
+def ternary_lookup(hi, lo, mask, addr, out, contents):
+    """
+    Evaluates a ROM in every lane of `mask` on the bitplanes `hi` and `lo`:
+    as `lookup()`, in the lanes where every address net is known, and X in
+    the others.
+    """
+    known = mask
+    for net in addr:
+        known &= hi[net] | lo[net]
+    selected = {0: known}
+    for net in addr:
+        high = hi[net]
+        split = {}
+        for address, lanes in selected.items():
+            ones = lanes & high
+            if ones:
+                split[address << 1 | 1] = ones
+            if ones != lanes:
+                split[address << 1] = lanes ^ ones
+        selected = split
+
+    highs = [0] * len(out)
+    lows = [0] * len(out)
+    for address, lanes in selected.items():
+        word = contents[address]
+        for k in range(len(out) - 1, -1, -1):
+            if word & 1:
+                highs[k] |= lanes
+            else:
+                lows[k] |= lanes
+            word >>= 1
+    for net, high, low in zip(out, highs, lows):
+        hi[net] = high
+        lo[net] = low
+
+
+class Netlist:
+    def __init__(self, component):
+        self.component = component
+
+        # net number -> Wire, and Wire -> net number
+        self.wires = []
+        self.nets = {}
+
+        self.true = self.net(TRUE)
+        self.false = self.net(FALSE)
+
+        # pin name -> list of nets, most significant bit first
+        self.inputs = {
+            name: [self.net(wire) for wire in wires_of([pin])]
+            for name, pin in component.input_pins().items()
+        }
+        self.outputs = {
+            name: [self.net(wire) for wire in wires_of([pin])]
+            for name, pin in component.output_pins().items()
+        }
+
+        gates = []
+        self.registers = []
+        for primitive in component.primitives():
+            if isinstance(primitive, (NAND, TriState, ROM)):
+                gates.append(primitive)
+            elif isinstance(primitive, Register):
+                self.registers.append(primitive)
+            else:
+                raise CircuitError(f"cannot flatten {type(primitive).__name__}.")
+
+        # gates sorted by level, the index of the first gate of each level,
+        # and the nets of every gate: (a, b, out) for a NAND, (inp, enable,
+        # out) for a TriState, or (address nets, None, output nets) for a
+        # ROM.
+        # levelized afresh rather than from `component.levels`, which may
+        # predate later changes to the circuit.
+        levels = levelize(gates)
+        self.gates = [gate for level in levels for gate in level]
+        self.level_starts = []
+        start = 0
+        for level in levels:
+            self.level_starts.append(start)
+            start += len(level)
+        self.table = [
+            (
+                tuple(self.net(wire) for wire in gate.addr),
+                None,
+                tuple(self.net(wire) for wire in gate.out),
+            )
+            if isinstance(gate, ROM) else
+            tuple(self.net(wire) for wire in gate.inputs) + (self.net(gate.out),)
+            for gate in self.gates
+        ]
+        self.tristates = {
+            i for i, gate in enumerate(self.gates)
+            if isinstance(gate, TriState)
+        }
+        self.roms = {
+            i: gate for i, gate in enumerate(self.gates)
+            if isinstance(gate, ROM)
+        }
+
+        # (inp, enable, out) nets of each Register
+        self.register_nets = [
+            (self.net(register.inp), self.net(register.enable), self.net(register.out))
+            for register in self.registers
+        ]
+
+    def __len__(self):
+        return len(self.wires)
+
+    def net(self, wire):
+        """
+        Returns the net number of a Wire, numbering it if it is new.
+        """
+        index = self.nets.get(wire)
+        if index is None:
+            index = self.nets[wire] = len(self.wires)
+            self.wires.append(wire)
+        return index
+
+    def values(self, mask=1):
+        """
+        Returns a fresh list of net values for lanes `mask`: the TRUE rail
+        is high and each Register output holds its current state in every
+        lane. Everything else starts low.
+        """
+        v = [0] * len(self.wires)
+        v[self.true] = mask
+        for register, (inp, enable, out) in zip(self.registers, self.register_nets):
+            if register.state:
+                v[out] = mask
+        return v
+
+    def set_inputs(self, v, values, mask=1):
+        """
+        Drives each input pin with the same integer value in every lane.
+        """
+        for name, nets in self.inputs.items():
+            try:
+                value = values[name]
+            except KeyError:
+                raise CircuitError(f"no value given for input pin {name}.") from None
+            for net in reversed(nets):
+                v[net] = mask if value & 1 else 0
+                value >>= 1
+
+    def ternary_values(self, mask=1):
+        """
+        Returns fresh bitplanes (hi, lo) for lanes `mask`: the rails and the
+        Register outputs are known in every lane, and everything else is X.
+        """
+        hi = [0] * len(self.wires)
+        lo = [0] * len(self.wires)
+        hi[self.true] = mask
+        lo[self.false] = mask
+        for register, (inp, enable, out) in zip(self.registers, self.register_nets):
+            if register.state:
+                hi[out] = mask
+            else:
+                lo[out] = mask
+        return hi, lo
+
+    def set_ternary_inputs(self, hi, lo, values, mask=1):
+        """
+        Drives each input pin with the same value in every lane, as
+        `set_inputs()`; pins given None, or not given, float.
+        """
+        for name, nets in self.inputs.items():
+            value = values.get(name)
+            for net in reversed(nets):
+                if value is None:
+                    hi[net] = lo[net] = 0
+                else:
+                    hi[net], lo[net] = (mask, 0) if value & 1 else (0, mask)
+                    value >>= 1
+
+    def read_ternary(self, hi, lo, nets, lane=0):
+        """
+        Reads a list of nets as an unsigned integer in a single lane, or
+        None if any of them is X there.
+        """
+        value = 0
+        for net in nets:
+            if not ((hi[net] | lo[net]) >> lane) & 1:
+                return None
+            value = (value << 1) | ((hi[net] >> lane) & 1)
+        return value
+
+    def read(self, v, nets, lane=0):
+        """
+        Reads a list of nets as an unsigned integer in a single lane.
+        """
+        value = 0
+        for net in nets:
+            value = (value << 1) | ((v[net] >> lane) & 1)
+        return value
+
+    def compile(self, inject=False):
+        """
+        Generates a function `evaluate(v, mask)` which evaluates every gate
+        in place over the list of net values `v`.
+
+        With `inject`, the function is `evaluate(v, mask, keep, force)` and
+        the output of NAND gate `i` is and-ed with `keep[i]` and or-ed with
+        `force[i]`, which lets individual lanes have stuck-at faults.
+        """
+        if inject:
+            lines = ["def evaluate(v, mask, keep, force):"]
+            nand = "    v[{2}] = (mask ^ (v[{0}] & v[{1}])) & keep[{3}] | force[{3}]"
+        else:
+            lines = ["def evaluate(v, mask):"]
+            nand = "    v[{2}] = mask ^ (v[{0}] & v[{1}])"
+        lines += self.gate_lines(nand)
+        lines.append("    return v")
+        return self.define(lines, "evaluate")
+
+    def compile_ternary(self):
+        """
+        Generates a function `evaluate(hi, lo, mask)` which evaluates every
+        gate in place over the bitplanes `hi` and `lo` (see the module
+        documentation), and returns the lanes with bus contention.
+        """
+        lines = ["def evaluate(hi, lo, mask):", "    contention = 0"]
+        lines += self.ternary_gate_lines()
+        lines.append("    return contention")
+        return self.define(lines, "evaluate")
+
+    def compile_ternary_cycle(self):
+        """
+        Generates a function `cycle(hi, lo, state, next_state)` which
+        simulates one clock cycle in a single lane, like `compile_cycle()`,
+        over the bitplanes of `compile_ternary()`: floating input pins and
+        everything they reach are X, as in the object kernel, and a Register
+        only captures its input when its enable is True and its input is
+        known. Returns 1 if two TriStates drove one net at once, else 0.
+        """
+        lines = ["def cycle(hi, lo, state, next_state):", "    mask = 1", "    contention = 0"]
+        for register, (inp, enable, out) in zip(self.registers, self.register_nets):
+            i = register.index
+            lines.append(f"    hi[{out}] = state[{i}]")
+            lines.append(f"    lo[{out}] = 1 ^ state[{i}]")
+        lines += self.ternary_gate_lines()
+        for register, (inp, enable, out) in zip(self.registers, self.register_nets):
+            i = register.index
+            lines.append(
+                f"    next_state[{i}] = hi[{inp}] if hi[{enable}] and hi[{inp}] | lo[{inp}] else state[{i}]"
+            )
+        lines.append("    return contention")
+        return self.define(lines, "cycle")
+
+    def ternary_gate_lines(self):
+        """
+        Generates the code evaluating every gate over the bitplanes `hi`
+        and `lo`, in order, or-ing the lanes with bus contention into
+        `contention`.
+        """
+        lines = []
+        # the lanes in which each resolved net has a driver so far.
+        claimed = set()
+        for i, (a, b, out) in enumerate(self.table):
+            if i in self.roms:
+                lines.append(f"    ternary_lookup(hi, lo, mask, {a}, {out}, ROMS[{i}])")
+            elif i not in self.tristates:
+                lines.append(f"    hi[{out}] = lo[{a}] | lo[{b}]")
+                lines.append(f"    lo[{out}] = hi[{a}] & hi[{b}]")
+            elif out in claimed:
+                lines += [
+                    f"    enable = hi[{b}]",
+                    f"    contention |= claimed_{out} & enable",
+                    f"    claimed_{out} |= enable",
+                    f"    hi[{out}] |= hi[{a}] & enable",
+                    f"    lo[{out}] |= lo[{a}] & enable",
+                ]
+            else:
+                lines += [
+                    f"    claimed_{out} = enable = hi[{b}]",
+                    f"    hi[{out}] = hi[{a}] & enable",
+                    f"    lo[{out}] = lo[{a}] & enable",
+                ]
+                claimed.add(out)
+        return lines
+
+    def compile_cycle(self):
+        """
+        Generates a function `cycle(v, state, next_state)` which simulates
+        one clock cycle in a single lane: every Register output is loaded
+        from the `state` bytearray of its RegisterFile, every gate is
+        evaluated, and every Register captures its next state into the
+        `next_state` bytearray, just like the Register primitive does when
+        propagated. Committing `next_state` into `state` is left to the
+        caller.
+        """
+        lines = ["def cycle(v, state, next_state):"]
+        for register, (inp, enable, out) in zip(self.registers, self.register_nets):
+            lines.append(f"    v[{out}] = state[{register.index}]")
+        lines += self.gate_lines("    v[{2}] = 1 ^ (v[{0}] & v[{1}])", lanes=False)
+        for register, (inp, enable, out) in zip(self.registers, self.register_nets):
+            i = register.index
+            lines.append(f"    next_state[{i}] = v[{inp}] if v[{enable}] else state[{i}]")
+        lines.append("    return v")
+        return self.define(lines, "cycle")
+
+    def gate_lines(self, nand, lanes=True):
+        """
+        Generates one line of code per gate, in order, formatting `nand`
+        with the nets (a, b, out) and index of each NAND gate. A resolved
+        net is the OR of its enabled TriState drivers. Without `lanes`, the
+        nets hold single bits, and a ROM is looked up inline.
+        """
+        lines = []
+        driven = set()
+        for i, (a, b, out) in enumerate(self.table):
+            if i in self.roms:
+                if lanes:
+                    lines.append(f"    lookup(v, mask, {a}, {out}, ROMS[{i}])")
+                    continue
+                address = " | ".join(
+                    f"v[{net}] << {len(a) - 1 - k}" for k, net in enumerate(a)
+                )
+                lines.append(f"    word = ROMS[{i}][{address}]")
+                lines += [
+                    f"    v[{net}] = word >> {len(out) - 1 - k} & 1"
+                    for k, net in enumerate(out)
+                ]
+            elif i not in self.tristates:
+                lines.append(nand.format(a, b, out, i))
+            elif out in driven:
+                lines.append(f"    v[{out}] |= v[{a}] & v[{b}]")
+            else:
+                lines.append(f"    v[{out}] = v[{a}] & v[{b}]")
+                driven.add(out)
+        return lines
+
+    def define(self, lines, function):
+        name = type(self.component).__name__
+        code = compile("\n".join(lines), f"<netlist of {name}>", "exec")
+        namespace = {
+            "lookup": lookup,
+            "ternary_lookup": ternary_lookup,
+            "ROMS": { i: rom.contents for i, rom in self.roms.items() },
+        }
+        exec(code, namespace)
+        return namespace[function]
@@ -1,22 +1,33 @@
 """
 Sequential logic is based on the stateful Register primitive.
 """
-from .kernel import Component, Register, Wire, Bus, TRUE, FALSE
-from .combinational import Not8, Add8, Or8, Mux8, ZERO
+from .kernel import Component, Register, Wire, Bus, TRUE, FALSE, CircuitError
+from .combinational import AddN, MuxN, TriStateN, Decoder, ZERO, resolved_bus
 from .logic_gates import AND
 
 __all__ = [
+    "RegisterN",
     "Register8",
+    "CounterN",
     "Counter8",
     "RAM",
 ]
 
-class Register8(Component):
+class RegisterN(Component):
+    """
+    A word of 1-bit Registers sharing an enable pin; the width is taken from
+    `inp`. Their state occupies consecutive slots of the RegisterFile
+    starting at `offset`, so this is really a view of that slice.
+    """
+    width = None
+    templated = True
+
     def __init__(self, inp, enable, out=None):
         super().__init__()
-        self.inp = self.input(inp, 8)
+        self.inp = self.input(inp, self.width)
+        self.width = len(self.inp)
         self.enable = self.input(enable)
-        self.out = self.output(out, 8)
+        self.out = self.output(out, self.width)
 
         self.bit_registers = [
             Register(
@@ -24,143 +35,263 @@ class Register8(Component):
                 enable=self.enable,
                 out=self.out[i]
             )
-            for i in range(8)
+            for i in range(self.width)
         ]
 
+    @property
+    def file(self):
+        return self.bit_registers[0].file
+
+    @property
+    def offset(self):
+        return self.bit_registers[0].index
+
     @property
     def state(self):
         """
         For debugging purposes, this read-only
         property exposes the internal state of
-        this register as an 8-bit unsigned integer.
+        this register as an unsigned integer.
         """
-        value = 0
-        for bit in self.bit_registers:
-            value = (value << 1) + bit.state
-        return value
+        return self.file.word(self.offset, self.width)
+
+    @property
+    def next_state(self):
+        """
+        The state this register will take on the next clock cycle, as an
+        unsigned integer.
+        """
+        return self.file.word(self.offset, self.width, self.file.next_state)
+
+    @next_state.setter
+    def next_state(self, value):
+        self.file.set_word(self.offset, self.width, value, self.file.next_state)
+
+    def evaluate(self, inp, enable):
+        return {"out": self.state}
 
+    def capture(self, inp, enable):
+        if enable is True and inp is not None:
+            self.next_state = inp
+        else:
+            self.next_state = self.state
 
-class Counter8(Component):
-    def __init__(self, enable, zero, out=None):
+    def commit(self):
+        self.file.commit(self.offset, self.offset + self.width)
+
+
+class Register8(RegisterN):
+    width = 8
+
+
+class CounterN(Component):
+    """
+    An N-bit counter which increments when `enable` is high and returns to
+    zero when `zero` is high. There are no data inputs, so the width is
+    taken from `out`, or from the class's `width`. `adder` chooses the
+    adder architecture used for the increment, any Component class with the
+    same pins as `AddN`.
+    """
+    width = None
+    templated = True
+
+    def __init__(self, enable, zero, out=None, adder=AddN):
         super().__init__()
         self.enable = self.input(enable)
         self.zero = self.input(zero)
-        self.out = self.output(out, 8)
+        if out is None and self.width is None:
+            raise CircuitError(f"the width of {type(self).__name__} is taken from out.")
+        self.out = self.output(out, self.width)
+        self.width = width = len(self.out)
+        zero_bus = ZERO if width == 8 else Bus([FALSE] * width)
 
         # this will feed back into the register
         # after the increment/reset logic.
-        loopback = Bus(8)
+        loopback = Bus(width)
 
-        Register8(
+        self.register = RegisterN(
             inp=loopback,
             enable=TRUE,
             out=self.out
         )
 
         # setting the carry bit is an easy way to pass a single bit
-        # into Add8. Much easier than having b=Mux8(ZERO, ONE).
-        incremented = Add8(
+        # into the adder. Much easier than having b=MuxN(ZERO, ONE).
+        incremented = adder(
             a=self.out,
-            b=ZERO,
+            b=zero_bus,
             cin=self.enable
         ).out
 
         # cycle all the way back to zero if reset is high.
-        Mux8(
+        MuxN(
             a=incremented,
-            b=ZERO,
+            b=zero_bus,
             select=self.zero,
             out=loopback
         )
 
+    def evaluate(self, enable, zero):
+        return {"out": self.register.state}
+
+    def capture(self, enable, zero):
+        if zero is True:
+            self.register.next_state = 0
+        elif zero is False and enable is not None:
+            self.register.next_state = (self.register.state + enable) % (1 << self.width)
+        else:
+            self.register.next_state = self.register.state
+
+    def commit(self):
+        self.register.commit()
+
+
+class Counter8(CounterN):
+    """
+    An 8-bit counter.
+    """
+    width = 8
+
 
 class RAM(Component):
     """
-    A very heavy component which implements an 8-bit addressable, 256 byte
-    memory. This requires tens of thousands of NAND gates and 2048 registers.
+    An addressable memory of 2**addr_bits words of word_bits each; by
+    default 256 bytes, addressed by an 8-bit Bus. This is a very heavy
+    component: the default size needs 2048 registers, the same number of
+    tri-state buffers, and over a thousand NAND gates.
     """
-    def __init__(self, inp, addr, write, out=None):
+    templated = True
+
+    def __init__(self, inp, addr, write, out=None, addr_bits=8, word_bits=8):
         super().__init__()
-        self.inp = self.input(inp, 8)
-        self.addr = self.input(addr, 8)
+        self.addr_bits = addr_bits
+        self.word_bits = word_bits
+        self.size = 1 << addr_bits
+        self.inp = self.input(inp, word_bits)
+        self.addr = self.input(addr, addr_bits)
         self.write = self.input(write)
-        self.out = self.output(out, 8)
+        self.out = self.output(out, word_bits)
 
-        self.not_addr = Not8(self.addr).out
-        
-        # 256 wires indicating if each register was selected. The same
+        # one wire per word indicating if it was selected. The same
         # wire controls both selection for both reading and writing. 
-        self.selected = [
-            self.matches_addr(i)
-            for i in range(256)
-        ]
+        self.selected = Decoder(self.addr).out
 
-        # 256 registers to hold the values in memory. 
+        # a register to hold each word of memory.
         self.registers = [
-            Register8(
+            RegisterN(
                 inp=self.inp,
                 enable=AND(self.write, self.selected[i]).out
             )
-            for i in range(256)
+            for i in range(self.size)
         ]
 
-        # 255 of these outputs will be zero, and exactly one (the selected
-        # register) may not be zero; that one contains the output value.
-        outputs = [
-            Mux8(
-                a=ZERO,
-                b=self.registers[i].out,
-                select=self.selected[i]
-            ).out
-            for i in range(256)
-        ]
+        # Every register drives the shared output bus through a tri-state
+        # buffer, and exactly one (the selected register) is enabled. This
+        # replaces what would otherwise be a tree of Or gates.
+        bus = resolved_bus(self.out)
+        for i in range(self.size):
+            TriStateN(
+                inp=self.registers[i].out,
+                enable=self.selected[i],
+                out=bus
+            )
+
+        # address written by the behavioral model this cycle, if any.
+        self.next_write = None
+
+    @property
+    def file(self):
+        return self.registers[0].file
 
-        # Yikes, an inverse multiplexer sure needs a lot of transistors when
-        # built out of binary gates... we need eight layers of 128, 64, 32, 16,
-        # 8, 4, 2, and finally 1, for a total of 255 Or8 gates.
-        while len(outputs) > 2:
-            outputs = [
-                Or8(left, right).out
-                for left, right
-                in zip(outputs[::2], outputs[1::2])
-            ]
-        # last layer is a special because we want to wire in the output gate.
-        Or8(outputs[0], outputs[1], out=self.out)
-
-    def matches_addr(self, index):
+    @property
+    def offset(self):
         """
-        This implements a comparison between an 8-bit value `addr` known only
-        at run time and a constant index known at compile time. We have both
-        `addr` and its inverse `not_addr`. By choosing each bit either from
-        `addr` or `not_addr`, we can build a single long AND expression
-        requires all bits of `addr` to be exactly the same as the bits of
-        index. This uses far fewer transistors than relying on the dynamic
-        `Equal8(addr, index)` component.
+        All the bits of memory form one contiguous slice of the file,
+        starting here.
         """
-        a = [
-            self.addr[j] if index & (128 >> j) else self.not_addr[j]
-            for j in range(8)
-        ]
+        return self.registers[0].offset
 
-        return AND(
-            AND(
-                AND(a[0], a[1]).out,
-                AND(a[2], a[3]).out
-            ).out,
-            AND(
-                AND(a[4], a[5]).out,
-                AND(a[6], a[7]).out
-            ).out,
-        ).out
+    def evaluate(self, inp, addr, write):
+        if addr is None:
+            return {"out": None}
+        return {"out": self.registers[addr].state}
+
+    def capture(self, inp, addr, write):
+        if write is True and addr is not None and inp is not None:
+            self.registers[addr].next_state = inp
+            self.next_write = addr
+
+    def commit(self):
+        if self.next_write is not None:
+            self.registers[self.next_write].commit()
+            self.next_write = None
+
+    def load(self, words, address=0):
+        """
+        Writes a sequence of words, such as the bytes of a program image,
+        into consecutive addresses from `address` as a single slice of the
+        RegisterFile. Both the current and the next state are written, so
+        the words are there on the next clock cycle with any engine.
+        """
+        words = list(words)
+        if not words:
+            return
+        if address < 0 or address + len(words) > self.size:
+            raise CircuitError(f"{len(words)} words do not fit at address {address}.")
+        value = 0
+        for word in words:
+            if not 0 <= word < (1 << self.word_bits):
+                raise CircuitError(f"{word} does not fit in {self.word_bits} bits.")
+            value = (value << self.word_bits) | word
+        start = self.offset + address * self.word_bits
+        length = len(words) * self.word_bits
+        self.file.set_word(start, length, value)
+        self.file.set_word(start, length, value, self.file.next_state)
+
+    def checkpoint(self):
+        """
+        Starts tracking writes to the memory, and returns a checkpoint for
+        `diff_since()`.
+        """
+        return self.file.checkpoint()
+
+    def diff_since(self, checkpoint):
+        """
+        Maps the address of every word whose value has changed since
+        `checkpoint` to its current value. The journal of the whole
+        RegisterFile is scanned, so this takes time proportional to every
+        Register changed since, in this RAM or any other circuit sharing
+        the file, however large the memory is.
+        """
+        start = self.offset
+        stop = start + self.size * self.word_bits
+        addresses = sorted({
+            (slot - start) // self.word_bits
+            for slot in self.file.changed_since(checkpoint)
+            if start <= slot < stop
+        })
+        return { address: self.registers[address].state for address in addresses }
+
+    def contents(self):
+        """
+        The current state of the whole memory as bytes, read from the
+        RegisterFile as a single slice. Words wider than a byte are stored
+        big-endian in as many bytes as they need.
+        """
+        word_bytes = (self.word_bits + 7) // 8
+        if self.word_bits == 8 * word_bytes:
+            bits = self.size * self.word_bits
+            return self.file.word(self.offset, bits).to_bytes(self.size * word_bytes, "big")
+        return b"".join(
+            register.state.to_bytes(word_bytes, "big")
+            for register in self.registers
+        )
 
     def hex_dump(self):
+        word_bytes = (self.word_bits + 7) // 8
+        row_bytes = 16 * word_bytes
+        contents = self.contents()
         out = []
-        for row in range(16):
-            row_out = []
-            for col in range(16):
-                index = 16 * row + col
-                state = self.registers[index].state
-                hex_string = f"{state:02x}" if state is not None else "  "
-                row_out.append(hex_string)
-            out.append(" ".join(row_out))
+        for row in range(0, len(contents), row_bytes):
+            out.append(contents[row:row + row_bytes].hex(" ", word_bytes))
         return "\n".join(out)
@@ -0,0 +1,294 @@
+"""
+A long-lived simulation server, so clients skip building circuits.
+
+    python -m circuit.server /tmp/circuit.sock
+
+The server listens on a Unix socket and keeps built circuits ready: for
+every kind of circuit it serves (see `CIRCUITS`) and every engine asked
+for, one spare Simulator is built in advance (with the compiled engine from
+the start), so opening a session takes no building at all, and the next
+spare is built after the reply has gone out, before the server goes on.
+Every connection may open any number of sessions, which close with it.
+Each circuit keeps its Registers in a RegisterFile of its own, which is
+freed when its session is closed, so the server does not grow with the
+number of sessions it has served.
+
+A client sends one line of JSON per batch: a list of commands (or a single
+command), each an object with an "op" and its arguments. The commands run
+in order, and one line of JSON is sent back as each one finishes, holding
+`"ok": true` and its results, or `"ok": false` and an "error" message, in
+which case the rest of the batch is skipped. A command's "id", if given,
+is copied into its reply.
+
+    {"op": "open", "circuit": "cpu", "engine": "compiled"} -> {"session": 1}
+    {"op": "load", "session": 1, "image": "1a0b...", "address": 0}
+    {"op": "step", "session": 1, "cycles": 1000, "inputs": {...},
+     "until": {"name": "op.out", "value": 240}}   -> {"cycles", "stopped"}
+    {"op": "read", "session": 1, "names": ["pc.out", "x.out"]} -> {"values"}
+    {"op": "memory", "session": 1}                -> {"memory": hex}
+    {"op": "snapshot", "session": 1}              -> {"state": hex}
+    {"op": "restore", "session": 1, "state": hex}
+    {"op": "close", "session": 1}
+
+Names are input or output pins of the circuit, or attribute paths to a
+Wire or Bus inside it, like "pc.out"; floating values read as null. Long
+runs are simulated in slices, letting other sessions run in between.
+`Client` is a small blocking client for scripts and tests.
+"""
+import asyncio
+import json
+import socket
+import sys
+
+from .kernel import Wire, Bus, TRUE, RegisterFile, CircuitError, wires_of
+from .sequential import RAM, Counter8
+from .cpu import CPU
+from .simulator import Simulator
+
+__all__ = [
+    "CIRCUITS",
+    "SimulationServer",
+    "Client",
+    "serve",
+]
+
+
+# the circuits served by default, by name.
+CIRCUITS = {
+    "cpu": CPU,
+    "ram": lambda: RAM(Bus(8), Bus(8), Wire()),
+    "counter": lambda: Counter8(enable=TRUE, zero=Wire()),
+}
+
+
+class Session:
+    def __init__(self, number, component, simulator):
+        self.number = number
+        self.component = component
+        self.simulator = simulator
+
+
+class SimulationServer:
+    """
+    Serves sessions on the circuits built by the callables in `circuits`.
+    `quantum` is the number of clock cycles simulated before letting other
+    sessions run.
+    """
+    def __init__(self, circuits=None, quantum=1000):
+        self.circuits = dict(CIRCUITS if circuits is None else circuits)
+        self.quantum = quantum
+        self.spares = {}
+        self.sessions = 0
+
+    def spare(self, name, engine):
+        """
+        Takes the spare Simulator of a circuit, building one if there is
+        none, and schedules building the next one.
+        """
+        if name not in self.circuits:
+            raise CircuitError(f"unknown circuit {name}.")
+        simulator = self.spares.pop((name, engine), None)
+        if simulator is None:
+            simulator = self.build(name, engine)
+        asyncio.get_running_loop().call_soon(self.warm, name, engine)
+        return simulator
+
+    def warm(self, name, engine="compiled"):
+        if (name, engine) not in self.spares:
+            self.spares[name, engine] = self.build(name, engine)
+
+    def build(self, name, engine):
+        """
+        A Simulator of a newly built circuit. Every circuit has its own
+        RegisterFile, so its Registers' slots are freed with it once its
+        session is closed.
+        """
+        with RegisterFile():
+            return Simulator(self.circuits[name](), engine)
+
+    async def start(self, path):
+        """
+        Builds a spare of every circuit and starts listening on `path`.
+        """
+        for name in self.circuits:
+            self.warm(name)
+        return await asyncio.start_unix_server(self.connection, path=path)
+
+    async def connection(self, reader, writer):
+        sessions = {}
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    batch = json.loads(line)
+                except ValueError as error:
+                    await self.reply(writer, {"ok": False, "error": f"bad JSON: {error}"})
+                    continue
+                if isinstance(batch, dict):
+                    batch = [batch]
+                if not isinstance(batch, list):
+                    await self.reply(writer, {"ok": False, "error": "a batch is a list of commands."})
+                    continue
+                for command in batch:
+                    reply = {}
+                    if isinstance(command, dict) and "id" in command:
+                        reply["id"] = command["id"]
+                    try:
+                        reply.update(await self.execute(sessions, command))
+                        reply["ok"] = True
+                    except (CircuitError, KeyError, TypeError, ValueError) as error:
+                        reply.update(ok=False, error=f"{type(error).__name__}: {error}")
+                    await self.reply(writer, reply)
+                    if not reply["ok"]:
+                        break
+        except ConnectionError:
+            pass
+        finally:
+            for session in sessions.values():
+                session.simulator.close()
+            writer.close()
+
+    async def reply(self, writer, reply):
+        writer.write(json.dumps(reply).encode() + b"\n")
+        await writer.drain()
+
+    async def execute(self, sessions, command):
+        op = command["op"]
+        if op == "open":
+            simulator = self.spare(command["circuit"], command.get("engine", "compiled"))
+            self.sessions += 1
+            sessions[self.sessions] = Session(self.sessions, simulator.component, simulator)
+            return {"session": self.sessions}
+
+        session = sessions.get(command.get("session"))
+        if session is None:
+            raise CircuitError(f"no session {command.get('session')}.")
+        component, simulator = session.component, session.simulator
+        if op == "close":
+            del sessions[session.number]
+            simulator.close()
+            return {}
+        if op == "load":
+            ram = getattr(component, "ram", component)
+            if not isinstance(ram, RAM):
+                raise CircuitError("the circuit has no RAM to load.")
+            ram.load(bytes.fromhex(command["image"]), command.get("address", 0))
+            return {}
+        if op == "step":
+            return await self.step(session, command)
+        if op == "read":
+            return {"values": [self.read(session, name) for name in command["names"]]}
+        if op == "memory":
+            ram = getattr(component, "ram", component)
+            if not isinstance(ram, RAM):
+                raise CircuitError("the circuit has no RAM.")
+            return {"memory": ram.contents().hex()}
+        if op == "snapshot":
+            return {"state": simulator.snapshot().hex()}
+        if op == "restore":
+            simulator.restore(bytes.fromhex(command["state"]))
+            return {}
+        raise CircuitError(f"unknown command {op}.")
+
+    async def step(self, session, command):
+        simulator = session.simulator
+        cycles = command.get("cycles", 1)
+        inputs = command.get("inputs", {})
+        until = command.get("until")
+        watch = None
+        if until is not None:
+            watch = simulator.watch(self.target(session, until["name"]), until["value"], stop=True)
+        try:
+            stopped = None
+            while cycles > 0 and stopped is None:
+                run = min(cycles, self.quantum)
+                stopped = simulator.run(run, **inputs)
+                inputs = {}
+                cycles -= run
+                await asyncio.sleep(0)
+        finally:
+            if watch is not None:
+                simulator.unwatch(watch)
+        return {"cycles": simulator.cycles, "stopped": stopped is not None}
+
+    def target(self, session, name):
+        """
+        The Wire or Bus at an attribute path, like "pc.out".
+        """
+        target = session.component
+        for attribute in name.split("."):
+            target = getattr(target, attribute, None)
+        if not isinstance(target, (Wire, Bus)):
+            raise CircuitError(f"{name} is not a Wire or Bus of the circuit.")
+        return target
+
+    def read(self, session, name):
+        simulator = session.simulator
+        if name in simulator.pins:
+            return simulator.read(name)
+        target = self.target(session, name)
+        if simulator.engine in simulator.NETLIST_ENGINES:
+            nets = simulator.netlist.nets
+            if any(wire not in nets for wire in wires_of([target])):
+                raise CircuitError(f"{name} is not part of the simulated circuit.")
+            nets = [nets[wire] for wire in wires_of([target])]
+            if simulator.engine == "ternary":
+                return simulator.netlist.read_ternary(simulator.hi, simulator.lo, nets)
+            return simulator.netlist.read(simulator.v, nets)
+        value = target.value
+        return int(value) if isinstance(value, bool) else value
+
+
+class Client:
+    """
+    A blocking client for a SimulationServer on the socket at `path`.
+    """
+    def __init__(self, path):
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.connect(path)
+        self.file = self.socket.makefile("rwb")
+
+    def call(self, *commands):
+        """
+        Sends the commands as one batch and returns their replies, raising a
+        CircuitError for the first one which failed.
+        """
+        self.file.write(json.dumps(list(commands)).encode() + b"\n")
+        self.file.flush()
+        replies = []
+        for command in commands:
+            reply = json.loads(self.file.readline())
+            if not reply.pop("ok"):
+                raise CircuitError(reply["error"])
+            replies.append(reply)
+        return replies
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def serve(path, circuits=None):
+    """
+    Runs a SimulationServer on `path` until interrupted.
+    """
+    async def main():
+        server = await SimulationServer(circuits).start(path)
+        async with server:
+            await server.serve_forever()
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1] if len(sys.argv) > 1 else "circuit.sock")
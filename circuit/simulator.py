@@ -0,0 +1,423 @@
+"""
+A uniform driver for clocked simulation with any of the engines:
+
+    sim = Simulator(RAM(Bus(8), Bus(8), Wire()), engine="compiled")
+    sim.step(inp=42, addr=7, write=True)
+    sim.step(inp=0, addr=7, write=False)
+    sim.read("out")  # 42
+
+"object" propagates values through the Wire and Component objects, exactly
+as the tests do by hand, clocking the component with a `Clock` so that
+other circuits are left alone. "behavioral" does the same after switching
+the component to its word-level model (see `circuit.behavioral`).
+"compiled" flattens the component into a Netlist and runs a generated
+straight-line function per clock cycle, keeping Register state in the
+RegisterFile, so the engines can be compared on the same circuit.
+"ternary" is the compiled engine on the dual-rail bitplanes of
+`Netlist.compile_ternary()`: input pins which are not given, or given None,
+float, and floating values propagate as X exactly as in the object kernel,
+so it reads None where the compiled engine reads 0.
+
+`run()` fast-forwards periodic workloads: while the inputs stay the same,
+the next clock cycle depends only on the state of the Registers, so once
+that state repeats, every later cycle repeats too, and whole periods can be
+skipped without simulating them.
+
+Watches call back or stop a run when a Wire or Bus reaches a value:
+
+    sim.watch(cpu.pc.out, 0x40, stop=True)           # a breakpoint
+    sim.watch(cpu.ram.write, "rising", callback=log)  # a watchpoint
+    sim.run(1000)  # returns the Watch which stopped it, if any
+
+Only the watched Wires are read, once per clock cycle, after the cycle has
+been simulated; the engines themselves are untouched.
+"""
+from .kernel import Bus, Register, Clock, CircuitError, WireError, release, wires_of
+from .netlist import Netlist
+from .behavioral import behavioral
+
+__all__ = [
+    "Watch",
+    "Simulator",
+]
+
+
+class Watch:
+    """
+    A Wire or Bus watched by a Simulator. It triggers on the clock cycles
+    where its `condition` becomes true, having been false the cycle before:
+
+    - None: whenever the value changes,
+    - an integer or bool: when the value becomes equal to it,
+    - "rising" or "falling": when a Wire goes high or low,
+    - a function of (previous value, value): when it returns True.
+
+    When it triggers, `callback(simulator, value)` is called, if given, and
+    with `stop` the Simulator's `run()` stops after that cycle. `value` is
+    the value after the last cycle, as an integer (None while floating),
+    and `hits` counts the cycles it triggered on.
+    """
+    EDGES = {"rising": 1, "falling": 0}
+
+    def __init__(self, target, condition=None, callback=None, stop=False):
+        self.target = target
+        if isinstance(condition, str):
+            if condition not in self.EDGES:
+                raise CircuitError(f"unknown watch condition {condition}.")
+            if isinstance(target, Bus):
+                raise CircuitError(f"a {condition} edge needs a single Wire.")
+            condition = self.EDGES[condition]
+        self.condition = condition
+        self.callback = callback
+        self.stop = stop
+        self.value = None
+        self.hits = 0
+
+    def met(self, previous, value):
+        condition = self.condition
+        if condition is None:
+            return value != previous
+        if callable(condition):
+            return condition(previous, value)
+        return value == condition and previous != condition
+
+
+class Simulator:
+    """
+    Drives the input pins of a Component one clock cycle at a time. Input
+    pins which are not given to `step()` keep their previous value (hard
+    wired pins, like TRUE, cannot be given at all).
+
+    With `fast_forward`, `run()` skips the cycles it can predict; `skipped`
+    counts them. Behavioral models may keep state outside the Registers, so
+    the behavioral engine never fast-forwards.
+    """
+    ENGINES = ("object", "compiled", "behavioral", "ternary")
+    NETLIST_ENGINES = ("compiled", "ternary")
+
+    def __init__(self, component, engine="object", fast_forward=True):
+        if engine not in self.ENGINES:
+            raise CircuitError(f"unknown simulation engine {engine}.")
+        self.component = component
+        self.engine = engine
+        self.fast_forward = fast_forward and engine != "behavioral"
+        self.cycles = 0
+        self.skipped = 0
+        self.watches = []
+        # objects whose `sample()` is called after every cycle, like an
+        # Activity monitor.
+        self.monitors = []
+        # whether any Watch triggered on the last cycle, and the first one
+        # with `stop` which did, if any
+        self.triggered = False
+        self.stopped = None
+        self.inputs = {}
+        self.input_pins = component.input_pins()
+        self.pins = dict(component.output_pins())
+        self.pins.update(self.input_pins)
+
+        if engine in self.NETLIST_ENGINES:
+            self.netlist = netlist = Netlist(component)
+            if engine == "ternary":
+                self.cycle = netlist.compile_ternary_cycle()
+                self.hi, self.lo = netlist.ternary_values()
+            else:
+                self.cycle = netlist.compile_cycle()
+                self.v = netlist.values()
+
+            files = { register.file for register in netlist.registers }
+            if len(files) > 1:
+                raise CircuitError("registers belong to more than one RegisterFile.")
+            self.file = files.pop() if files else None
+            indexes = sorted(register.index for register in netlist.registers)
+            if indexes and indexes[-1] - indexes[0] + 1 == len(indexes):
+                self.commit_range = (indexes[0], indexes[-1] + 1)
+                self.indexes = None
+            else:
+                self.commit_range = None
+                self.indexes = indexes
+        else:
+            if engine == "behavioral":
+                behavioral(component)
+            self.clock = Clock(component)
+
+        # the slots of every Register, as runs of consecutive slots, so
+        # that the Registers of other circuits sharing a file are left out.
+        if engine in self.NETLIST_ENGINES:
+            registers = self.netlist.registers
+        else:
+            registers = [
+                primitive for primitive in component.primitives()
+                if isinstance(primitive, Register)
+            ]
+        slots = {}
+        for register in registers:
+            slots.setdefault(register.file, []).append(register.index)
+        self.spans = []
+        for file, indexes in slots.items():
+            indexes.sort()
+            start = stop = indexes[0]
+            for index in indexes:
+                if index != stop:
+                    self.spans.append((file, start, stop))
+                    start = index
+                stop = index + 1
+            self.spans.append((file, start, stop))
+
+    def step(self, **inputs):
+        """
+        Simulates one clock cycle with the given input pin values.
+        """
+        for name in inputs:
+            if name not in self.input_pins:
+                raise CircuitError(f"{name} is not an input pin.")
+            if getattr(self.pins[name], "hard", False):
+                raise CircuitError(f"input pin {name} is hard wired.")
+        self.inputs.update(inputs)
+
+        if self.engine == "compiled":
+            self.step_compiled()
+        elif self.engine == "ternary":
+            self.step_ternary()
+        else:
+            self.step_objects()
+        self.cycles += 1
+        self.stopped = None
+        self.triggered = False
+        if self.watches:
+            self.check()
+        for monitor in self.monitors:
+            monitor.sample()
+
+    def step_objects(self):
+        self.clock.reset()
+        for name in self.inputs:
+            self.pins[name].reset()
+        self.clock.propagate()
+        for name, value in self.inputs.items():
+            self.pins[name].value = value
+
+    def step_compiled(self):
+        netlist = self.netlist
+        v = self.v
+        file = self.file
+        self.commit()
+
+        for name, value in self.inputs.items():
+            for net in reversed(netlist.inputs[name]):
+                v[net] = value & 1
+                value >>= 1
+
+        if file is None:
+            self.cycle(v, None, None)
+        else:
+            self.cycle(v, file.state, file.next_state)
+
+    def step_ternary(self):
+        netlist = self.netlist
+        hi, lo = self.hi, self.lo
+        self.commit()
+
+        for name, value in self.inputs.items():
+            for net in reversed(netlist.inputs[name]):
+                if value is None:
+                    hi[net] = lo[net] = 0
+                else:
+                    hi[net] = value & 1
+                    lo[net] = hi[net] ^ 1
+                    value >>= 1
+        self.cycle_ternary()
+
+    def cycle_ternary(self):
+        file = self.file
+        if file is None:
+            contention = self.cycle(self.hi, self.lo, None, None)
+        else:
+            contention = self.cycle(self.hi, self.lo, file.state, file.next_state)
+        if contention:
+            raise WireError("bus contention: two drivers enabled on one wire.")
+
+    def commit(self):
+        """
+        Clocks the Registers of the compiled engines: their next state, from
+        the last cycle, becomes their state.
+        """
+        file = self.file
+        if file is not None:
+            if self.commit_range is not None:
+                file.commit(*self.commit_range)
+            elif file.journal is not None:
+                for i in self.indexes:
+                    file.commit(i, i + 1)
+            else:
+                state, next_state = file.state, file.next_state
+                for i in self.indexes:
+                    state[i] = next_state[i]
+
+    def run(self, cycles, **inputs):
+        """
+        Simulates `cycles` clock cycles with the same input pin values.
+
+        With `fast_forward`, the Register state after each cycle is compared
+        with one saved earlier, which is replaced at every power of two
+        cycles (Brent's cycle detection), so only one state is ever kept.
+        When they match, the circuit repeats with a period of the cycles
+        since, and all the remaining whole periods are skipped at once.
+
+        Returns the Watch with `stop` which stopped the run early, if any.
+        """
+        if cycles <= 0:
+            return None
+        self.step(**inputs)
+        if self.stopped:
+            return self.stopped
+        remaining = cycles - 1
+        # monitors have to see every cycle, so nothing can be skipped.
+        if self.fast_forward and not self.monitors:
+            saved = self.snapshot()
+            power = period = 1
+            # cycles since a Watch last triggered: a period may only be
+            # skipped if none triggered in it, since they would all again.
+            quiet = 0
+            while remaining:
+                self.step()
+                remaining -= 1
+                if self.stopped:
+                    return self.stopped
+                quiet = 0 if self.triggered else quiet + 1
+                state = self.snapshot()
+                if state == saved and quiet >= period:
+                    skip = remaining - remaining % period
+                    self.cycles += skip
+                    self.skipped += skip
+                    remaining -= skip
+                    break
+                if period == power:
+                    saved = state
+                    power *= 2
+                    period = 0
+                period += 1
+        for i in range(remaining):
+            self.step()
+            if self.stopped:
+                return self.stopped
+        return None
+
+    def watch(self, target, condition=None, callback=None, stop=False):
+        """
+        Watches a Wire or Bus inside the simulated Component; see `Watch`.
+        """
+        watch = Watch(target, condition, callback, stop)
+        if self.engine in self.NETLIST_ENGINES:
+            nets = self.netlist.nets
+            missing = [wire for wire in wires_of([target]) if wire not in nets]
+            if missing:
+                raise CircuitError("watched wire is not part of the simulated circuit.")
+            watch.nets = [nets[wire] for wire in wires_of([target])]
+        watch.value = self.value(watch)
+        self.watches.append(watch)
+        return watch
+
+    def unwatch(self, watch):
+        self.watches.remove(watch)
+
+    def value(self, watch):
+        if self.engine == "compiled":
+            return self.netlist.read(self.v, watch.nets)
+        if self.engine == "ternary":
+            return self.netlist.read_ternary(self.hi, self.lo, watch.nets)
+        value = watch.target.value
+        if isinstance(value, bool):
+            return int(value)
+        return value
+
+    def check(self):
+        """
+        Triggers the watches whose condition has just become true.
+        """
+        for watch in self.watches:
+            previous = watch.value
+            watch.value = value = self.value(watch)
+            if watch.met(previous, value):
+                self.triggered = True
+                watch.hits += 1
+                if watch.callback is not None:
+                    watch.callback(self, value)
+                if watch.stop and self.stopped is None:
+                    self.stopped = watch
+
+    def snapshot(self):
+        """
+        The current and next state of every Register, as bytes.
+        """
+        return b"".join(
+            file.state[start:stop] + file.next_state[start:stop]
+            for file, start, stop in self.spans
+        )
+
+    def restore(self, state):
+        """
+        Loads a `snapshot()` back into the Registers, and propagates their
+        state without clocking them, so the circuit reads as it did when
+        the snapshot was taken (with the current input pin values).
+        """
+        if len(state) != len(self.snapshot()):
+            raise CircuitError("the state is not a snapshot of this circuit.")
+        pending = []
+        position = 0
+        for file, start, stop in self.spans:
+            size = stop - start
+            current = state[position:position + size]
+            if file.journal is not None:
+                file.record(start, current)
+            file.state[start:stop] = current
+            # the Registers hold their state through the propagation
+            file.next_state[start:stop] = current
+            pending.append((file, start, stop, state[position + size:position + 2 * size]))
+            position += 2 * size
+
+        if self.engine == "compiled":
+            file = self.file
+            if file is None:
+                self.cycle(self.v, None, None)
+            else:
+                self.cycle(self.v, file.state, file.next_state)
+        elif self.engine == "ternary":
+            self.cycle_ternary()
+        else:
+            self.step_objects()
+        for file, start, stop, next_state in pending:
+            file.next_state[start:stop] = next_state
+        # a restore is not a change for the watches to trigger on
+        for watch in self.watches:
+            watch.value = self.value(watch)
+
+    def close(self):
+        """
+        Releases the simulated Component (see `release()`); it can't be
+        simulated afterwards.
+        """
+        release(self.component)
+
+    def read(self, name):
+        """
+        The value of an input or output pin after the last clock cycle, as
+        an unsigned integer, or None if it is floating. The compiled engine
+        is two-valued and reads floating wires as 0; the ternary engine
+        reads them as None, like the object engine.
+        """
+        if self.engine in self.NETLIST_ENGINES:
+            nets = self.netlist.outputs.get(name) or self.netlist.inputs.get(name)
+            if nets is None:
+                raise CircuitError(f"{name} is not a pin.")
+            if self.engine == "ternary":
+                return self.netlist.read_ternary(self.hi, self.lo, nets)
+            return self.netlist.read(self.v, nets)
+
+        pin = self.pins.get(name)
+        if pin is None:
+            raise CircuitError(f"{name} is not a pin.")
+        value = pin.value
+        if isinstance(value, bool):
+            return int(value)
+        return value
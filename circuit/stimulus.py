@@ -0,0 +1,252 @@
+"""
+Recording the input pins of a simulated run, and replaying them.
+
+    sim = Simulator(ram, engine="object")
+    recorder = Recorder(sim)
+    ...                                 # drive sim.step() / sim.run() as usual
+    recorder.stimulus.save("run.stim")
+
+    sim = Simulator(fresh_ram, engine="compiled")
+    replay(sim, Stimulus.load("run.stim"))
+
+A `Recorder` is a Simulator monitor: after every clock cycle it packs the
+value of every input pin into one fixed-size frame, and consecutive equal
+frames are stored once with a repeat count, so a long run with steady
+inputs costs a few bytes. The log names the pins, not nets, so it replays
+on any engine, and on a freshly built circuit the replay reaches the same
+state as the recorded run.
+
+`replay()` feeds the frames to the engine directly: the compiled engine
+only writes the nets whose value changed since the previous frame, and
+watches, monitors and the checks of `Simulator.step()` are all skipped, so
+replaying a log measures the engine alone.
+
+The format is the magic bytes b"STIM", a version byte and the number of
+pins (16 bits, little-endian), then every pin's name length (a byte), width
+in bits (16 bits) and name in UTF-8, then the records to the end: a repeat
+count (unsigned LEB128) and a frame. A frame is a little-endian integer
+holding, for every pin in order, one bit which is set once the pin has been
+driven, followed by its value, least significant bit first.
+"""
+from .kernel import CircuitError, wires_of
+
+__all__ = [
+    "Stimulus",
+    "Recorder",
+    "replay",
+]
+
+
+class Stimulus:
+    """
+    The input pin values of a run, one frame per clock cycle. `pins` is a
+    list of (name, width) pairs and `records` a list of [repeat count,
+    frame] pairs.
+    """
+    MAGIC = b"STIM"
+    VERSION = 1
+
+    def __init__(self, pins):
+        self.pins = list(pins)
+        self.records = []
+        self.offsets = []
+        offset = 0
+        for name, width in self.pins:
+            self.offsets.append(offset)
+            offset += 1 + width
+        self.frame_bytes = (offset + 7) // 8
+
+    @property
+    def cycles(self):
+        return sum(count for count, frame in self.records)
+
+    def append(self, frame, count=1):
+        if self.records and self.records[-1][1] == frame:
+            self.records[-1][0] += count
+        else:
+            self.records.append([count, frame])
+
+    def encode(self, inputs):
+        """
+        The frame for a dict of input pin values, as `Simulator.inputs`.
+        """
+        frame = 0
+        for (name, width), offset in zip(self.pins, self.offsets):
+            value = inputs.get(name)
+            if value is not None:
+                frame |= ((int(value) & ((1 << width) - 1)) << 1 | 1) << offset
+        return frame
+
+    def decode(self, frame):
+        """
+        The dict of the pins driven in a frame, and their values.
+        """
+        inputs = {}
+        for (name, width), offset in zip(self.pins, self.offsets):
+            field = frame >> offset
+            if field & 1:
+                value = field >> 1 & ((1 << width) - 1)
+                # a single Wire only takes True or False.
+                inputs[name] = bool(value) if width == 1 else value
+        return inputs
+
+    def inputs(self):
+        """
+        Yields the dict of input pin values of every clock cycle.
+        """
+        for count, frame in self.records:
+            inputs = self.decode(frame)
+            for i in range(count):
+                yield inputs
+
+    def to_bytes(self):
+        data = bytearray(self.MAGIC)
+        data.append(self.VERSION)
+        data += len(self.pins).to_bytes(2, "little")
+        for name, width in self.pins:
+            encoded = name.encode()
+            data.append(len(encoded))
+            data += width.to_bytes(2, "little")
+            data += encoded
+        for count, frame in self.records:
+            while count >= 0x80:
+                data.append(count & 0x7f | 0x80)
+                count >>= 7
+            data.append(count)
+            data += frame.to_bytes(self.frame_bytes, "little")
+        return bytes(data)
+
+    @classmethod
+    def from_bytes(cls, data):
+        data = memoryview(data)
+        if bytes(data[:4]) != cls.MAGIC or len(data) < 7:
+            raise CircuitError("not a stimulus log.")
+        if data[4] != cls.VERSION:
+            raise CircuitError(f"unsupported stimulus log version {data[4]}.")
+        count = int.from_bytes(data[5:7], "little")
+        position = 7
+        pins = []
+        try:
+            for i in range(count):
+                length = data[position]
+                width = int.from_bytes(data[position + 1:position + 3], "little")
+                position += 3
+                pins.append((bytes(data[position:position + length]).decode(), width))
+                position += length
+
+            stimulus = cls(pins)
+            size = stimulus.frame_bytes
+            while position < len(data):
+                count = shift = 0
+                while True:
+                    byte = data[position]
+                    position += 1
+                    count |= (byte & 0x7f) << shift
+                    shift += 7
+                    if byte < 0x80:
+                        break
+                if position + size > len(data):
+                    raise IndexError
+                frame = int.from_bytes(data[position:position + size], "little")
+                position += size
+                stimulus.records.append([count, frame])
+        except IndexError:
+            raise CircuitError("truncated stimulus log.") from None
+        return stimulus
+
+    def save(self, path):
+        with open(path, "wb") as file:
+            file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as file:
+            return cls.from_bytes(file.read())
+
+
+def input_widths(simulator):
+    """
+    The (name, width) of every input pin the Simulator can drive.
+    """
+    return [
+        (name, len(list(wires_of([pin]))))
+        for name, pin in simulator.input_pins.items()
+        if not getattr(pin, "hard", False)
+    ]
+
+
+class Recorder:
+    """
+    Records the input pins of every clock cycle a Simulator runs from now
+    on into `stimulus`.
+    """
+    def __init__(self, simulator):
+        self.simulator = simulator
+        self.stimulus = Stimulus(input_widths(simulator))
+        simulator.monitors.append(self)
+
+    def detach(self):
+        """
+        Stops recording; the stimulus so far is kept.
+        """
+        self.simulator.monitors.remove(self)
+
+    def sample(self):
+        self.stimulus.append(self.stimulus.encode(self.simulator.inputs))
+
+
+def replay(simulator, stimulus):
+    """
+    Simulates the clock cycles of a Stimulus with the Simulator's engine,
+    skipping its watches and monitors, and returns the number of cycles.
+    Afterwards the Simulator carries on from the last frame's inputs.
+    """
+    if stimulus.pins != input_widths(simulator):
+        raise CircuitError("the stimulus was recorded on different input pins.")
+
+    inputs = {}
+    if simulator.engine == "compiled":
+        # the net of every value bit in a frame.
+        targets = {}
+        for (name, width), offset in zip(stimulus.pins, stimulus.offsets):
+            for bit, net in enumerate(reversed(simulator.netlist.inputs[name])):
+                targets[offset + 1 + bit] = net
+        v = simulator.v
+        commit = simulator.commit
+        cycle = simulator.cycle
+        file = simulator.file
+        state, next_state = (None, None) if file is None else (file.state, file.next_state)
+        previous = None
+        for count, frame in stimulus.records:
+            if previous is None:
+                for position, net in targets.items():
+                    v[net] = frame >> position & 1
+            else:
+                changed = frame ^ previous
+                while changed:
+                    low = changed & -changed
+                    position = low.bit_length() - 1
+                    net = targets.get(position)
+                    if net is not None:
+                        v[net] = frame >> position & 1
+                    changed ^= low
+            previous = frame
+            for i in range(count):
+                commit()
+                cycle(v, state, next_state)
+        if stimulus.records:
+            inputs = stimulus.decode(previous)
+    else:
+        if simulator.engine == "ternary":
+            step = simulator.step_ternary
+        else:
+            step = simulator.step_objects
+        for count, frame in stimulus.records:
+            inputs = simulator.inputs = stimulus.decode(frame)
+            for i in range(count):
+                step()
+
+    simulator.inputs = inputs
+    cycles = stimulus.cycles
+    simulator.cycles += cycles
+    return cycles
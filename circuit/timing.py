@@ -0,0 +1,214 @@
+"""
+Event-driven simulation with gate delays.
+
+    sim = TimingSimulator(Add8(Bus(8), Bus(8), Wire()))
+    sim.step(a=0xff, b=0x00, cin=False)
+    sim.step(b=0x01)
+    sim.settle            # when the last net changed in that cycle
+    sim.settled("out")    # when `out` last changed
+    sim.glitches          # pulses which came and went in the cycles so far
+
+Every primitive has a propagation delay, in whole units of time (by default
+one per NAND, TriState and ROM), and every change of a net is an event at
+the time it happens. When a net changes, the gates reading it are evaluated
+once its time step is over, and any output whose value differs from the
+one it is heading for is scheduled to change after the gate's delay
+(transport delay: pulses shorter than a gate delay get through too). So a
+cycle shows the real order of changes, including the glitches of unequal
+paths, and the time the last one happens is how long the cycle takes to
+settle.
+
+Events wait on a timing wheel: a ring of buckets, one per unit of time,
+longer than the largest delay, so scheduling and popping an event are a
+list append and a walk over the bucket, however many events are pending.
+
+A clock cycle starts at time 0 with the Registers driving their new state
+and the input pins their new values, and ends once no event is left, when
+the Registers capture their next state. The longest cycle so far, in
+`critical`, is the shortest clock period the run would have worked with.
+Everything else is the compiled engine's (a TimingSimulator is a Simulator
+whose cycle function is replaced), so the values, watches, monitors and
+stimulus replay all work the same, only slower.
+"""
+from .kernel import NAND, TriState, ROM, CircuitError, wires_of
+from .simulator import Simulator
+
+__all__ = [
+    "TimingSimulator",
+]
+
+
+class TimingSimulator(Simulator):
+    """
+    A compiled Simulator with gate delays. `delays` maps a primitive class,
+    or a single primitive, to its delay, overriding `DELAYS`.
+
+    After every cycle, `settle` is the time of its last event, `events`
+    counts the net changes in it and `arrival` maps every net which changed
+    to the time of its last change. `critical` is the largest `settle` so
+    far, and `glitches` counts the pulses so far: a net which changed `k`
+    times in one cycle had `k // 2` pulses. The first cycle, which settles
+    the whole circuit from power on, counts towards neither.
+    """
+    DELAYS = {NAND: 1, TriState: 1, ROM: 1}
+
+    # kinds of cell
+    GATE, RESOLVED, LOOKUP = range(3)
+
+    def __init__(self, component, delays=None, fast_forward=False):
+        super().__init__(component, "compiled", fast_forward)
+        delays = {**self.DELAYS, **(delays or {})}
+        netlist = self.netlist
+
+        # the cells which compute nets: a NAND computes its output, all the
+        # TriStates on a resolved net compute it together, and a ROM its
+        # word. Each is (kind, input nets, output nets, delay, contents).
+        self.cells = []
+        resolved = {}
+        for i, (gate, nets) in enumerate(zip(netlist.gates, netlist.table)):
+            delay = delays.get(gate, delays.get(type(gate)))
+            if not isinstance(delay, int) or delay < 1:
+                raise CircuitError(f"delay of {gate} must be a positive integer, not {delay}.")
+            if i in netlist.roms:
+                addr, _, out = nets
+                self.cells.append((self.LOOKUP, addr, out, delay, gate.contents))
+            elif i in netlist.tristates:
+                inp, enable, out = nets
+                cell = resolved.get(out)
+                if cell is None:
+                    resolved[out] = cell = len(self.cells)
+                    self.cells.append((self.RESOLVED, [], (out,), delay, None))
+                kind, inputs, outputs, previous, _ = self.cells[cell]
+                inputs += [inp, enable]
+                self.cells[cell] = (kind, inputs, outputs, max(delay, previous), None)
+            else:
+                a, b, out = nets
+                self.cells.append((self.GATE, (a, b), (out,), delay, None))
+
+        # the cells reading each net
+        self.fanout = [[] for net in range(len(netlist))]
+        for c, (kind, inputs, outputs, delay, contents) in enumerate(self.cells):
+            for net in set(inputs):
+                self.fanout[net].append(c)
+
+        longest = max((cell[3] for cell in self.cells), default=1)
+        self.wheel = [[] for i in range(1 << longest.bit_length())]
+        self.input_nets = [net for nets in netlist.inputs.values() for net in nets]
+        self.driven = list(self.v)
+        self.powered = False
+
+        self.settle = 0
+        self.critical = 0
+        self.events = 0
+        self.glitches = 0
+        self.arrival = {}
+        self.cycle = self.timed_cycle
+
+    def timed_cycle(self, v, state, next_state):
+        netlist = self.netlist
+        cells = self.cells
+        fanout = self.fanout
+        wheel = self.wheel
+        mask = len(wheel) - 1
+        # the value every net will have once its pending events are done
+        driven = self.driven
+        GATE, RESOLVED = self.GATE, self.RESOLVED
+        toggles = {}
+
+        # time 0: the Registers and input pins change at once. The first
+        # cycle evaluates every cell, to settle the circuit from power on.
+        dirty = set()
+        power_on = not self.powered
+        if power_on:
+            self.powered = True
+            dirty.update(range(len(cells)))
+        for register, (inp, enable, out) in zip(netlist.registers, netlist.register_nets):
+            value = state[register.index]
+            if v[out] != value:
+                v[out] = driven[out] = value
+                toggles[out] = 1
+                dirty.update(fanout[out])
+        for net in self.input_nets:
+            if driven[net] != v[net]:
+                driven[net] = v[net]
+                toggles[net] = 1
+                dirty.update(fanout[net])
+
+        time = 0
+        settle = 0
+        arrival = {net: 0 for net in toggles}
+        pending = 0
+        while True:
+            for c in dirty:
+                kind, inputs, outputs, delay, contents = cells[c]
+                if kind == GATE:
+                    values = (1 ^ (v[inputs[0]] & v[inputs[1]]),)
+                elif kind == RESOLVED:
+                    value = 0
+                    for k in range(0, len(inputs), 2):
+                        value |= v[inputs[k]] & v[inputs[k + 1]]
+                    values = (value,)
+                else:
+                    address = 0
+                    for net in inputs:
+                        address = address << 1 | v[net]
+                    word = contents[address]
+                    width = len(outputs)
+                    values = [word >> (width - 1 - k) & 1 for k in range(width)]
+                bucket = wheel[(time + delay) & mask]
+                for net, value in zip(outputs, values):
+                    if driven[net] != value:
+                        driven[net] = value
+                        bucket.append((net, value))
+                        pending += 1
+            if not pending:
+                break
+
+            time += 1
+            bucket = wheel[time & mask]
+            while not bucket:
+                time += 1
+                bucket = wheel[time & mask]
+            wheel[time & mask] = []
+            pending -= len(bucket)
+            dirty = set()
+            for net, value in bucket:
+                if v[net] != value:
+                    v[net] = value
+                    toggles[net] = toggles.get(net, 0) + 1
+                    arrival[net] = settle = time
+                    dirty.update(fanout[net])
+
+        for register, (inp, enable, out) in zip(netlist.registers, netlist.register_nets):
+            i = register.index
+            next_state[i] = v[inp] if v[enable] else state[i]
+
+        self.settle = settle
+        self.events = sum(toggles.values())
+        if not power_on:
+            self.critical = max(self.critical, settle)
+            self.glitches += sum(count // 2 for count in toggles.values())
+        self.arrival = arrival
+        return v
+
+    def settled(self, target):
+        """
+        The time in the last cycle when a pin, Wire or Bus last changed, or
+        0 if it did not.
+        """
+        if isinstance(target, str):
+            nets = self.netlist.outputs.get(target) or self.netlist.inputs.get(target)
+            if nets is None:
+                raise CircuitError(f"{target} is not a pin.")
+        else:
+            nets = [self.netlist.nets[wire] for wire in wires_of([target])]
+        return max((self.arrival.get(net, 0) for net in nets), default=0)
+
+    def max_frequency(self, delay):
+        """
+        The fastest clock, in hertz, which the cycles so far would have
+        settled in, when a unit of time is `delay` seconds.
+        """
+        if not self.critical:
+            return float("inf")
+        return 1 / (self.critical * delay)
@@ -0,0 +1,207 @@
+"""
+Equivalence checking between two implementations of a Component.
+
+`equivalent(Add8, FasterAdd8, pins={"a": 8, "b": 8, "cin": 1})` builds
+both components with the same input pins and compares their outputs over
+the whole input space when it is small enough, or over random batches of
+inputs when it is not. Both circuits are simulated with the bit-parallel
+Netlist evaluator, so each batch covers thousands of input patterns in one
+pass. Any mismatch is returned as a counterexample.
+
+With `method="bdd"`, the outputs are instead compared symbolically (see
+`circuit.bdd`), which proves equivalence however large the input space is,
+as long as the BDDs stay reasonably small.
+
+Registers hold their initial state, so this checks the combinational
+behavior of the two components.
+"""
+import random
+
+from .kernel import Wire, Bus, Component, TRUE, FALSE, CircuitError
+from .netlist import Netlist
+from .bdd import Symbolic
+
+__all__ = [
+    "Verification",
+    "equivalent",
+]
+
+
+class Verification:
+    """
+    The outcome of an equivalence check. It is truthy when no mismatch
+    was found. `exhaustive` tells whether every input pattern was checked,
+    in which case the two components are proven equivalent.
+
+    On a mismatch, `counterexample` maps each input pin to its value, and
+    `outputs` is a pair of dicts with the output pin values of each side.
+    """
+    def __init__(self, patterns, exhaustive, counterexample=None, outputs=None):
+        self.patterns = patterns
+        self.exhaustive = exhaustive
+        self.counterexample = counterexample
+        self.outputs = outputs
+
+    def __bool__(self):
+        return self.counterexample is None
+
+    def __repr__(self):
+        if self.counterexample is not None:
+            return f"<Verification counterexample={self.counterexample} outputs={self.outputs}>"
+        how = "exhaustive" if self.exhaustive else "random"
+        return f"<Verification equivalent ({how}, {self.patterns} patterns)>"
+
+
+def build(component, pins):
+    """
+    Instantiates a Component class with a fresh Wire or Bus for each input
+    pin, given as a dict of pin names and widths; a width of 1 is a Wire.
+    Instances are returned unchanged.
+    """
+    if isinstance(component, Component):
+        return component
+
+    # these copies are never simulated through the rails, so keep them off
+    # the TRUE/FALSE fanout of any circuit which is.
+    true_fanout = len(TRUE.downstream_components)
+    false_fanout = len(FALSE.downstream_components)
+    built = component(**{
+        name: Wire() if width == 1 else Bus(width)
+        for name, width in pins.items()
+    })
+    del TRUE.downstream_components[true_fanout:]
+    del FALSE.downstream_components[false_fanout:]
+    return built
+
+
+def equivalent(
+    a,
+    b,
+    pins=None,
+    outputs=None,
+    exhaustive_limit=20,
+    batch=4096,
+    batches=64,
+    seed=None,
+    method="simulate",
+):
+    """
+    Checks that Components `a` and `b` (classes, or already built
+    instances) compute the same outputs for the same inputs.
+
+    `pins` maps input pin names to widths and is needed to build classes.
+    `outputs` lists the output pins to compare, by default every output of
+    `a`. If there are at most `exhaustive_limit` input bits, every pattern
+    is checked; otherwise `batches` random batches of `batch` patterns are.
+    With `method="bdd"`, every pattern is checked symbolically instead.
+    """
+    if pins is None and not (isinstance(a, Component) and isinstance(b, Component)):
+        raise CircuitError("pins must be given to build a Component class.")
+    if method not in ("simulate", "bdd"):
+        raise CircuitError(f"unknown equivalence checking method {method}.")
+
+    components = [build(side, pins) for side in (a, b)]
+    netlists = [Netlist(component) for component in components]
+    left, right = netlists
+
+    # pins are matched by name, so they may be declared in any order.
+    names = list(left.inputs)
+    widths = [{name: len(nets) for name, nets in netlist.inputs.items()} for netlist in netlists]
+    if widths[0] != widths[1]:
+        raise CircuitError("both components must have the same input pins.")
+
+    if outputs is None:
+        outputs = list(left.outputs)
+    for name in outputs:
+        if name not in right.outputs or len(right.outputs[name]) != len(left.outputs[name]):
+            raise CircuitError(f"output pin {name} differs between the two components.")
+
+    if method == "bdd":
+        return prove(components, outputs)
+
+    evaluators = [netlist.compile() for netlist in netlists]
+
+    # global input bit number -> (pin name, bit position from the LSB)
+    bits = [
+        (name, k)
+        for name in names
+        for k in range(len(left.inputs[name]))
+    ]
+
+    exhaustive = len(bits) <= exhaustive_limit
+    if exhaustive:
+        total = 1 << len(bits)
+        batch = 1 << (min(batch, total).bit_length() - 1)
+        rounds = (total + batch - 1) // batch
+    else:
+        rounds = batches
+        rng = random.Random(seed)
+
+    mask = (1 << batch) - 1
+
+    # in exhaustive mode, pattern number `p = base + lane` drives input bit
+    # `j` with bit `j` of `p`; the low bits cycle within every batch.
+    cycling = []
+    for j in range(batch.bit_length() - 1):
+        period = 1 << j
+        unit = ((1 << period) - 1) << period
+        cycling.append(sum(unit << (2 * period * i) for i in range(batch // (2 * period))))
+
+    patterns = 0
+    for round_ in range(rounds):
+        if exhaustive:
+            base = round_ * batch
+            lanes = [
+                cycling[j] if j < len(cycling) else (mask if (base >> j) & 1 else 0)
+                for j in range(len(bits))
+            ]
+        else:
+            lanes = [rng.getrandbits(batch) for j in range(len(bits))]
+
+        values = []
+        for netlist, evaluate in zip(netlists, evaluators):
+            v = netlist.values(mask)
+            for j, (name, k) in enumerate(bits):
+                v[netlist.inputs[name][-1 - k]] = lanes[j]
+            values.append(evaluate(v, mask))
+
+        difference = 0
+        for name in outputs:
+            for net_a, net_b in zip(left.outputs[name], right.outputs[name]):
+                difference |= values[0][net_a] ^ values[1][net_b]
+        patterns += batch
+
+        if difference:
+            lane = (difference & -difference).bit_length() - 1
+            counterexample = dict.fromkeys(names, 0)
+            for j, (name, k) in enumerate(bits):
+                counterexample[name] |= ((lanes[j] >> lane) & 1) << k
+            mismatch = tuple(
+                {
+                    name: netlist.read(v, netlist.outputs[name], lane)
+                    for name in outputs
+                }
+                for netlist, v in zip(netlists, values)
+            )
+            return Verification(patterns, exhaustive, counterexample, mismatch)
+
+    return Verification(patterns, exhaustive)
+
+
+def prove(components, outputs):
+    """
+    Compares the outputs of two built components with BDDs.
+    """
+    left = Symbolic(components[0])
+    right = Symbolic(components[1], share=left)
+    patterns = 1 << sum(len(bits) for bits in left.inputs.values())
+
+    counterexample = left.equivalent(right, outputs)
+    if counterexample is None:
+        return Verification(patterns, True)
+
+    mismatch = tuple(
+        {name: side.evaluate(**counterexample)[name] for name in outputs}
+        for side in (left, right)
+    )
+    return Verification(patterns, True, counterexample, mismatch)
@@ -0,0 +1,53 @@
+import unittest
+from circuit import Wire, Bus, TRUE, reset_globals
+from circuit.sequential import Counter8
+from circuit.simulator import Simulator
+from circuit.activity import Activity
+
+
+class ActivityTest(unittest.TestCase):
+    def setUp(self):
+        reset_globals()
+
+    def run_counter(self, engine, cycles=64):
+        counter = Counter8(TRUE, Wire())
+        sim = Simulator(counter, engine)
+        activity = Activity(sim)
+        sim.run(cycles, zero=False)
+        return counter, sim, activity
+
+    def test_counter(self):
+        counter, sim, activity = self.run_counter("compiled")
+        self.assertEqual(activity.cycles, 64)
+        # monitored runs are never fast-forwarded.
+        self.assertEqual(sim.skipped, 0)
+        # the counter has counted from 0 to 63: the LSB toggled on every
+        # cycle but the first, the next bit on every other cycle...
+        self.assertEqual(sim.read("out"), 63)
+        for bit in range(6):
+            self.assertEqual(activity.toggles(counter.out[7 - bit]), 63 >> bit)
+        self.assertEqual(activity.toggles(counter.out[0]), 0)
+
+        name, toggles = activity.hot_nets(1)[0]
+        self.assertGreaterEqual(toggles, 63)
+        self.assertTrue(name.startswith("Counter8/"))
+        components = activity.components()
+        self.assertEqual(components[counter], sum(activity.counts()))
+        self.assertEqual(activity.classes()[Counter8], components[counter])
+
+    def test_engines(self):
+        object_counts = {}
+        for engine in ("object", "compiled"):
+            reset_globals()
+            counter, sim, activity = self.run_counter(engine, cycles=40)
+            object_counts[engine] = activity.toggles(counter.out)
+            self.assertGreater(activity.power(1e6), 0)
+            self.assertIn("hottest nets", activity.report())
+        self.assertEqual(object_counts["object"], object_counts["compiled"])
+
+    def test_detach(self):
+        counter, sim, activity = self.run_counter("compiled", cycles=10)
+        activity.detach()
+        sim.run(10)
+        self.assertEqual(activity.cycles, 10)
+        self.assertEqual(activity.toggles(counter.out[7]), 9)
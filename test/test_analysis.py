@@ -0,0 +1,121 @@
+import unittest
+from circuit import Wire, Bus, Component, CircuitError, NAND, TriState, Elaboration, reset_globals
+from circuit.logic_gates import NOT, XOR
+from circuit.combinational import ALU, KoggeStoneAdd8
+from circuit.sequential import RegisterN, Register8, Counter8, RAM
+from circuit.netlist import Netlist
+from circuit.analysis import analyze, MEMO
+
+
+def flat_depth(component):
+    """
+    The depth computed over the flattened Netlist, for comparison.
+    """
+    netlist = Netlist(component)
+    level = [-1] * len(netlist)
+    for nets in netlist.inputs.values():
+        for net in nets:
+            level[net] = 0
+    for inp, enable, out in netlist.register_nets:
+        level[out] = 0
+    for a, b, out in netlist.table:
+        deepest = max(level[a], level[b])
+        if deepest >= 0:
+            level[out] = max(level[out], deepest + 1)
+    sinks = [net for nets in netlist.outputs.values() for net in nets]
+    sinks += [net for inp, enable, out in netlist.register_nets for net in (inp, enable)]
+    return max([level[net] for net in sinks] + [0])
+
+
+class AnalysisTest(unittest.TestCase):
+    def setUp(self):
+        reset_globals()
+
+    def test_xor(self):
+        analysis = analyze(XOR(Wire(), Wire()))
+        self.assertEqual(analysis.nands, 6)
+        self.assertEqual(analysis.registers, 0)
+        self.assertEqual(analysis.depth, 4)
+        self.assertEqual(len(analysis.critical_path), 4)
+
+    def test_flat_depth(self):
+        components = [
+            ALU(Bus(8), Bus(8), Bus(8), Wire()),
+            KoggeStoneAdd8(Bus(8), Bus(8), Wire()),
+            Counter8(Wire(), Wire()),
+            Register8(Bus(8), Wire()),
+            RAM(Bus(4), Bus(3), Wire(), addr_bits=3, word_bits=4),
+        ]
+        for component in components:
+            analysis = analyze(component)
+            netlist = Netlist(component)
+            self.assertEqual(analysis.depth, flat_depth(component))
+            self.assertEqual(
+                analysis.nands,
+                sum(isinstance(gate, NAND) for gate in netlist.gates),
+            )
+            self.assertEqual(
+                analysis.tristates,
+                sum(isinstance(gate, TriState) for gate in netlist.gates),
+            )
+            self.assertEqual(analysis.registers, len(netlist.registers))
+
+            # the critical path is a chain of connected gates.
+            path = analysis.critical_path
+            self.assertEqual(len(path), analysis.depth)
+            for gate, after in zip(path, path[1:]):
+                self.assertIn(gate.out, after.inputs)
+
+    def test_memoized(self):
+        ram = RAM(Bus(8), Bus(8), Wire())
+        analysis = analyze(ram)
+        self.assertEqual(analysis.registers, 2048)
+        self.assertEqual(analysis.classes[RegisterN][0], 256)
+        self.assertEqual(analysis.classes[RegisterN][3], 2048)
+        # the templated words of memory were only looked inside once.
+        self.assertLess(len(analysis.instances), len(list(ram.descendants())) // 2)
+        self.assertIs(
+            analysis.metrics(ram.registers[0]),
+            analysis.metrics(ram.registers[1]),
+        )
+
+        # the memo follows the template cache: bounded by it, and cleared by
+        # reset_globals().
+        self.assertIn(ram.registers[0].template_key, MEMO)
+        self.assertLessEqual(set(MEMO), set(Elaboration.templates))
+        limit = Elaboration.template_limit
+        Elaboration.template_limit = 1
+        try:
+            Register8(Bus(8), Wire())
+            self.assertLessEqual(set(MEMO), set(Elaboration.templates))
+            analyze(ram)
+            self.assertLessEqual(set(MEMO), set(Elaboration.templates))
+        finally:
+            Elaboration.template_limit = limit
+        reset_globals()
+        self.assertEqual(MEMO, {})
+
+    def test_fanout(self):
+        class Fan(Component):
+            def __init__(self, a):
+                super().__init__()
+                self.a = self.input(a)
+                b = NOT(self.a).out
+                self.out = self.output(Bus([NOT(b).out, NOT(b).out, NOT(self.a).out]))
+
+        analysis = analyze(Fan(Wire()))
+        # `a` and `b` each feed both inputs of two NANDs.
+        self.assertEqual(analysis.fanout, {4: 2, 0: 3})
+        self.assertEqual(analysis.depth, 2)
+        self.assertIn("critical path (2 gates)", analysis.report())
+
+    def test_loop(self):
+        class Loop(Component):
+            def __init__(self, a):
+                super().__init__()
+                self.a = self.input(a)
+                self.out = self.output(Wire())
+                NAND(self.a, self.out, self.out)
+
+        with self.assertRaises(CircuitError):
+            analyze(Loop(Wire()))
@@ -0,0 +1,100 @@
+import unittest
+from circuit import CPU, ALU, reset_globals
+from circuit.cpu import Controller
+from circuit.simulator import Simulator
+from circuit.assembler import assemble, AssemblyError
+
+OP = Controller.OPCODE
+
+
+class AssemblerTest(unittest.TestCase):
+    def setUp(self):
+        reset_globals()
+
+    def test_instructions(self):
+        image = assemble("""
+                LDI X, 10         ; a comment
+                LDI Y, #0
+        loop:   ALU Y, ADD
+                ADDI X, -1
+                JNZ loop
+                MOV x
+                HLT
+        """)
+        self.assertEqual(image, bytes([
+            OP.LDI | 0, 10,
+            OP.LDI | 1, 0,
+            OP.ALU | 1, ALU.OPCODE.ADD,
+            OP.ADDI | 0, 0xff,
+            OP.JNZ, 4,
+            OP.MOV | 0,
+            OP.HLT,
+        ]))
+
+    def test_tabs(self):
+        spaced = assemble("loop: LDI X, 10\n  ADDI X, -1\n  JNZ loop\n  HLT\n")
+        tabbed = assemble("loop:\tLDI\tX,\t10\n\tADDI\tX, -1\n\tJNZ\tloop\n\tHLT\n")
+        self.assertEqual(tabbed, spaced)
+
+    def test_directives(self):
+        image = assemble("""
+                JMP start
+                .equ port, 0xf0
+        msg:    .byte "a;b", 0, 'c' + 1, 0b11
+                .org 0x10
+        start:  ST Y, port
+                LD X, msg + 1
+        """)
+        self.assertEqual(image[:8], bytes([OP.JMP, 0x10]) + b"a;b\x00d\x03")
+        self.assertEqual(image[0x10:], bytes([OP.ST | 1, 0xf0, OP.LD, 3]))
+        self.assertEqual(len(image), 0x14)
+
+    def test_forward_equ(self):
+        # `.equ` names may refer to labels, and other names, defined later.
+        image = assemble("""
+                .equ last, end - 1
+                .equ size, last - start
+                LDI X, size
+        start:  NOP
+                NOP
+        end:    HLT
+        """)
+        self.assertEqual(image, bytes([OP.LDI, 1, OP.NOP, OP.NOP, OP.HLT]))
+
+    def test_errors(self):
+        for source in [
+            "FOO X",            # unknown instruction
+            "LDI Z, 1",         # not a register
+            "LDI X",            # missing operand
+            "JMP nowhere",      # undefined label
+            "a: NOP\na: NOP",   # label defined twice
+            "LDI X, 1 2",       # missing operator
+            ".org 0xff\nLDI X, 1",  # beyond memory
+            ".equ a, b\n.equ b, a",  # names defined by each other
+        ]:
+            with self.assertRaises(AssemblyError):
+                assemble(source)
+        with self.assertRaises(AssemblyError) as raised:
+            assemble("NOP\nJMP nowhere")
+        self.assertEqual(raised.exception.line, 2)
+        with self.assertRaises(AssemblyError) as raised:
+            assemble("NOP\n.equ a, nowhere")
+        self.assertEqual(raised.exception.line, 2)
+
+    def test_run(self):
+        cpu = CPU()
+        cpu.load(assemble("""
+                LDI X, 0
+        loop:   LDX Y, src        ; copy src to dst
+                STX Y, dst
+                ADDI X, 1
+                CMPI X, 3
+                JC loop
+                HLT
+        src:    .byte "abc"
+        dst:    .byte 0, 0, 0
+        """))
+        sim = Simulator(cpu, "compiled")
+        halt = sim.watch(cpu.op.out, OP.HLT, stop=True)
+        self.assertIs(sim.run(500), halt)
+        self.assertEqual(cpu.ram.contents()[0x0d:0x13], b"abcabc")
@@ -0,0 +1,82 @@
+import unittest
+from circuit import Wire, Bus, reset_globals
+from circuit.combinational import Add8, ALU, Equal8, FullAdder
+from circuit.bdd import BDD, Symbolic
+from circuit.verify import equivalent
+
+from .test_verify import BrokenAdd8, RewrittenEqual8
+
+
+class BDDTest(unittest.TestCase):
+    def test_canonical(self):
+        m = BDD()
+        x, y, z = m.variable("x"), m.variable("y"), m.variable("z")
+
+        # distributivity holds by construction: both are the same node.
+        left = m.AND(x, m.OR(y, z))
+        right = m.OR(m.AND(x, y), m.AND(x, z))
+        self.assertEqual(left, right)
+        self.assertEqual(m.NAND(x, x), m.NOT(x))
+        self.assertEqual(m.XOR(x, x), BDD.FALSE)
+        self.assertEqual(m.OR(x, m.NOT(x)), BDD.TRUE)
+
+    def test_queries(self):
+        m = BDD()
+        x, y, z = m.variable("x"), m.variable("y"), m.variable("z")
+        f = m.AND(x, m.NOT(z))
+
+        self.assertEqual(m.count(f), 2)
+        self.assertEqual(m.support(f), {0, 2})
+        self.assertEqual(m.satisfy_one(f), {0: True, 2: False})
+        self.assertEqual(m.restrict(f, {0: True}), m.NOT(z))
+        self.assertIsNone(m.satisfy_one(m.AND(f, z)))
+
+
+class SymbolicTest(unittest.TestCase):
+    def setUp(self):
+        reset_globals()
+
+    def test_full_adder(self):
+        adder = Symbolic(FullAdder(Wire(), Wire(), Wire()))
+        m = adder.manager
+        a, = adder.inputs["a"]
+        b, = adder.inputs["b"]
+        cin, = adder.inputs["cin"]
+        self.assertEqual(adder.output("out"), m.XOR(m.XOR(a, b), cin))
+        self.assertEqual(
+            adder.output("cout"),
+            m.OR(m.AND(a, b), m.AND(cin, m.XOR(a, b))),
+        )
+
+    def test_alu(self):
+        alu = Symbolic(ALU(Bus(8), Bus(8), Bus(8), Wire()))
+        self.assertEqual(alu.evaluate(a=200, b=100, op=ALU.OPCODE.ADD, cin=0), {"out": 44, "cout": 1})
+        self.assertEqual(alu.evaluate(a=5, b=7, op=ALU.OPCODE.SUB, cin=0)["out"], 254)
+
+        # the adder's carry is still computed during logic operations.
+        found = alu.satisfy(alu.output("cout"), op=ALU.OPCODE.AND)
+        self.assertIsNotNone(found)
+        self.assertEqual(alu.evaluate(**found)["cout"], 1)
+
+        # but adding zero to zero with no carry in never carries out.
+        self.assertIsNone(alu.satisfy(alu.output("cout"), op=ALU.OPCODE.ADD, a=0, b=0, cin=0))
+
+        self.assertEqual(alu.dont_cares("out", op=ALU.OPCODE.AND), {"cin"})
+        self.assertEqual(alu.dont_cares("out", op=ALU.OPCODE.NB), {"a", "cin"})
+        self.assertEqual(alu.dont_cares("out", op=ALU.OPCODE.ADD), set())
+
+    def test_equivalent(self):
+        pins = {"a": 8, "b": 8}
+        self.assertTrue(equivalent(Equal8, RewrittenEqual8, pins=pins, method="bdd"))
+
+        pins = {"a": 8, "b": 8, "cin": 1}
+        result = equivalent(Add8, Add8, pins=pins, method="bdd")
+        self.assertTrue(result)
+        self.assertTrue(result.exhaustive)
+
+        result = equivalent(Add8, BrokenAdd8, pins=pins, method="bdd")
+        self.assertFalse(result)
+        good, bad = result.outputs
+        self.assertNotEqual(good, bad)
+        x, y, z = (result.counterexample[pin] for pin in ("a", "b", "cin"))
+        self.assertEqual(good["out"], (x + y + z) % 256)
@@ -0,0 +1,129 @@
+import unittest
+from circuit import Wire, Bus, Clock, TRUE, FALSE, CircuitError, Simulator, reset_globals, CPU
+from circuit.combinational import ALU, Add8
+from circuit.logic_gates import NOT
+from circuit.sequential import Counter8, RAM
+from circuit.behavioral import behavioral, gate_level
+
+
+class BehavioralALUTest(unittest.TestCase):
+    def setUp(self):
+        reset_globals()
+
+        self.inputs = Bus([Bus(8), Bus(8), Bus(8), Wire()])
+        self.a, self.b, self.op, self.cin = self.inputs
+        self.alu = ALU(a=self.a, b=self.b, op=self.op, cin=self.cin)
+
+    def run_alu(self, x, y, opcode, cin):
+        self.inputs.reset()
+        self.a.value = x
+        self.b.value = y
+        self.op.value = opcode
+        self.cin.value = cin
+        return self.alu.out.value, self.alu.cout.value
+
+    def test_matches_gate_level(self):
+        nums = [0, 1, 42, 127, 128, 255]
+        opcodes = [
+            value for name, value in vars(ALU.OPCODE).items()
+            if not name.startswith("_")
+        ]
+        cases = [
+            (x, y, opcode, cin)
+            for x in nums for y in nums for opcode in opcodes
+            for cin in [False, True]
+        ]
+
+        expected = [self.run_alu(*case) for case in cases]
+        behavioral(self.alu)
+        actual = [self.run_alu(*case) for case in cases]
+        self.assertEqual(actual, expected)
+
+    def test_floating_input(self):
+        behavioral(self.alu)
+        self.inputs.reset()
+        self.a.value = 1
+        self.op.value = ALU.OPCODE.ADD
+        self.cin.value = False
+        self.assertIs(self.alu.out.value, None)
+        self.b.value = 2
+        self.assertEqual(self.alu.out.value, 3)
+
+    def test_switch_back(self):
+        behavioral(self.alu)
+        self.assertEqual(self.run_alu(3, 4, ALU.OPCODE.ADD, False), (7, False))
+        gate_level(self.alu)
+        self.assertEqual(self.run_alu(5, 4, ALU.OPCODE.SUB, False), (1, False))
+
+    def test_no_model(self):
+        # a Component without a word-level model is refused at once, not on
+        # its first clock cycle.
+        inverter = NOT(Wire())
+        with self.assertRaises(CircuitError):
+            behavioral(inverter)
+        self.assertIsNone(getattr(inverter, "behavior", None))
+        with self.assertRaises(CircuitError):
+            Simulator(NOT(Wire()), engine="behavioral")
+
+
+class BehavioralSequentialTest(unittest.TestCase):
+    def setUp(self):
+        reset_globals()
+
+    def test_counter8(self):
+        counter = Counter8(enable=TRUE, zero=FALSE)
+        rails = Bus([TRUE, FALSE])
+
+        for i in range(300):
+            if i == 100:
+                behavioral(counter)
+            if i == 200:
+                gate_level(counter)
+            rails.reset()
+            rails.propagate()
+            self.assertEqual(counter.out.value, i % 256)
+
+    def test_ram(self):
+        addr, din, write = Bus(8), Bus(8), Wire()
+        ram = RAM(inp=din, addr=addr, write=write)
+        behavioral(ram)
+
+        def cycle(address, value, write_enable):
+            addr.reset(), din.reset(), write.reset()
+            din.value = value
+            addr.value = address
+            write.value = write_enable
+            return ram.out.value
+
+        cycle(0, 42, True)
+        cycle(255, 7, True)
+        self.assertEqual(cycle(0, 0, False), 42)
+        self.assertEqual(cycle(255, 0, False), 7)
+        self.assertEqual(ram.registers[255].state, 7)
+
+        # the state lives in the gate-level registers, so it survives.
+        gate_level(ram)
+        self.assertEqual(cycle(0, 0, False), 42)
+        self.assertEqual(cycle(255, 0, False), 7)
+
+
+class HybridCPUTest(unittest.TestCase):
+    def run_cpu(self, *behavioral_components):
+        reset_globals()
+        cpu = CPU()
+        cpu.ram.registers[42].bit_registers[7].next_state = True
+        for name in behavioral_components:
+            behavioral(getattr(cpu, name))
+
+        clock = Clock(cpu)
+        dumps = []
+        for i in range(10):
+            clock.reset()
+            clock.propagate()
+            dumps.append(cpu.hex_dump())
+        return dumps
+
+    def test_hybrid_cpu(self):
+        expected = self.run_cpu()
+        self.assertEqual(self.run_cpu("ram", "alu"), expected)
+        self.assertEqual(self.run_cpu("step", "pc", "ram"), expected)
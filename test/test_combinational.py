@@ -1,7 +1,8 @@
 import unittest
 
-from circuit import Wire, Bus, Register, NAND, WireError, reset_globals
+from circuit import Wire, Bus, Register, NAND, ROM, WireError, CircuitError, reset_globals
 from circuit.combinational import *
+from circuit.verify import equivalent
 
 
 class AdderTest(unittest.TestCase):
@@ -131,6 +132,76 @@ class EightBitTest(unittest.TestCase):
                     self.assertEqual(out.value, (x + y + z) % 256)
                     self.assertIs(cout.value, x + y + z >= 256)
 
+    def test_fast_adders(self):
+        for adder in [CarryLookaheadAdd8, KoggeStoneAdd8, BrentKungAdd8]:
+            a, b, cin = inputs = Bus([Bus(8), Bus(8), Wire()])
+            out, cout = Bus(8), Wire()
+            adder(a=a, b=b, cin=cin, out=out, cout=cout)
+
+            for x in [0, 1, 2, 15, 16, 42, 127, 128, 200, 254, 255]:
+                for y in [0, 1, 3, 17, 128, 129, 240, 255]:
+                    for z in [False, True]:
+                        inputs.reset()
+                        a.value, b.value, cin.value = x, y, z
+                        self.assertEqual(out.value, (x + y + z) % 256, adder.__name__)
+                        self.assertIs(cout.value, x + y + z >= 256, adder.__name__)
+
+        # the base class has no network to build.
+        with self.assertRaises(CircuitError):
+            PrefixAddN(Bus(8), Bus(8), Wire())
+
+    def test_widths(self):
+        for width in [1, 4, 16]:
+            mask = (1 << width) - 1
+            a, b, cin = inputs = Bus([Bus(width), Bus(width), Wire()])
+            select = Wire()
+            adder = AddN(a, b, cin)
+            mux = MuxN(a, b, select)
+            fast = KoggeStoneAddN(a, b, cin)
+            self.assertEqual(len(adder.out), width)
+
+            for x, y, z in [(0, 0, 0), (mask, 1, 0), (mask // 3, mask // 2, 1), (mask, mask, 1)]:
+                inputs.reset(), select.reset()
+                a.value, b.value, cin.value = x, y, bool(z)
+                select.value = True
+                self.assertEqual(adder.out.value, (x + y + z) & mask)
+                self.assertIs(adder.cout.value, x + y + z > mask)
+                self.assertEqual(fast.out.value, (x + y + z) & mask)
+                self.assertEqual(mux.out.value, y)
+
+    def test_equal8(self):
+        a, b = inputs = Bus([ Bus(8), Bus(8) ])
+        out = Wire()
+        Equal8(a=a, b=b, out=out)
+
+        for x in [0, 1, 42, 128, 255]:
+            for y in [0, 1, 42, 128, 255]:
+                inputs.reset()
+                a.value = x
+                b.value = y
+                self.assertIs(out.value, x == y)
+
+    def test_decoder(self):
+        for width in range(1, 6):
+            inp = Bus(width)
+            decoder = Decoder(inp)
+            self.assertEqual(len(decoder.out), 1 << width)
+            for x in range(1 << width):
+                inp.reset()
+                inp.value = x
+                for i, wire in enumerate(decoder.out):
+                    self.assertIs(wire.value, i == x)
+        with self.assertRaises(CircuitError):
+            Decoder(Bus(0))
+
+    def test_decoded_rom(self):
+        contents = [(37 * address + 11) % 4096 for address in range(100)]
+        pins = {"addr": 7}
+        rom = lambda addr: ROM(addr, contents, word_bits=12)
+        decoded = lambda addr: DecodedROM(addr, contents, word_bits=12)
+        self.assertTrue(equivalent(rom, decoded, pins=pins))
+        self.assertTrue(equivalent(rom, decoded, pins=pins, method="bdd"))
+
     def test_left_shift8(self):
         a, b = inputs = Bus([ Bus(8), Bus(8) ])
         out = Bus(8)
@@ -238,3 +309,33 @@ class ALUTest(unittest.TestCase):
 
     def test_decb(self):
         self.assert_op(self.alu.OPCODE.DECB, lambda a, b: (b - 1) % 256)
+
+    def test_adder_choice(self):
+        alu = ALU(
+            a=Bus(8),
+            b=Bus(8),
+            op=Bus(8),
+            cin=Wire(),
+            adder=KoggeStoneAdd8,
+        )
+        alu.a.value = 100
+        alu.b.value = 27
+        alu.op.value = ALU.OPCODE.SUB
+        alu.cin.value = False
+        self.assertEqual(alu.out.value, 73)
+        self.assertIs(alu.cout.value, False)
+
+    def test_wide_alu(self):
+        alu = ALUN(a=Bus(16), b=Bus(16), op=Bus(8), cin=Wire())
+        for opcode, x, y, expected in [
+            (ALU.OPCODE.ADD, 40000, 30000, 70000 % 65536),
+            (ALU.OPCODE.SUB, 1000, 1001, 65535),
+            (ALU.OPCODE.NA, 0x00FF, 0, 0xFF00),
+            (ALU.OPCODE.OR, 0x0F00, 0x00F0, 0x0FF0),
+        ]:
+            Bus([alu.a, alu.b, alu.op, alu.cin]).reset()
+            alu.a.value, alu.b.value = x, y
+            alu.op.value = opcode
+            alu.cin.value = False
+            self.assertEqual(alu.out.value, expected)
+            self.assertEqual(alu.evaluate(x, y, opcode, False)["out"], expected)
@@ -1,14 +1,119 @@
 import unittest
-from circuit import Wire, Bus, TRUE, FALSE, CPU
+from circuit import Wire, Bus, TRUE, FALSE, CPU, ROM, Component, reset_globals
+from circuit.combinational import ALU, DecodedROM, Mux8
+from circuit.cpu import Controller, Mux8X4
+from circuit.simulator import Simulator
+from circuit.verify import equivalent
+
+OP = Controller.OPCODE
+
+# sums 10 + 9 + ... + 1 into Y, stores it at 0x80 and halts.
+SUM = [
+    OP.LDI | 0, 10,
+    OP.LDI | 1, 0,
+    OP.ALU | 1, ALU.OPCODE.ADD,  # 4: Y = Y + X
+    OP.ADDI | 0, 0xff,           # X = X - 1
+    OP.JNZ, 4,
+    OP.ST | 1, 0x80,
+    OP.HLT,
+]
+
+# copies the 5 bytes at 0x40 to 0x50.
+COPY = [
+    OP.LDI | 0, 0,
+    OP.LDX | 1, 0x40,            # 2: Y = RAM[0x40 + X]
+    OP.STX | 1, 0x50,            # RAM[0x50 + X] = Y
+    OP.ADDI | 0, 1,
+    OP.CMPI | 0, 5,
+    OP.JC, 2,                    # while X < 5
+    OP.HLT,
+]
+
 
 class CPUTest(unittest.TestCase):
-    def test_cpu(self):
-        inputs = Bus([TRUE, FALSE])
+    def setUp(self):
+        reset_globals()
+
+    def load(self, cpu, program, address=0):
+        for i, byte in enumerate(program):
+            cpu.ram.registers[address + i].next_state = byte
+
+    def test_sum(self):
+        cpu = CPU()
+        self.load(cpu, SUM)
+        sim = Simulator(cpu, "compiled")
+        sim.run(200)
+        self.assertEqual(cpu.y.state, 55)
+        self.assertEqual(cpu.ram.registers[0x80].state, 55)
+        self.assertEqual(cpu.pc.state, len(SUM) - 1)
+        # halted, so the rest of the run was fast-forwarded.
+        self.assertGreater(sim.skipped, 0)
+
+    def test_copy(self):
         cpu = CPU()
-        cpu.ram.registers[42].bit_registers[7].next_state = True
+        self.load(cpu, COPY)
+        self.load(cpu, b"hello", 0x40)
+        Simulator(cpu, "compiled").run(200)
+        self.assertEqual(cpu.ram.contents()[0x50:0x55], b"hello")
+
+    def test_engines(self):
+        # the gate-level ROM and the object engine agree cycle by cycle.
+        dumps = []
+        for engine, rom in [("compiled", ROM), ("compiled", DecodedROM), ("object", ROM)]:
+            reset_globals()
+            cpu = CPU(rom=rom)
+            self.load(cpu, SUM)
+            sim = Simulator(cpu, engine)
+            trace = []
+            for i in range(30):
+                sim.step()
+                trace.append(cpu.hex_dump())
+            dumps.append(trace)
+        self.assertEqual(dumps[1], dumps[0])
+        self.assertEqual(dumps[2], dumps[0])
+
+    def test_microcode(self):
+        pins = {"op": 8, "step": 2, "zero": 1, "carry": 1}
+        decoded = lambda **pins: Controller(rom=DecodedROM, **pins)
+        self.assertTrue(equivalent(Controller, decoded, pins=pins))
+
+
+class MuxTreeMux8X4(Component):
+    """
+    The original Mux8X4, built as a tree of three Mux8s.
+    """
+    def __init__(self, a, b, c, d, select, out=None):
+        super().__init__()
+        self.a = self.input(a, 8)
+        self.b = self.input(b, 8)
+        self.c = self.input(c, 8)
+        self.d = self.input(d, 8)
+        self.select = self.input(select, 2)
+        self.out = self.output(out, 8)
+
+        Mux8(
+            Mux8(self.a, self.b, select=self.select[1]).out,
+            Mux8(self.c, self.d, select=self.select[1]).out,
+            select=self.select[0],
+            out=self.out,
+        )
+
+
+class Mux8X4Test(unittest.TestCase):
+    def setUp(self):
+        reset_globals()
 
-        for i in range(10):
-            inputs.reset()
-            inputs.propagate()
-            print(cpu.hex_dump())
+    def test_select(self):
+        words = Bus([Bus(8), Bus(8), Bus(8), Bus(8), Bus(2)])
+        mux = Mux8X4(*words)
+        for select in range(4):
+            words.reset()
+            for word, value in zip(words, (11, 22, 33, 44)):
+                word.value = value
+            words[4].value = select
+            self.assertEqual(mux.out.value, (11, 22, 33, 44)[select])
 
+    def test_matches_mux_tree(self):
+        pins = {"a": 8, "b": 8, "c": 8, "d": 8, "select": 2}
+        self.assertTrue(equivalent(Mux8X4, MuxTreeMux8X4, pins=pins, seed=0))
+        self.assertTrue(equivalent(Mux8X4, MuxTreeMux8X4, pins=pins, method="bdd"))
@@ -0,0 +1,73 @@
+import unittest
+from circuit import CPU, CircuitError, reset_globals
+from circuit.cpu import Controller
+from circuit.simulator import Simulator
+from circuit.devices import MemoryMap, Console, InputFIFO, Timer
+
+OP = Controller.OPCODE
+
+# echoes the input to the console, then latches the timer and halts.
+ECHO = [
+    OP.LD | 0, 0xf2,    # 0: X = bytes waiting
+    OP.CMPI | 0, 0,
+    OP.JZ, 12,
+    OP.LD | 1, 0xf1,    # Y = the next byte
+    OP.ST | 1, 0xf0,    # print it
+    OP.JMP, 0,
+    OP.ST | 0, 0xf3,    # 12: latch the timer
+    OP.HLT,
+]
+
+
+class MemoryMapTest(unittest.TestCase):
+    def setUp(self):
+        reset_globals()
+
+    def echo(self, engine, data, cycles):
+        cpu = CPU()
+        for address, byte in enumerate(ECHO):
+            cpu.ram.registers[address].next_state = byte
+        sim = Simulator(cpu, engine)
+        io = MemoryMap(sim, cpu)
+        console = io.attach(Console(0xf0))
+        fifo = io.attach(InputFIFO(0xf1))
+        timer = io.attach(Timer(0xf3))
+        fifo.feed(data)
+        sim.run(cycles)
+        return cpu, sim, io, console
+
+    def test_echo(self):
+        cpu, sim, io, console = self.echo("compiled", b"hello", 300)
+        self.assertEqual(console.drain(), b"hello")
+        self.assertEqual(console.drain(), b"")
+        # every byte was read, and written, once.
+        self.assertEqual(io.writes, 5 + 1)
+        self.assertEqual(cpu.pc.state, len(ECHO) - 1)
+        # devices disable fast-forwarding.
+        self.assertEqual(sim.skipped, 0)
+
+    def test_timer(self):
+        cpu, sim, io, console = self.echo("compiled", b"", 100)
+        # LD, CMPI and JZ take 7 cycles, so the store latched it on the 10th.
+        self.assertEqual(cpu.ram.registers[0xf3].state, 10)
+        self.assertEqual(cpu.ram.registers[0xf4].state, 0)
+
+    def test_object_engine(self):
+        cpu, sim, io, console = self.echo("object", b"a", 40)
+        self.assertEqual(console.drain(), b"a")
+
+    def test_feed_later(self):
+        cpu, sim, io, console = self.echo("compiled", b"ab", 10)
+        fifo = io.devices[0xf1]
+        fifo.feed(b"cd")
+        sim.run(100)
+        self.assertEqual(console.drain(), b"abcd")
+
+    def test_overlap(self):
+        cpu = CPU()
+        io = MemoryMap(Simulator(cpu, "compiled"), cpu)
+        io.attach(InputFIFO(0x10))
+        with self.assertRaises(CircuitError):
+            io.attach(Console(0x11))
+        with self.assertRaises(CircuitError):
+            io.attach(Timer(0xff))
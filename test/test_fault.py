@@ -0,0 +1,71 @@
+import random
+import unittest
+from circuit import Wire, Bus, reset_globals
+from circuit.logic_gates import AND
+from circuit.combinational import FullAdder, Add8, ALU
+from circuit.fault import Fault, fault_simulate
+
+
+class FaultSimulationTest(unittest.TestCase):
+    def setUp(self):
+        reset_globals()
+
+    def test_and(self):
+        gate = AND(Wire(), Wire())
+        report = fault_simulate(gate, [{"a": 1, "b": 1}])
+        # only the faults which pull the output low are visible.
+        self.assertEqual(len(report.faults), 4)
+        self.assertEqual(len(report.detected), 2)
+        self.assertEqual(report.coverage, 0.5)
+
+        report = fault_simulate(gate, [{"a": 1, "b": 1}, {"a": 0, "b": 1}, {"a": 1, "b": 0}])
+        self.assertEqual(report.coverage, 1.0)
+        self.assertEqual(report.undetected, [])
+
+    def test_full_adder_exhaustive(self):
+        adder = FullAdder(Wire(), Wire(), Wire())
+        vectors = [
+            {"a": x & 1, "b": (x >> 1) & 1, "cin": x >> 2}
+            for x in range(8)
+        ]
+        self.assertEqual(fault_simulate(adder, vectors).coverage, 1.0)
+
+    def test_lanes_and_dropping(self):
+        adder = Add8(Bus(8), Bus(8), Wire())
+        rng = random.Random(8)
+        vectors = [
+            {"a": rng.randrange(256), "b": rng.randrange(256), "cin": rng.randrange(2)}
+            for i in range(40)
+        ]
+
+        dropped = fault_simulate(adder, vectors, lanes=16)
+        wide = fault_simulate(adder, vectors, lanes=512)
+        counted = fault_simulate(adder, vectors, drop=False)
+
+        self.assertEqual(set(dropped.detected), set(wide.detected))
+        self.assertEqual(set(dropped.detected), set(counted.detected))
+        for fault in counted.detected:
+            self.assertGreater(counted.detections[fault], 0)
+        for fault in counted.undetected:
+            self.assertEqual(counted.detections[fault], 0)
+
+    def test_alu_coverage(self):
+        alu = ALU(Bus(8), Bus(8), Bus(8), Wire())
+        opcodes = [
+            value for name, value in vars(ALU.OPCODE).items()
+            if not name.startswith("_")
+        ]
+        rng = random.Random(1)
+        vectors = [
+            {
+                "a": rng.randrange(256),
+                "b": rng.randrange(256),
+                "op": rng.choice(opcodes),
+                "cin": rng.randrange(2),
+            }
+            for i in range(200)
+        ]
+        report = fault_simulate(alu, vectors)
+        self.assertGreater(report.coverage, 0.9)
+        for fault in report.undetected:
+            self.assertIsInstance(fault, Fault)
@@ -1,5 +1,14 @@
+import gc
 import unittest 
-from circuit.kernel import Wire, Bus, Register, NAND, WireError
+import weakref
+from circuit.kernel import (
+    Wire, Bus, Component, Register, RegisterFile, NAND, TriState, ResolvedWire,
+    ROM, Elaboration, Template, TRUE, FALSE, WireError, CircuitError, CombinationalLoop,
+    levelize, seal, hierarchical_name, reset_globals
+)
+from circuit.combinational import Add8
+from circuit.sequential import RAM
+from circuit.behavioral import behavioral, gate_level
 
 class TestWire(unittest.TestCase):
     def test_wire(self):
@@ -123,4 +132,327 @@ class TestRegister(unittest.TestCase):
 
         self.assertIs(out.value, False)
 
+
+class TestRegisterFile(unittest.TestCase):
+    def test_words(self):
+        registers = RegisterFile()
+        start = registers.allocate(12)
+        self.assertEqual(len(registers), 12)
+        registers.set_word(start + 4, 8, 0xA5)
+        self.assertEqual(registers.word(start + 4, 8), 0xA5)
+        self.assertEqual(registers.word(start, 4), 0)
+        self.assertEqual(registers.state[4:12], bytes([1, 0, 1, 0, 0, 1, 0, 1]))
+
+    def test_commit(self):
+        registers = RegisterFile()
+        registers.allocate(8)
+        registers.set_word(0, 8, 42, registers.next_state)
+        self.assertEqual(registers.word(0, 8), 0)
+        registers.commit()
+        self.assertEqual(registers.word(0, 8), 42)
+
+    def test_register_view(self):
+        register = Register(inp=Wire(), enable=Wire())
+        register.next_state = True
+        self.assertIs(register.state, False)
+        self.assertEqual(register.file.next_state[register.index], 1)
+        register.file.commit()
+        self.assertIs(register.state, True)
+
+    def test_with(self):
+        outer = Register(inp=Wire(), enable=Wire()).file
+        with RegisterFile() as registers:
+            first = Register(inp=Wire(), enable=Wire())
+            with RegisterFile() as inner:
+                Register(inp=Wire(), enable=Wire())
+            second = Register(inp=Wire(), enable=Wire())
+        self.assertIs(first.file, registers)
+        self.assertEqual((first.index, second.index), (0, 1))
+        self.assertEqual(len(inner), 1)
+        self.assertIs(Register(inp=Wire(), enable=Wire()).file, outer)
+
+    def test_journal(self):
+        registers = RegisterFile()
+        registers.allocate(16)
+        with self.assertRaises(CircuitError):
+            registers.changed_since(0)
+
+        first = registers.checkpoint()
+        registers.set_word(0, 16, 0b1001, registers.next_state)
+        registers.commit()
+        self.assertEqual(registers.changed_since(first), {12, 15})
+
+        second = registers.checkpoint()
+        registers.commit()
+        registers.set_word(4, 4, 0b0001)
+        self.assertEqual(registers.changed_since(second), {7})
+        self.assertEqual(registers.changed_since(first), {7, 12, 15})
+
+        # the journal keeps only the last change of each slot in the end.
+        for value in range(5000):
+            registers.set_word(0, 2, value)
+        self.assertLess(len(registers.journal), 5000)
+        self.assertEqual(registers.changed_since(second), {0, 1, 7})
+
+
+class TestTriState(unittest.TestCase):
+    def setUp(self):
+        self.bus = ResolvedWire()
+        self.inputs = Bus(4)
+        self.first = TriState(self.inputs[0], self.inputs[1], out=self.bus)
+        self.second = TriState(self.inputs[2], self.inputs[3], out=self.bus)
+
+    def drive(self, first, first_enable, second, second_enable):
+        self.inputs.reset()
+        self.inputs.value = (first << 3) | (first_enable << 2) | (second << 1) | second_enable
+        return self.bus.value
+
+    def test_shared_bus(self):
+        self.assertIs(self.drive(1, 1, 0, 0), True)
+        self.assertIs(self.drive(0, 1, 1, 0), False)
+        self.assertIs(self.drive(0, 0, 1, 1), True)
+        self.assertIs(self.drive(1, 0, 0, 1), False)
+
+    def test_floating(self):
+        self.assertIs(self.drive(1, 0, 1, 0), None)
+
+    def test_contention(self):
+        with self.assertRaises(WireError):
+            self.drive(1, 1, 1, 1)
+
+    def test_requires_resolved_wire(self):
+        with self.assertRaises(CircuitError):
+            TriState(Wire(), Wire(), out=Wire())
+
+
+class TestROM(unittest.TestCase):
+    def test_lookup(self):
+        addr = Bus(3)
+        rom = ROM(addr, [7, 1, 4], word_bits=3)
+        for address, word in enumerate([7, 1, 4, 0, 0, 0, 0, 0]):
+            addr.reset()
+            addr.value = address
+            self.assertEqual(rom.out.value, word)
+
+    def test_floating(self):
+        addr = Bus(2)
+        rom = ROM(addr, [3, 2, 1, 0], word_bits=2)
+        addr[1].value = True
+        self.assertIsNone(rom.out.value)
+
+    def test_contents(self):
+        with self.assertRaises(CircuitError):
+            ROM(Bus(2), [0] * 5)
+        with self.assertRaises(CircuitError):
+            ROM(Bus(2), [256])
+        self.assertEqual(ROM(Bus(2), [], out=Bus(4)).contents, (0, 0, 0, 0))
+
+
+class Latch(Component):
+    """
+    Registers the NAND of `a` with each bit of `b`; templated for testing.
+    """
+    templated = True
+
+    def __init__(self, a, b, out=None, invert=True):
+        super().__init__()
+        self.a = self.input(a)
+        self.b = self.input(b)
+        self.out = self.output(out, len(b))
+        for i in range(len(b)):
+            nand = NAND(self.a, self.b[i]).out
+            Register(nand if invert else NAND(nand, nand).out, enable=TRUE, out=self.out[i])
+
+
+class TestTemplate(unittest.TestCase):
+    def setUp(self):
+        reset_globals()
+        # Latch is small, so it is only cloned with no minimum size.
+        self.minimum = Template.minimum
+        Template.minimum = 0
+
+    def tearDown(self):
+        Template.minimum = self.minimum
+
+    def clock(self, inputs, values):
+        rails = Bus([TRUE, FALSE])
+        rails.reset(), inputs.reset()
+        rails.propagate()
+        inputs.value = values
+
+    def test_clones(self):
+        # the first instance is elaborated as usual; the second makes the
+        # Template, and is cloned from it like every later one.
+        first = Latch(Wire(), Bus(3))
+        self.assertEqual(list(Elaboration.templates.values()), [None])
+        second = Latch(Wire(), Bus(3))
+        self.assertEqual(len(Elaboration.templates), 1)
+        self.assertIsNotNone(list(Elaboration.templates.values())[0])
+        self.assertIsNot(first.children[0], second.children[0])
+        self.assertIsNot(first.children[0].out, second.children[0].out)
+        self.assertEqual(
+            [type(c) for c in first.descendants()],
+            [type(c) for c in second.descendants()],
+        )
+
+        # the clone's registers get their own slots in the RegisterFile.
+        indexes = [c.index for c in [*first.descendants(), *second.descendants()]
+                   if isinstance(c, Register)]
+        self.assertEqual(sorted(indexes), list(range(6)))
+
+        inputs = Bus([second.a, *second.b])
+        self.clock(inputs, 0b1101)
+        self.clock(inputs, 0)
+        self.assertEqual(second.out.value, 0b010)
+        # the first latch's inputs floated, so it captured nothing.
+        self.assertEqual(first.out.value, 0)
+
+    def test_key(self):
+        Latch(Wire(), Bus(3))
+        Latch(Wire(), Bus(4))
+        Latch(Wire(), Bus(3), invert=False)
+        Latch(a=Wire(), b=Bus(3), out=Bus(3))
+        self.assertEqual(len(Elaboration.templates), 4)
+
+        # unhashable arguments can't be cached, so they are elaborated.
+        Latch(Wire(), Bus(3), invert=[])
+        self.assertEqual(len(Elaboration.templates), 4)
+
+    def test_cache(self):
+        # small components are never cloned.
+        Template.minimum = 8
+        first = Latch(Wire(), Bus(3))
+        second = Latch(Wire(), Bus(3))
+        self.assertEqual(list(Elaboration.templates.values()), [Elaboration.SMALL])
+        self.assertIsNot(first.children[0], second.children[0])
+        Latch(Wire(), Bus(4))
+        Latch(Wire(), Bus(4))
+        self.assertIs(Elaboration.templates[second.template_key], Elaboration.SMALL)
+        self.assertIsInstance(list(Elaboration.templates.values())[1], Template)
+
+        # the cache is bounded, dropping the oldest first, and cleared by
+        # reset_globals().
+        limit = Elaboration.template_limit
+        Elaboration.template_limit = 2
+        try:
+            Latch(Wire(), Bus(5))
+            Latch(Wire(), Bus(6))
+            self.assertEqual(len(Elaboration.templates), 2)
+            self.assertNotIn(second.template_key, Elaboration.templates)
+        finally:
+            Elaboration.template_limit = limit
+        reset_globals()
+        self.assertEqual(Elaboration.templates, {})
+
+    def test_hierarchy(self):
+        class Pair(Component):
+            def __init__(self):
+                super().__init__()
+                self.first = Latch(Wire(), Bus(2))
+                self.second = Latch(self.first.out[0], Bus(2))
+
+        pair = Pair()
+        self.assertEqual(pair.children, [pair.first, pair.second])
+        self.assertIs(pair.second.parent, pair)
+        self.assertIn(pair.second, pair.first.out[0].downstream_components)
+        self.assertIs(pair.second.a, pair.first.out[0])
+
+class TestLevelize(unittest.TestCase):
+    def setUp(self):
+        reset_globals()
+
+    def test_levels(self):
+        a, b = Wire(), Wire()
+        first = NAND(a, b)
+        second = NAND(a, first.out)
+        third = NAND(first.out, b)
+        fourth = NAND(second.out, third.out)
+        levels = levelize([fourth, third, second, first])
+        self.assertEqual(levels, [[first], [third, second], [fourth]])
+
+    def test_loop(self):
+        a = Wire()
+        loop = Wire()
+        before = NAND(a, a)
+        first = NAND(before.out, loop)
+        second = NAND(first.out, a)
+        third = NAND(second.out, a, out=loop)
+        with self.assertRaises(CombinationalLoop) as raised:
+            levelize([before, first, second, third])
+        self.assertEqual(raised.exception.path, [first, second, third])
+        self.assertIn("3 gates: NAND -> NAND -> NAND -> NAND", str(raised.exception))
+
+    def test_strict(self):
+        class Loop(Component):
+            def __init__(self, a):
+                super().__init__()
+                self.a = self.input(a)
+                self.out = self.output(Wire())
+                NAND(self.a, NAND(self.a, self.out).out, out=self.out)
+
+        Loop(Wire())
+        Elaboration.strict = True
+        try:
+            with self.assertRaises(CombinationalLoop) as raised:
+                Loop(Wire())
+            self.assertIn("Loop/NAND -> Loop/NAND", str(raised.exception))
+            latch = Latch(Wire(), Bus(2))
+            self.assertEqual(len(latch.levels), 1)
+        finally:
+            Elaboration.strict = False
+
+class TestSeal(unittest.TestCase):
+    def setUp(self):
+        reset_globals()
+
+    def test_seal(self):
+        class Pair(Component):
+            def __init__(self, a, b):
+                super().__init__()
+                self.a = self.input(a, 8)
+                self.b = self.input(b, 8)
+                self.adder = Add8(self.a, self.b, FALSE)
+                self.ram = RAM(self.adder.out, Bus(2), Wire(), addr_bits=2)
+                self.out = self.output(self.ram.out)
+
+        pair = Pair(Bus(8), Bus(8))
+        names = { gate: hierarchical_name(gate) for gate in pair.primitives() }
+        full_adder = weakref.ref(pair.adder.children[0])
+        seal(pair)
+        gc.collect()
+
+        # the grouping Components are gone, except the ones attributes name.
+        self.assertIsNone(full_adder())
+        self.assertEqual(pair.children, (pair.adder, pair.ram))
+        self.assertTrue(all(isinstance(c, NAND) for c in pair.adder.children))
+        self.assertEqual(set(pair.primitives()), set(names))
+        for gate, name in names.items():
+            self.assertEqual(hierarchical_name(gate), name)
+            for wire in gate.inputs:
+                if wire is not TRUE and wire is not FALSE:
+                    self.assertIsInstance(wire.downstream_components, tuple)
+                self.assertTrue(all(c.primitive for c in wire.downstream_components))
+
+        # it still simulates, at gate level and behaviorally.
+        pins = Bus([pair.a, pair.b, pair.ram.addr, pair.ram.write])
+        for values in [(20, 22, 1, True), (1, 2, 2, True), (0, 0, 1, False)]:
+            rails = Bus([TRUE, FALSE])
+            rails.reset()
+            pins.reset()
+            rails.propagate()
+            pair.a.value, pair.b.value, pair.ram.addr.value, pair.ram.write.value = values
+        self.assertEqual(pair.out.value, 42)
+        behavioral(pair.ram)
+        gate_level(pair.ram)
+        self.assertEqual(pair.ram.contents()[1:3], bytes([42, 3]))
+
+        # a sealed wire can still be read by new Components.
+        NAND(pair.out[0], pair.out[1])
+
+    def test_without_names(self):
+        latch = Latch(Wire(), Bus(2))
+        seal(latch, names=False)
+        self.assertTrue(all(getattr(c, "path", None) is None for c in latch.primitives()))
+        self.assertEqual(hierarchical_name(latch.children[0]), "Latch/NAND")
+
 # TODO: TestNAND
@@ -0,0 +1,202 @@
+import random
+import unittest
+from circuit import (
+    Wire, Bus, TRUE, FALSE, NAND, TriState, ResolvedWire, ROM, Component, CircuitError,
+    WireError, Simulator, levelize, reset_globals,
+)
+from circuit.cpu import Mux8X4
+from circuit.logic_gates import NOT, XOR
+from circuit.combinational import Add8
+from circuit.sequential import Register8
+from circuit.netlist import Netlist
+
+
+class NetlistTest(unittest.TestCase):
+    def setUp(self):
+        reset_globals()
+
+    def test_topological_order(self):
+        a, b = Wire(), Wire()
+        xor = XOR(a, b)
+        netlist = Netlist(xor)
+        self.assertEqual(len(netlist.gates), 6)
+        self.assertEqual(len(netlist.level_starts), 4)
+        driven = set()
+        for a_net, b_net, out in netlist.table:
+            self.assertNotIn(out, driven)
+            for net in (a_net, b_net):
+                if net not in (netlist.inputs["a"][0], netlist.inputs["b"][0]):
+                    self.assertIn(net, driven)
+            driven.add(out)
+
+    def test_bit_parallel(self):
+        a, b, cin = Bus(8), Bus(8), Wire()
+        adder = Add8(a, b, cin)
+        netlist = Netlist(adder)
+        evaluate = netlist.compile()
+
+        # evaluate three additions at once in lanes 0, 1 and 2.
+        cases = [(1, 2, 0), (200, 100, 1), (255, 255, 1)]
+        mask = 0b111
+        v = netlist.values(mask)
+        for name, bits in netlist.inputs.items():
+            index = ["a", "b", "cin"].index(name)
+            for k, net in enumerate(reversed(bits)):
+                v[net] = sum(
+                    ((case[index] >> k) & 1) << lane
+                    for lane, case in enumerate(cases)
+                )
+        evaluate(v, mask)
+
+        for lane, (x, y, z) in enumerate(cases):
+            self.assertEqual(netlist.read(v, netlist.outputs["out"], lane), (x + y + z) % 256)
+            self.assertEqual(netlist.read(v, netlist.outputs["cout"], lane), int(x + y + z > 255))
+
+    def test_registers_are_sources(self):
+        register = Register8(Bus(8), Wire())
+        register.next_state = 42
+        register.commit()
+        netlist = Netlist(register)
+        self.assertEqual(len(netlist.registers), 8)
+        v = netlist.values()
+        self.assertEqual(netlist.read(v, netlist.outputs["out"]), 42)
+
+    def test_loop(self):
+        a = Wire()
+        loop = Wire()
+        first = NAND(a, loop)
+        second = NAND(first.out, a, out=loop)
+        with self.assertRaises(CircuitError):
+            levelize([first, second])
+
+    def test_changed_after_levelize(self):
+        class Inverters(Component):
+            def __init__(self, a, b):
+                super().__init__()
+                self.a = self.input(a)
+                self.b = self.input(b)
+                self.first = NAND(self.a, self.a)
+                self.second = NAND(self.b, self.b)
+                self.out = self.output(self.first.out)
+
+        inverters = Inverters(Wire(), Wire())
+        self.assertEqual(len(inverters.levelize()), 1)
+
+        # the first gate now reads the second, so it has to come after it.
+        first, second = inverters.first, inverters.second
+        second.out.downstream_components.append(first)
+        first.a = first.b = second.out
+        first.inputs = [second.out, second.out]
+        netlist = Netlist(inverters)
+        self.assertEqual(netlist.gates, [second, first])
+        v = netlist.values()
+        netlist.set_inputs(v, {"a": 0, "b": 1})
+        netlist.compile()(v, 1)
+        self.assertEqual(netlist.read(v, netlist.outputs["out"]), 1)
+
+
+class TernaryTest(unittest.TestCase):
+    def setUp(self):
+        reset_globals()
+
+    def check(self, component, patterns):
+        """
+        Evaluates every pattern of input values (None for floating) in its
+        own lane, and checks every net against the object kernel.
+        """
+        netlist = Netlist(component)
+        evaluate = netlist.compile_ternary()
+        mask = (1 << len(patterns)) - 1
+        hi, lo = netlist.ternary_values(mask)
+        for lane, values in enumerate(patterns):
+            lane_hi, lane_lo = netlist.ternary_values()
+            netlist.set_ternary_inputs(lane_hi, lane_lo, values)
+            for net in range(len(netlist)):
+                hi[net] = hi[net] & ~(1 << lane) | lane_hi[net] << lane
+                lo[net] = lo[net] & ~(1 << lane) | lane_lo[net] << lane
+        self.assertEqual(evaluate(hi, lo, mask), 0)
+
+        rails = Bus([TRUE, FALSE])
+        pins = component.input_pins()
+        for lane, values in enumerate(patterns):
+            rails.reset()
+            for pin in pins.values():
+                pin.reset()
+            rails.propagate()
+            for name, value in values.items():
+                if value is not None:
+                    pins[name].value = value
+            for net, wire in enumerate(netlist.wires):
+                known = (hi[net] | lo[net]) >> lane & 1
+                self.assertEqual(
+                    bool(hi[net] >> lane & 1) if known else None, wire.value,
+                    (lane, values, net),
+                )
+
+    def test_nand_controlling_values(self):
+        a, b = Wire(), Wire()
+        nand = NAND(a, b)
+        values = [None, False, True]
+        self.check(nand, [{"a": x, "b": y} for x in values for y in values])
+
+    def test_adder(self):
+        rng = random.Random(0)
+        patterns = []
+        for i in range(30):
+            values = {"a": rng.randrange(256), "b": rng.randrange(256), "cin": rng.random() < 0.5}
+            values[rng.choice(list(values))] = None
+            patterns.append(values)
+        self.check(Add8(Bus(8), Bus(8), Wire()), patterns)
+
+    def test_tristates_and_rom(self):
+        class Lookup(Component):
+            def __init__(self):
+                super().__init__()
+                self.a, self.b, self.c, self.d = (self.input(Bus(8)) for i in range(4))
+                self.select = self.input(Bus(2))
+                mux = Mux8X4(self.a, self.b, self.c, self.d, self.select)
+                self.out = self.output(ROM(mux.out, range(255, -1, -1)).out)
+
+        rng = random.Random(1)
+        patterns = []
+        for i in range(30):
+            values = {name: rng.randrange(256) for name in "abcd"}
+            values["select"] = rng.randrange(4)
+            values[rng.choice(list(values))] = None
+            patterns.append(values)
+        self.check(Lookup(), patterns)
+
+    def test_contention(self):
+        class Shared(Component):
+            def __init__(self):
+                super().__init__()
+                self.inp = self.input(Bus(2))
+                self.enable = self.input(Bus(2))
+                self.out = self.output(ResolvedWire())
+                TriState(self.inp[0], self.enable[0], out=self.out)
+                TriState(self.inp[1], self.enable[1], out=self.out)
+
+        netlist = Netlist(Shared())
+        evaluate = netlist.compile_ternary()
+        hi, lo = netlist.ternary_values(0b1111)
+        # lanes 0 to 3 enable neither, the first, the second and both.
+        (first, second), (one, zero) = netlist.inputs["enable"], netlist.inputs["inp"]
+        hi[first], lo[first] = 0b1010, 0b0101
+        hi[second], lo[second] = 0b1100, 0b0011
+        hi[one], lo[one] = 0b1111, 0
+        hi[zero], lo[zero] = 0, 0b1111
+        self.assertEqual(evaluate(hi, lo, 0b1111), 0b1000)
+        out = netlist.outputs["out"]
+        self.assertEqual(
+            [netlist.read_ternary(hi, lo, out, lane) for lane in range(3)],
+            [None, 1, 0],
+        )
+
+        # clocked by the ternary engine, contention raises as in the kernel.
+        sim = Simulator(Shared(), "ternary")
+        sim.step(inp=0b10, enable=0b01)
+        self.assertEqual(sim.read("out"), 0)
+        sim.step(enable=0b00)
+        self.assertIsNone(sim.read("out"))
+        with self.assertRaises(WireError):
+            sim.step(enable=0b11)
@@ -1,6 +1,7 @@
 import unittest
-from circuit import Wire, Bus, TRUE, FALSE, reset_globals
-from circuit.sequential import Register8, Counter8, RAM
+from circuit import Wire, Bus, TRUE, FALSE, CircuitError, reset_globals
+from circuit.combinational import BrentKungAdd8
+from circuit.sequential import Register8, CounterN, Counter8, RAM
 
 
 class Register8Test(unittest.TestCase):
@@ -62,6 +63,22 @@ class Counter8Test(unittest.TestCase):
             # print("test_counter8", , counter.out.value)
             self.assertEqual(counter.out.value, i % 256)
 
+    def test_adder_choice(self):
+        counter = Counter8(enable=TRUE, zero=FALSE, adder=BrentKungAdd8)
+        rails = Bus([TRUE, FALSE])
+        for i in range(300):
+            rails.reset()
+            rails.propagate()
+            self.assertEqual(counter.out.value, i % 256)
+
+    def test_width(self):
+        counter = CounterN(enable=TRUE, zero=FALSE, out=Bus(4))
+        rails = Bus([TRUE, FALSE])
+        for i in range(40):
+            rails.reset()
+            rails.propagate()
+            self.assertEqual(counter.out.value, i % 16)
+
     def test_enable(self):
         fizz_buzz = Wire()
         counter = Counter8(
@@ -154,6 +171,70 @@ class RAMTest(unittest.TestCase):
 
         # print(self.ram.hex_dump())
 
+    def test_contents(self):
+        self.write(0, 42)
+        self.write(17, 255)
+        self.read(0)
+        contents = self.ram.contents()
+        self.assertEqual(len(contents), 256)
+        self.assertEqual(contents[0], 42)
+        self.assertEqual(contents[17], 255)
+        self.assertEqual(sum(contents), 42 + 255)
+        self.assertEqual(self.ram.hex_dump().splitlines()[1][:5], "00 ff")
+
+    def test_load(self):
+        self.ram.load(b"hello", 0x10)
+        self.assertEqual(self.ram.contents()[0x10:0x15], b"hello")
+        self.assertEqual(self.read(0x14), ord("o"))
+        self.assertEqual(self.ram.registers[0x10].next_state, ord("h"))
+        with self.assertRaises(CircuitError):
+            self.ram.load(b"xy", 255)
+
+    def test_sizes(self):
+        for addr_bits, word_bits in [(1, 1), (3, 4), (4, 12)]:
+            addr, din, write = Bus(addr_bits), Bus(word_bits), Wire()
+            ram = RAM(din, addr, write, addr_bits=addr_bits, word_bits=word_bits)
+            self.assertEqual(len(ram.registers), 1 << addr_bits)
+            rails = Bus([TRUE, FALSE])
+
+            def cycle(address, value, w):
+                rails.reset(), addr.reset(), din.reset(), write.reset()
+                rails.propagate()
+                addr.value, din.value, write.value = address, value, w
+                return ram.out.value
+
+            top = (1 << word_bits) - 1
+            last = (1 << addr_bits) - 1
+            cycle(0, top, True)
+            cycle(last, 1, True)
+            self.assertEqual(cycle(0, 0, False), top)
+            self.assertEqual(cycle(last, 0, False), 1)
+
+            word_bytes = (word_bits + 7) // 8
+            contents = ram.contents()
+            self.assertEqual(len(contents), (1 << addr_bits) * word_bytes)
+            self.assertEqual(int.from_bytes(contents[:word_bytes], "big"), top)
+
+    def test_clones(self):
+        # later RAMs of the same size are cloned from a template, and each
+        # gets its own slice of the RegisterFile.
+        rams = [self.ram] + [RAM(Bus(8), Bus(8), Wire()) for i in range(2)]
+        offsets = sorted(ram.offset for ram in rams)
+        self.assertEqual(offsets[1] - offsets[0], 2048)
+        self.assertEqual(offsets[2] - offsets[1], 2048)
+
+        rails = Bus([TRUE, FALSE])
+        for k, ram in enumerate(rams):
+            rails.reset(), ram.inp.reset(), ram.addr.reset(), ram.write.reset()
+            rails.propagate()
+            ram.inp.value, ram.addr.value, ram.write.value = 10 + k, 3, True
+        for k, ram in enumerate(rams):
+            rails.reset(), ram.inp.reset(), ram.addr.reset(), ram.write.reset()
+            rails.propagate()
+            ram.inp.value, ram.addr.value, ram.write.value = 0, 3, False
+            self.assertEqual(ram.out.value, 10 + k)
+            self.assertEqual(ram.contents()[3], 10 + k)
+
 
     @unittest.skip
     def test_ram_heavy(self):
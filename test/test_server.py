@@ -0,0 +1,177 @@
+import asyncio
+import gc
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from circuit import CircuitError, RegisterFile, reset_globals
+from circuit import kernel
+from circuit.assembler import assemble
+from circuit.server import SimulationServer, Client
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "needs Unix sockets")
+class ServerTest(unittest.TestCase):
+    def setUp(self):
+        reset_globals()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "circuit.sock")
+        self.loop = asyncio.new_event_loop()
+        self.server = SimulationServer(quantum=10)
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.listener = self.loop.run_until_complete(self.server.start(self.path))
+            started.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        started.wait()
+
+    def tearDown(self):
+        async def shutdown():
+            self.listener.close()
+            await self.listener.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.directory.cleanup()
+
+    def test_cpu(self):
+        image = assemble("""
+                LDI X, 10
+                LDI Y, 0
+        loop:   ALU Y, ADD
+                ADDI X, -1
+                JNZ loop
+                ST Y, 0x80
+                HLT
+        """)
+        with Client(self.path) as client:
+            (opened,) = client.call({"op": "open", "circuit": "cpu"})
+            session = opened["session"]
+            read = {"op": "read", "session": session, "names": ["y.out", "pc.out"]}
+            halt = {"op": "step", "session": session, "cycles": 1000,
+                    "until": {"name": "op.out", "value": 0xf0}, "id": "run"}
+            replies = client.call(
+                {"op": "load", "session": session, "image": image.hex()},
+                {"op": "step", "session": session, "cycles": 30},
+                read,
+                {"op": "snapshot", "session": session},
+                halt,
+                read,
+                {"op": "memory", "session": session},
+            )
+            early, state = replies[2]["values"], replies[3]["state"]
+            self.assertEqual(replies[4]["id"], "run")
+            self.assertTrue(replies[4]["stopped"])
+            self.assertLess(replies[4]["cycles"], 1000)
+            # PC is past the HLT just fetched.
+            self.assertEqual(replies[5]["values"], [55, len(image)])
+            self.assertEqual(bytes.fromhex(replies[6]["memory"])[0x80], 55)
+
+            # a restored state reads back at once, and runs on as before.
+            replies = client.call(
+                {"op": "restore", "session": session, "state": state},
+                read,
+                {"op": "snapshot", "session": session},
+                halt,
+                read,
+            )
+            self.assertEqual(replies[1]["values"], early)
+            self.assertNotEqual(early, [55, len(image)])
+            self.assertEqual(replies[2]["state"], state)
+            self.assertEqual(replies[4]["values"], [55, len(image)])
+
+    def test_sessions(self):
+        with Client(self.path) as first, Client(self.path) as second:
+            (a,) = first.call({"op": "open", "circuit": "counter"})
+            (b,) = second.call({"op": "open", "circuit": "counter", "engine": "object"})
+            first.call({"op": "step", "session": a["session"], "cycles": 5, "inputs": {"zero": False}})
+            second.call({"op": "step", "session": b["session"], "cycles": 3, "inputs": {"zero": False}})
+            self.assertEqual(first.call({"op": "read", "session": a["session"], "names": ["out"]})[0]["values"], [4])
+            self.assertEqual(second.call({"op": "read", "session": b["session"], "names": ["out"]})[0]["values"], [2])
+
+            # sessions belong to their connection.
+            with self.assertRaises(CircuitError):
+                second.call({"op": "read", "session": a["session"], "names": ["out"]})
+
+    def test_object_sessions(self):
+        # object-engine sessions, and the spares waiting to be opened, are
+        # clocked separately though they share the TRUE rail.
+        def step(client, session, cycles):
+            client.call({"op": "step", "session": session, "cycles": cycles, "inputs": {"zero": False}})
+
+        def read(client, session):
+            return client.call({"op": "read", "session": session, "names": ["out"]})[0]["values"][0]
+
+        opened = {"op": "open", "circuit": "counter", "engine": "object"}
+        with Client(self.path) as first, Client(self.path) as second:
+            a = first.call(opened)[0]["session"]
+            b = second.call(opened)[0]["session"]
+            step(second, b, 3)
+            step(first, a, 10)
+            self.assertEqual(read(first, a), 9)
+            self.assertEqual(read(second, b), 2)
+            step(second, b, 1)
+            self.assertEqual(read(second, b), 3)
+
+            c = first.call(opened)[0]["session"]
+            step(first, c, 1)
+            self.assertEqual(read(first, c), 0)
+            self.assertEqual(read(first, a), 9)
+            self.assertEqual(read(second, b), 3)
+
+            # restoring reads back at once in the object engine too.
+            (snapshot,) = first.call({"op": "snapshot", "session": a})
+            step(first, a, 4)
+            first.call({"op": "restore", "session": a, "state": snapshot["state"]})
+            self.assertEqual(read(first, a), 9)
+            step(first, a, 1)
+            self.assertEqual(read(first, a), 10)
+
+    def test_closed_sessions(self):
+        # closed sessions free their Registers, so a server serving one
+        # session after another stays the same size.
+        def files():
+            gc.collect()
+            return sum(isinstance(obj, RegisterFile) for obj in gc.get_objects())
+
+        sizes = []
+        with Client(self.path) as client:
+            for i in range(6):
+                for engine in ("compiled", "object"):
+                    (opened,) = client.call({"op": "open", "circuit": "cpu", "engine": engine})
+                    client.call(
+                        {"op": "step", "session": opened["session"], "cycles": 3},
+                        {"op": "close", "session": opened["session"]},
+                    )
+                sizes.append((len(kernel.REGISTERS), files()))
+        self.assertEqual(sizes[1:], sizes[-1:] * 5)
+
+    def test_errors(self):
+        with Client(self.path) as client:
+            for command in [
+                {"op": "open", "circuit": "nothing"},
+                {"op": "read", "session": 99, "names": []},
+                {"op": "frobnicate"},
+            ]:
+                with self.assertRaises(CircuitError):
+                    client.call(command)
+            (opened,) = client.call({"op": "open", "circuit": "ram"})
+            with self.assertRaises(CircuitError):
+                client.call({"op": "read", "session": opened["session"], "names": ["no.such"]})
+            # a line which is JSON, but not a batch of commands
+            client.file.write(b"5\n")
+            client.file.flush()
+            reply = json.loads(client.file.readline())
+            self.assertFalse(reply["ok"])
+            self.assertIn("error", reply)
+            # the connection still works after errors.
+            client.call({"op": "step", "session": opened["session"], "inputs": {"addr": 1, "inp": 2, "write": True}})
@@ -0,0 +1,228 @@
+import gc
+import random
+import unittest
+import weakref
+from circuit import Wire, Bus, Component, TRUE, FALSE, CircuitError, reset_globals
+from circuit.sequential import Counter8, RAM, Register8
+from circuit.simulator import Simulator
+
+
+class SimulatorTest(unittest.TestCase):
+    def setUp(self):
+        reset_globals()
+
+    def test_counter(self):
+        for engine in Simulator.ENGINES:
+            reset_globals()
+            sim = Simulator(Counter8(enable=TRUE, zero=Wire()), engine)
+            sim.step(zero=False)
+            self.assertEqual(sim.read("out"), 0)
+            sim.run(9)
+            self.assertEqual(sim.read("out"), 9, engine)
+            sim.step(zero=True)
+            sim.step(zero=False)
+            self.assertEqual(sim.read("out"), 0, engine)
+            self.assertEqual(sim.cycles, 12)
+
+    def test_engines_agree(self):
+        rng = random.Random(0)
+        script = [
+            (rng.randrange(16), rng.randrange(256), rng.random() < 0.5)
+            for i in range(40)
+        ]
+        results = {}
+        for engine in Simulator.ENGINES:
+            reset_globals()
+            ram = RAM(Bus(8), Bus(4), Wire(), addr_bits=4)
+            sim = Simulator(ram, engine)
+            reads = []
+            for addr, value, write in script:
+                sim.step(addr=addr, inp=value, write=write)
+                reads.append(sim.read("out"))
+            results[engine] = (reads, ram.contents())
+        self.assertEqual(results["compiled"], results["object"])
+        self.assertEqual(results["behavioral"], results["object"])
+        self.assertEqual(results["ternary"], results["object"])
+
+    def test_ternary(self):
+        # pins which are not given float, and so does what they reach, as
+        # in the object engine; a Register holds its state while its input
+        # floats.
+        script = [{}, {"enable": True}, {"inp": 42}, {"enable": False, "inp": 9}]
+        results = {}
+        for engine in ("object", "ternary", "compiled"):
+            reset_globals()
+            sim = Simulator(Register8(Bus(8), Wire()), engine)
+            reads = []
+            for inputs in script:
+                sim.step(**inputs)
+                reads.append((sim.read("inp"), sim.read("out")))
+            results[engine] = reads
+        self.assertEqual(results["ternary"], results["object"])
+        self.assertEqual(results["ternary"], [(None, 0), (None, 0), (42, 0), (9, 42)])
+        # the compiled engine is two-valued, so it reads floating pins as 0.
+        self.assertEqual(results["compiled"][:2], [(0, 0), (0, 0)])
+
+        # the ternary engine can also float a pin again.
+        reset_globals()
+        sim = Simulator(Register8(Bus(8), Wire()), "ternary")
+        sim.step(enable=True, inp=5)
+        sim.step(inp=None)
+        sim.step()
+        self.assertEqual((sim.read("inp"), sim.read("out")), (None, 5))
+
+    def test_fast_forward(self):
+        for engine in ("object", "compiled"):
+            reset_globals()
+            sim = Simulator(Counter8(enable=TRUE, zero=Wire()), engine)
+            sim.step(zero=False)
+            sim.run(10_000_000)
+            self.assertEqual(sim.read("out"), 10_000_000 % 256, engine)
+            self.assertEqual(sim.cycles, 10_000_001)
+            self.assertGreater(sim.skipped, 10_000_000 - 1024)
+
+            # after skipping, the remainder of a run is simulated as usual.
+            sim.run(1000)
+            self.assertEqual(sim.read("out"), (10_000_000 + 1000) % 256, engine)
+
+        # with no fast-forward, every cycle is simulated.
+        reset_globals()
+        sim = Simulator(Counter8(enable=TRUE, zero=Wire()), fast_forward=False)
+        sim.run(600, zero=False)
+        self.assertEqual(sim.read("out"), 599 % 256)
+        self.assertEqual(sim.skipped, 0)
+
+    def test_snapshot_slots(self):
+        class Pair(Component):
+            def __init__(self):
+                super().__init__()
+                self.a = Register8(Bus(8), Wire())
+                self.spare = Register8(Bus(8), Wire())
+                self.b = Register8(Bus(8), Wire())
+
+        # the spare's slots lie between those of `a` and `b`, but it is not
+        # part of the circuit.
+        pair = Pair()
+        pair.children.remove(pair.spare)
+        for engine in ("object", "compiled"):
+            sim = Simulator(pair, engine)
+            self.assertEqual(len(sim.snapshot()), 2 * 16, engine)
+            before = sim.snapshot()
+            pair.spare.bit_registers[0].state = True
+            self.assertEqual(sim.snapshot(), before, engine)
+            pair.b.bit_registers[0].state = True
+            self.assertNotEqual(sim.snapshot(), before, engine)
+            pair.b.bit_registers[0].state = False
+            pair.spare.bit_registers[0].state = False
+
+    def test_restore(self):
+        for engine in Simulator.ENGINES:
+            reset_globals()
+            sim = Simulator(Counter8(enable=TRUE, zero=Wire()), engine)
+            sim.run(6, zero=False)
+            state = sim.snapshot()
+            sim.run(20)
+            sim.restore(state)
+            self.assertEqual(sim.read("out"), 5, engine)
+            self.assertEqual(sim.snapshot(), state, engine)
+            sim.step()
+            self.assertEqual(sim.read("out"), 6, engine)
+            with self.assertRaises(CircuitError):
+                sim.restore(state[1:])
+
+    def test_watch(self):
+        for engine in ("object", "compiled"):
+            reset_globals()
+            counter = Counter8(enable=TRUE, zero=Wire())
+            sim = Simulator(counter, engine)
+            breakpoint = sim.watch(counter.out, 40, stop=True)
+            rising = []
+            sim.watch(counter.out[7], "rising", callback=lambda s, v: rising.append(s.cycles))
+
+            self.assertIs(sim.run(1000, zero=False), breakpoint)
+            self.assertEqual(sim.read("out"), 40, engine)
+            self.assertEqual(sim.cycles, 41)
+            self.assertEqual(rising, list(range(2, 42, 2)))
+
+            # it triggers again once the counter wraps around.
+            self.assertIs(sim.run(1000), breakpoint)
+            self.assertEqual(sim.cycles, 41 + 256)
+            self.assertEqual(breakpoint.hits, 2)
+            self.assertEqual(sim.skipped, 0)
+
+            sim.unwatch(breakpoint)
+            self.assertIsNone(sim.run(100))
+            self.assertEqual(sim.cycles, 41 + 256 + 100)
+
+    def test_watch_fast_forward(self):
+        counter = Counter8(enable=TRUE, zero=Wire())
+        sim = Simulator(counter, "compiled")
+        never = sim.watch(counter.out, lambda previous, value: value > 255)
+        sim.run(100_000, zero=False)
+        self.assertGreater(sim.skipped, 90_000)
+        self.assertEqual(never.hits, 0)
+
+        with self.assertRaises(CircuitError):
+            sim.watch(counter.out, "rising")
+        with self.assertRaises(CircuitError):
+            sim.watch(Wire())
+
+    def test_diff_since(self):
+        for engine in Simulator.ENGINES:
+            reset_globals()
+            ram = RAM(Bus(8), Bus(8), Wire())
+            sim = Simulator(ram, engine)
+            sim.step(addr=3, inp=30, write=True)
+
+            checkpoint = ram.checkpoint()
+            sim.step(addr=200, inp=7, write=True)
+            sim.step(addr=3, inp=31, write=True)
+            sim.step(addr=9, inp=0, write=True)
+            sim.step(write=False)
+            self.assertEqual(ram.diff_since(checkpoint), {3: 31, 200: 7}, engine)
+
+            checkpoint = ram.checkpoint()
+            sim.step(addr=3, inp=31, write=True)
+            sim.step(write=False)
+            self.assertEqual(ram.diff_since(checkpoint), {}, engine)
+
+    def test_side_by_side(self):
+        # the object engine clocks only its own circuit, though both
+        # counters read the shared TRUE rail.
+        for engine in ("object", "behavioral"):
+            reset_globals()
+            a = Simulator(Counter8(enable=TRUE, zero=Wire()), engine, fast_forward=False)
+            b = Simulator(Counter8(enable=TRUE, zero=Wire()), engine, fast_forward=False)
+            b.run(3, zero=False)
+            self.assertEqual(b.read("out"), 2, engine)
+            a.run(10, zero=False)
+            self.assertEqual(a.read("out"), 9, engine)
+            self.assertEqual(b.read("out"), 2, engine)
+            b.step()
+            self.assertEqual(b.read("out"), 3, engine)
+
+            c = Simulator(Counter8(enable=TRUE, zero=Wire()), engine)
+            c.step(zero=False)
+            self.assertEqual(c.read("out"), 0, engine)
+            self.assertEqual(a.read("out"), 9, engine)
+
+    def test_close(self):
+        counter = Counter8(enable=TRUE, zero=Wire())
+        sim = Simulator(counter)
+        sim.run(5, zero=False)
+        fanout = len(TRUE.downstream_components)
+        sim.close()
+        self.assertLess(len(TRUE.downstream_components), fanout)
+        dropped = weakref.ref(counter)
+        del counter, sim
+        gc.collect()
+        self.assertIsNone(dropped())
+
+    def test_errors(self):
+        sim = Simulator(Counter8(enable=TRUE, zero=Wire()))
+        with self.assertRaises(CircuitError):
+            sim.step(enable=False)
+        with self.assertRaises(CircuitError):
+            sim.step(nope=1)
+        with self.assertRaises(CircuitError):
+            Simulator(Counter8(enable=TRUE, zero=FALSE), engine="spice")
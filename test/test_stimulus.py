@@ -0,0 +1,87 @@
+import os
+import random
+import tempfile
+import unittest
+from circuit import Wire, Bus, TRUE, CircuitError, reset_globals
+from circuit.sequential import Counter8, RAM
+from circuit.simulator import Simulator
+from circuit.stimulus import Stimulus, Recorder, replay
+
+
+def ram_circuit():
+    return RAM(Bus(8), Bus(4), Wire(), addr_bits=4)
+
+
+class StimulusTest(unittest.TestCase):
+    def setUp(self):
+        reset_globals()
+
+    def record(self):
+        rng = random.Random(1)
+        sim = Simulator(ram_circuit(), "object")
+        recorder = Recorder(sim)
+        for i in range(30):
+            sim.step(addr=rng.randrange(16), inp=rng.randrange(256), write=rng.random() < 0.5)
+        sim.run(50)
+        recorder.detach()
+        return sim, recorder.stimulus
+
+    def test_record(self):
+        sim, stimulus = self.record()
+        self.assertEqual(stimulus.cycles, 80)
+        # the 50 steady cycles are one record.
+        self.assertLessEqual(len(stimulus.records), 31)
+        self.assertEqual(stimulus.records[-1][0], 51)
+        frames = list(stimulus.inputs())
+        self.assertEqual(len(frames), 80)
+        self.assertEqual(frames[-1], sim.inputs)
+
+        data = stimulus.to_bytes()
+        copy = Stimulus.from_bytes(data)
+        self.assertEqual(copy.pins, stimulus.pins)
+        self.assertEqual(copy.records, stimulus.records)
+        with self.assertRaises(CircuitError):
+            Stimulus.from_bytes(data[:-1])
+        with self.assertRaises(CircuitError):
+            Stimulus.from_bytes(b"nothing")
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "run.stim")
+            stimulus.save(path)
+            self.assertEqual(Stimulus.load(path).records, stimulus.records)
+
+    def test_replay(self):
+        sim, stimulus = self.record()
+        expected = (sim.component.contents(), sim.read("out"))
+        for engine in Simulator.ENGINES:
+            reset_globals()
+            replayed = Simulator(ram_circuit(), engine)
+            self.assertEqual(replay(replayed, stimulus), 80)
+            self.assertEqual(replayed.cycles, 80)
+            self.assertEqual((replayed.component.contents(), replayed.read("out")), expected, engine)
+
+            # the simulator carries on with the last inputs.
+            replayed.step(write=False)
+            self.assertEqual(replayed.read("out"), expected[1], engine)
+
+    def test_undriven(self):
+        # a pin which was never driven stays that way in the replay.
+        sim = Simulator(Counter8(enable=TRUE, zero=Wire()), "compiled")
+        recorder = Recorder(sim)
+        sim.run(5)
+        sim.run(10, zero=False)
+        self.assertEqual(recorder.stimulus.pins, [("zero", 1)])
+        self.assertEqual(recorder.stimulus.records, [[5, 0], [10, 1]])
+
+        expected = sim.read("out")
+
+        reset_globals()
+        replayed = Simulator(Counter8(enable=TRUE, zero=Wire()), "compiled")
+        replay(replayed, recorder.stimulus)
+        self.assertEqual(replayed.read("out"), expected)
+
+    def test_errors(self):
+        sim, stimulus = self.record()
+        reset_globals()
+        with self.assertRaises(CircuitError):
+            replay(Simulator(Counter8(enable=TRUE, zero=Wire())), stimulus)
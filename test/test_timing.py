@@ -0,0 +1,76 @@
+import unittest
+from circuit import (
+    Wire, Bus, NAND, Component, CircuitError, reset_globals, Add8, KoggeStoneAdd8, CPU, Controller
+)
+from circuit.logic_gates import NOT, AND
+from circuit.assembler import assemble
+from circuit.simulator import Simulator
+from circuit.timing import TimingSimulator
+
+
+class TimingTest(unittest.TestCase):
+    def setUp(self):
+        reset_globals()
+
+    def carry_chain(self, adder, **kwargs):
+        sim = TimingSimulator(adder(Bus(8), Bus(8), Wire()), **kwargs)
+        sim.step(a=0xff, b=0, cin=False)
+        sim.step(cin=True)
+        self.assertEqual((sim.read("out"), sim.read("cout")), (0, 1))
+        return sim
+
+    def test_carry_chain(self):
+        # the carry ripples through every FullAdder of Add8, at least two
+        # NANDs each.
+        ripple = self.carry_chain(Add8)
+        self.assertGreaterEqual(ripple.settled("cout"), 2 * 8)
+        self.assertEqual(ripple.critical, ripple.settle)
+
+        reset_globals()
+        prefix = self.carry_chain(KoggeStoneAdd8)
+        self.assertLess(prefix.settled("cout"), ripple.settled("cout"))
+
+        reset_globals()
+        slow = self.carry_chain(Add8, delays={NAND: 3})
+        self.assertEqual(slow.settled("cout"), 3 * ripple.settled("cout"))
+        self.assertAlmostEqual(slow.max_frequency(1e-9), 1e9 / slow.critical)
+
+    def test_glitch(self):
+        # a AND NOT a is always False, but when a rises the NOT is late.
+        class Hazard(Component):
+            def __init__(self, a):
+                super().__init__()
+                self.a = self.input(a)
+                self.out = self.output(AND(self.a, NOT(self.a).out).out)
+
+        sim = TimingSimulator(Hazard(Wire()))
+        sim.step(a=False)
+        self.assertEqual(sim.glitches, 0)
+        sim.step(a=True)
+        self.assertEqual(sim.read("out"), 0)
+        self.assertEqual(sim.glitches, 2)
+        self.assertGreater(sim.events, 2)
+
+    def test_cpu(self):
+        results = []
+        for simulator in (Simulator, TimingSimulator):
+            reset_globals()
+            cpu = CPU()
+            cpu.load(assemble("""
+                    LDI X, 10
+                    LDI Y, 0
+            loop:   ALU Y, ADD
+                    ADDI X, -1
+                    JNZ loop
+                    HLT
+            """))
+            sim = simulator(cpu, engine="compiled") if simulator is Simulator else simulator(cpu)
+            sim.watch(cpu.op.out, Controller.OPCODE.HLT, stop=True)
+            self.assertIsNotNone(sim.run(500))
+            results.append((sim.cycles, cpu.hex_dump()))
+        self.assertEqual(results[0], results[1])
+        self.assertGreater(sim.critical, 0)
+
+    def test_errors(self):
+        with self.assertRaises(CircuitError):
+            TimingSimulator(Add8(Bus(8), Bus(8), Wire()), delays={NAND: 0})
@@ -0,0 +1,118 @@
+import unittest
+from circuit import Wire, Bus, Component, TRUE, FALSE, reset_globals
+from circuit.logic_gates import NOT, XOR, NOR, Mux
+from circuit.combinational import Add8, Equal8, FullAdder, Mux8
+from circuit.verify import equivalent
+
+
+class RewrittenEqual8(Component):
+    def __init__(self, a, b, out=None):
+        super().__init__()
+        self.a = self.input(a, 8)
+        self.b = self.input(b, 8)
+        self.out = self.output(out)
+
+        differs = [XOR(self.a[i], self.b[i]).out for i in range(8)]
+        while len(differs) > 2:
+            differs = [
+                NOT(NOR(left, right).out).out
+                for left, right in zip(differs[::2], differs[1::2])
+            ]
+        NOR(differs[0], differs[1], out=self.out)
+
+
+class BrokenAdd8(Add8):
+    """
+    Ripple-carry adder which drops the carry into bit 5.
+    """
+    def __init__(self, a, b, cin, out=None, cout=None):
+        Component.__init__(self)
+        self.a = self.input(a, 8)
+        self.b = self.input(b, 8)
+        self.cin = self.input(cin)
+        self.out = self.output(out, 8)
+        self.cout = self.output(cout)
+
+        carry = self.cin
+        for i in range(7, -1, -1):
+            adder = FullAdder(
+                a=self.a[i],
+                b=self.b[i],
+                cin=FALSE if i == 2 else carry,
+                out=self.out[i],
+                cout=self.cout if i == 0 else None,
+            )
+            carry = adder.cout
+
+
+class SwappedMux8(Component):
+    def __init__(self, a, b, select, out=None):
+        super().__init__()
+        self.a = self.input(a, 8)
+        self.b = self.input(b, 8)
+        self.select = self.input(select)
+        self.out = self.output(out, 8)
+
+        Mux8(self.b, self.a, NOT(self.select).out, out=self.out)
+
+
+class ReorderedMux8(Component):
+    """
+    Mux8 with its pins declared in a different order.
+    """
+    def __init__(self, a, b, select, out=None):
+        super().__init__()
+        self.select = self.input(select)
+        self.b = self.input(b, 8)
+        self.a = self.input(a, 8)
+        self.out = self.output(out, 8)
+
+        Mux8(self.a, self.b, self.select, out=self.out)
+
+
+class EquivalenceTest(unittest.TestCase):
+    def setUp(self):
+        reset_globals()
+
+    def test_exhaustive(self):
+        result = equivalent(Equal8, RewrittenEqual8, pins={"a": 8, "b": 8})
+        self.assertTrue(result)
+        self.assertTrue(result.exhaustive)
+        self.assertEqual(result.patterns, 1 << 16)
+
+        result = equivalent(Mux8, SwappedMux8, pins={"a": 8, "b": 8, "select": 1})
+        self.assertTrue(result)
+        self.assertEqual(result.patterns, 1 << 17)
+
+    def test_pin_order(self):
+        pins = {"a": 8, "b": 8, "select": 1}
+        for method in ("simulate", "bdd"):
+            self.assertTrue(equivalent(Mux8, ReorderedMux8, pins=pins, method=method), method)
+
+    def test_counterexample(self):
+        pins = {"a": 8, "b": 8, "cin": 1}
+        result = equivalent(Add8, BrokenAdd8, pins=pins)
+        self.assertFalse(result)
+        self.assertIsNotNone(result.counterexample)
+
+        x = result.counterexample["a"]
+        y = result.counterexample["b"]
+        z = result.counterexample["cin"]
+        good, bad = result.outputs
+        self.assertEqual(good["out"], (x + y + z) % 256)
+        self.assertNotEqual(good, bad)
+
+    def test_random(self):
+        pins = {"a": 8, "b": 8, "cin": 1}
+        result = equivalent(Add8, Add8, pins=pins, exhaustive_limit=8, seed=3)
+        self.assertTrue(result)
+        self.assertFalse(result.exhaustive)
+
+        result = equivalent(Add8, BrokenAdd8, pins=pins, exhaustive_limit=8, seed=3)
+        self.assertFalse(result)
+        self.assertFalse(result.exhaustive)
+
+    def test_keeps_rails_clean(self):
+        equivalent(Add8, BrokenAdd8, pins={"a": 8, "b": 8, "cin": 1})
+        self.assertEqual(TRUE.downstream_components, [])
+        self.assertEqual(FALSE.downstream_components, [])